@@ -0,0 +1,99 @@
+"""Single-file artefact bundle for fast server start-up
+
+Packs everything the backend needs to start scoring into one uncompressed
+.npz, read with plain array loads (no pickle, sklearn or shap):
+
+    forest/*       CompiledForest node arrays (see forest_engine.py)
+    shap_table/*   ShapTable arrays, if the version has a table (see shap_table.py)
+    manifest       JSON: model version, schema (with the SHAP base value) and contract ABI
+
+The bundle is built from a registry version and only used while that version
+is active. The sklearn model, LabelEncoders and SHAP explainer stay in the
+version directory and load on first use (live SHAP for rows outside the table).
+Rebuild the bundle after registering a model or recompiling the contracts:
+
+    python artefact_bundle.py --registry models --abi artifacts/contracts/PMKisan.sol/PMKisanRegistry.json
+"""
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from forest_engine import CompiledForest
+from model_registry import ModelBundle, ModelRegistry
+from shap_table import ShapTable
+
+BUNDLE_FILE = "bundle.npz"
+BUNDLE_FORMAT = 1
+
+
+def _prefixed(data, prefix: str) -> Dict[str, np.ndarray]:
+    return {name[len(prefix):]: data[name] for name in data.files if name.startswith(prefix)}
+
+
+def build_bundle(registry: ModelRegistry, version: str, path: str, abi_path: Optional[str] = None) -> str:
+    """Write the bundle for a registered version (and the contract ABI at abi_path) to path"""
+    bundle = registry.load(version)
+    schema = dict(bundle.schema, expected_value=bundle.expected_value)
+    abi = None
+    if abi_path is not None:
+        with open(abi_path) as f:
+            abi = json.load(f)["abi"]
+    manifest = {"format": BUNDLE_FORMAT, "version": version, "schema": schema, "abi": abi}
+
+    arrays = {f"forest/{name}": array for name, array in bundle.forest.to_arrays().items()}
+    if bundle.shap_table is not None:
+        arrays.update({f"shap_table/{name}": array for name, array in bundle.shap_table.to_arrays().items()})
+    arrays["manifest"] = np.array(json.dumps(manifest))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_bundle(path: str, registry: ModelRegistry) -> Tuple[ModelBundle, Optional[List[Dict[str, Any]]]]:
+    """The ModelBundle and contract ABI (None if not bundled) stored at path"""
+    with np.load(path, allow_pickle=False) as data:
+        manifest = json.loads(str(data["manifest"]))
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported artefact bundle format {manifest.get('format')!r}")
+        forest = CompiledForest.from_arrays(_prefixed(data, "forest/"))
+        shap_arrays = _prefixed(data, "shap_table/")
+        shap_table = ShapTable.from_arrays(shap_arrays) if shap_arrays else None
+    version = manifest["version"]
+    bundle = ModelBundle(version, forest, manifest["schema"], os.path.join(registry.path, version), shap_table)
+    return bundle, manifest["abi"]
+
+
+def load_active(registry: ModelRegistry, path: str) -> Tuple[ModelBundle, Optional[List[Dict[str, Any]]]]:
+    """The active version from the bundle at path if it holds that version, otherwise from the registry"""
+    if os.path.exists(path):
+        try:
+            bundle, abi = load_bundle(path, registry)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring artefact bundle {path}: {e}")
+        else:
+            active = registry.active_version()
+            if bundle.version == active:
+                return bundle, abi
+            print(f"Artefact bundle {path} holds model {bundle.version} but {active} is active; ignoring it")
+    return registry.load_active(), None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the start-up artefact bundle for a model version")
+    parser.add_argument("--registry", default="models")
+    parser.add_argument("--version", help="Model version (default: the active one)")
+    parser.add_argument("--abi", help="Hardhat artifact JSON of PMKisanRegistry to bundle")
+    parser.add_argument("--out", help=f"Output path (default: <registry>/{BUNDLE_FILE})")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    version = args.version or registry.active_version()
+    path = build_bundle(registry, version, args.out or os.path.join(registry.path, BUNDLE_FILE), args.abi)
+    print(f"Wrote {path} for model {version} ({os.path.getsize(path) / 1e6:.1f} MB)")
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+
+class AnchorTicket:
+    """Handle for one decision queued for anchoring
+
+    `sent` resolves to the transaction hash once the batch holding the decision
+    is broadcast; `confirmed` resolves to the block number once it is mined.
+    """
+
+    def __init__(self, record: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        self.record = record
+        self.queued_at = time.monotonic()
+        self.sent: asyncio.Future = loop.create_future()
+        self.confirmed: asyncio.Future = loop.create_future()
+
+
+class BatchAnchorer:
+    """Anchors decisions on-chain in storeDecisions batches with locally managed nonces
+
+    Decisions are grouped until `max_batch` are pending or the oldest has waited
+    `max_wait` seconds. Nonces are assigned locally so up to `max_in_flight`
+    transactions can be pending at once; receipts are confirmed by a background
+    task instead of blocking the sender. `w3` is an AsyncWeb3 instance; it may be
+    supplied later with `connect`, and decisions submitted before then wait in
+    the queue.
+    """
+
+    def __init__(self, w3, contract, account: Optional[str], max_batch: int = 50, max_wait: float = 1.0,
+                 max_in_flight: int = 4, confirm_interval: float = 0.5, confirm_timeout: float = 120.0):
+        self.w3 = w3
+        self.contract = contract
+        self.account = account
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.confirm_interval = confirm_interval
+        self.confirm_timeout = confirm_timeout
+        self._pending: List[AnchorTicket] = []
+        self._in_flight: Dict[str, Any] = {}
+        self._slots = asyncio.BoundedSemaphore(max_in_flight)
+        self._nonce: Optional[int] = None
+        self._wakeup = asyncio.Event()
+        self._connected = asyncio.Event()
+        if w3 is not None:
+            self._connected.set()
+        self._stopping = False
+        self._tasks: List[asyncio.Task] = []
+        # Totals since start-up, exported by /metrics
+        self.batches_sent = 0
+        self.decisions_sent = 0
+        self.send_failures = 0
+        self.reverted = 0
+        self.timed_out = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def connect(self, w3, contract, account: str):
+        """Supply the node connection, contract and sending account; queued decisions go out from now on"""
+        self.w3 = w3
+        self.contract = contract
+        self.account = account
+        self._connected.set()
+        self._wakeup.set()
+
+    def submit(self, database_cid: str, explanation_cid: str, decision: str, participant_id: int) -> AnchorTicket:
+        """Queue one decision for the next storeDecisions batch"""
+        ticket = AnchorTicket({
+            "database_cid": database_cid,
+            "explanation_cid": explanation_cid,
+            "decision": decision,
+            "participant_id": int(participant_id),
+        })
+        self._pending.append(ticket)
+        self._wakeup.set()
+        return ticket
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for target, name in ((self._run_sender, "anchor-sender"), (self._run_confirmer, "anchor-confirmer")):
+            self._tasks.append(loop.create_task(target(), name=name))
+
+    async def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        self._wakeup.set()
+        if self._tasks:
+            _, still_running = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+        self._tasks.clear()
+
+    async def _next_batch(self) -> Optional[List[AnchorTicket]]:
+        """Wait until a batch is full or its time window has elapsed, and the node is connected"""
+        while not self._stopping:
+            self._wakeup.clear()
+            if self._pending and self.connected:
+                waited = time.monotonic() - self._pending[0].queued_at
+                if len(self._pending) >= self.max_batch or waited >= self.max_wait:
+                    batch = self._pending[:self.max_batch]
+                    del self._pending[:self.max_batch]
+                    return batch
+                timeout = self.max_wait - waited
+            else:
+                timeout = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return None
+
+    async def _take_nonce(self) -> int:
+        if self._nonce is None:
+            self._nonce = await self.w3.eth.get_transaction_count(self.account, "pending")
+        nonce = self._nonce
+        self._nonce += 1
+        return nonce
+
+    def _resync_nonce(self):
+        """Forget the local nonce so the next batch re-reads it from the node"""
+        self._nonce = None
+
+    async def _run_sender(self):
+        while True:
+            batch = await self._next_batch()
+            if batch is None:
+                return
+            await self._slots.acquire()
+            try:
+                await self._send(batch)
+            except Exception as e:
+                self.send_failures += 1
+                self._slots.release()
+                self._resync_nonce()
+                print(f"Error anchoring batch of {len(batch)} decisions: {e}")
+                for ticket in batch:
+                    for future in (ticket.sent, ticket.confirmed):
+                        if not future.done():
+                            future.set_exception(e)
+
+    async def _send(self, batch: List[AnchorTicket]):
+        records = [ticket.record for ticket in batch]
+        nonce = await self._take_nonce()
+        tx_hash = await self.contract.functions.storeDecisions(
+            [r["database_cid"] for r in records],
+            [r["explanation_cid"] for r in records],
+            [r["decision"] for r in records],
+            [r["participant_id"] for r in records],
+        ).transact({"from": self.account, "nonce": nonce})
+        tx_hash = self.w3.to_hex(tx_hash)
+        self._in_flight[tx_hash] = (batch, time.monotonic())
+        self.batches_sent += 1
+        self.decisions_sent += len(batch)
+        for ticket in batch:
+            if not ticket.sent.done():
+                ticket.sent.set_result(tx_hash)
+
+    async def _run_confirmer(self):
+        while not self._stopping:
+            in_flight = list(self._in_flight.items())
+            outcomes = await asyncio.gather(*(
+                self._check_receipt(tx_hash, sent_at) for tx_hash, (_, sent_at) in in_flight
+            ))
+            for (tx_hash, (batch, _)), outcome in zip(in_flight, outcomes):
+                if outcome is None:
+                    continue
+                del self._in_flight[tx_hash]
+                self._slots.release()
+                for ticket in batch:
+                    if ticket.confirmed.done():
+                        continue
+                    if isinstance(outcome, Exception):
+                        ticket.confirmed.set_exception(outcome)
+                    else:
+                        ticket.confirmed.set_result(outcome)
+            await asyncio.sleep(self.confirm_interval)
+
+    async def resolve(self, tx_hash: str) -> Optional[int]:
+        """Outcome of an anchoring transaction sent earlier, possibly by a previous process
+
+        Returns its block number once mined, or None if it reverted or can no
+        longer be mined (dropped by the node, or its nonce used by another
+        transaction), so its decisions need anchoring again. Waits up to
+        `confirm_timeout` and raises TimeoutError while it could still be mined.
+        Waits for `connect` first.
+        """
+        from web3.exceptions import TransactionNotFound
+
+        await self._connected.wait()
+        async def receipt():
+            try:
+                return await self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                return None
+
+        deadline = time.monotonic() + self.confirm_timeout
+        while True:
+            mined = await receipt()
+            if mined is None:
+                try:
+                    tx = await self.w3.eth.get_transaction(tx_hash)
+                except TransactionNotFound:
+                    return None
+                if await self.w3.eth.get_transaction_count(tx["from"], "latest") <= tx["nonce"]:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Transaction {tx_hash} still pending after {self.confirm_timeout}s")
+                    await asyncio.sleep(self.confirm_interval)
+                    continue
+                # Its nonce is used: either it was mined just now or another transaction took the nonce
+                mined = await receipt()
+                if mined is None:
+                    return None
+            return mined["blockNumber"] if mined["status"] == 1 else None
+
+    async def _check_receipt(self, tx_hash: str, sent_at: float):
+        """Block number once mined, an exception on revert or timeout, None while pending"""
+        try:
+            receipt = await self.w3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            receipt = None
+        if receipt is None:
+            if time.monotonic() - sent_at > self.confirm_timeout:
+                self.timed_out += 1
+                self._resync_nonce()
+                return TimeoutError(f"Transaction {tx_hash} not mined after {self.confirm_timeout}s")
+            return None
+        if receipt["status"] != 1:
+            self.reverted += 1
+            return RuntimeError(f"Transaction {tx_hash} reverted")
+        return receipt["blockNumber"]
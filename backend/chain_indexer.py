@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import threading
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+COLUMNS = (
+    "block_number", "log_index", "tx_hash", "submitter", "participant_id",
+    "record_index", "database_cid", "explanation_cid", "decision",
+)
+
+
+class ChainIndexer:
+    """Local SQLite mirror of PMKisanRegistry's DecisionStored events
+
+    `sync` reads logs from the block after the last one indexed up to the head
+    (less `confirmations`) in `max_block_range` steps, storing each step's
+    decisions and the new sync position in one transaction. Reads answer from
+    SQLite without touching the node. If the hash of the last indexed block
+    changes (a reorg, or a restarted local node), the index is dropped and
+    synced again from `start_block`. `w3` is an AsyncWeb3 instance; `w3` and
+    `contract` may be None (given `address`) until `connect`, and reads work
+    from the local index meanwhile.
+    """
+
+    def __init__(self, path: str, w3, contract, start_block: int = 0, confirmations: int = 0,
+                 max_block_range: int = 2000, poll_interval: float = 2.0, address: Optional[str] = None):
+        self.path = path
+        self.w3 = w3
+        self.contract = contract
+        # Compared and stored lowercased, so checksummed and lowercase spellings are the same contract
+        self.address = (address if address is not None else contract.address).lower()
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.max_block_range = max_block_range
+        self.poll_interval = poll_interval
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS decisions (
+                block_number INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                tx_hash TEXT NOT NULL,
+                submitter TEXT NOT NULL,
+                participant_id INTEGER NOT NULL,
+                record_index INTEGER NOT NULL,
+                database_cid TEXT NOT NULL,
+                explanation_cid TEXT NOT NULL,
+                decision TEXT NOT NULL,
+                PRIMARY KEY (block_number, log_index)
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_participant ON decisions (participant_id)")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS sync_state (
+                contract TEXT PRIMARY KEY,
+                last_block INTEGER NOT NULL,
+                last_block_hash TEXT NOT NULL
+            )"""
+        )
+        self._lock = threading.Lock()
+        self._sync_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Totals since start-up, exported by /metrics
+        self.logs_indexed = 0
+        self.resets = 0
+        self._reset_if_other_contract()
+
+    def _reset_if_other_contract(self):
+        """The index belongs to one contract; a redeployment starts it over"""
+        with self._lock:
+            row = self._db.execute("SELECT contract FROM sync_state").fetchone()
+            if row is not None and row[0].lower() != self.address:
+                print(f"Chain index at {self.path} is for contract {row[0]}; re-indexing {self.address}")
+                self._clear()
+            elif row is not None and row[0] != self.address:
+                # Indexes written before addresses were normalised keep their position
+                self._db.execute("UPDATE sync_state SET contract = ?", (self.address,))
+
+    def connect(self, w3, contract):
+        """Supply the node connection and contract once they are available"""
+        self.w3 = w3
+        self.contract = contract
+
+    def _clear(self):
+        self._db.execute("BEGIN")
+        self._db.execute("DELETE FROM decisions")
+        self._db.execute("DELETE FROM sync_state")
+        self._db.execute("COMMIT")
+
+    def position(self) -> Optional[Tuple[int, str]]:
+        """The last indexed block and its hash, or None before the first sync"""
+        with self._lock:
+            row = self._db.execute("SELECT last_block, last_block_hash FROM sync_state").fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def _store(self, logs: List[Dict[str, Any]], last_block: int, last_block_hash: str):
+        rows = [tuple(log[column] for column in COLUMNS) for log in logs]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO decisions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    rows,
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sync_state (contract, last_block, last_block_hash) VALUES (?, ?, ?)",
+                    (self.address, last_block, last_block_hash),
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _row(log) -> Dict[str, Any]:
+        args = log["args"]
+        return {
+            "block_number": log["blockNumber"],
+            "log_index": log["logIndex"],
+            "tx_hash": "0x" + bytes(log["transactionHash"]).hex(),
+            "submitter": args["submitter"],
+            "participant_id": args["participantId"],
+            "record_index": args["index"],
+            "database_cid": args["databaseCID"],
+            "explanation_cid": args["explanationCID"],
+            "decision": args["decision"],
+        }
+
+    async def _block_hash(self, block_number: int) -> Optional[str]:
+        from web3.exceptions import BlockNotFound
+
+        try:
+            block = await self.w3.eth.get_block(block_number)
+        except BlockNotFound:
+            return None
+        return "0x" + bytes(block["hash"]).hex()
+
+    async def _fetch_logs(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        """Logs of a block range, splitting the range when the node refuses it as too large"""
+        try:
+            logs = await self.contract.events.DecisionStored.get_logs(from_block=from_block, to_block=to_block)
+        except Exception:
+            if from_block == to_block:
+                raise
+            middle = (from_block + to_block) // 2
+            return await self._fetch_logs(from_block, middle) + await self._fetch_logs(middle + 1, to_block)
+        return [self._row(log) for log in logs]
+
+    async def sync(self) -> int:
+        """Index every confirmed block since the last sync; returns the number of new decisions"""
+        async with self._sync_lock:
+            position = await asyncio.to_thread(self.position)
+            if position is not None and await self._block_hash(position[0]) != position[1]:
+                print(f"Block {position[0]} changed since it was indexed; re-indexing from block {self.start_block}")
+                with self._lock:
+                    self._clear()
+                self.resets += 1
+                position = None
+            head = await self.w3.eth.block_number - self.confirmations
+            next_block = position[0] + 1 if position is not None else self.start_block
+            indexed = 0
+            while next_block <= head:
+                to_block = min(next_block + self.max_block_range - 1, head)
+                logs = await self._fetch_logs(next_block, to_block)
+                await asyncio.to_thread(self._store, logs, to_block, await self._block_hash(to_block))
+                indexed += len(logs)
+                self.logs_indexed += len(logs)
+                next_block = to_block + 1
+            return indexed
+
+    def start(self):
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="chain-indexer")
+
+    async def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.sync()
+            except Exception:
+                traceback.print_exc()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def query(self, participant_id: Optional[int] = None, from_block: Optional[int] = None,
+              to_block: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Indexed decisions matching every given condition, in chain order"""
+        conditions, params = [], []
+        for column, operator, value in (("participant_id", "=", participant_id),
+                                        ("block_number", ">=", from_block), ("block_number", "<=", to_block)):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM decisions"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY block_number, log_index"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def decisions_for_participant(self, participant_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Every indexed decision anchored for a participant, oldest first"""
+        return self.query(participant_id=participant_id, limit=limit)
+
+    def decisions_in_blocks(self, from_block: int, to_block: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Indexed decisions mined in blocks from_block..to_block inclusive"""
+        return self.query(from_block=from_block, to_block=to_block, limit=limit)
+
+    def status(self) -> Dict[str, Any]:
+        position = self.position()
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+        return {
+            "contract": self.address,
+            "last_block": position[0] if position is not None else None,
+            "decisions": count,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+async def _main(args):
+    from web3 import AsyncWeb3
+
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(args.rpc_url))
+    with open(args.artifact) as f:
+        contract = w3.eth.contract(address=args.contract, abi=json.load(f)["abi"])
+    indexer = ChainIndexer(args.index, w3, contract, start_block=args.start_block,
+                           confirmations=args.confirmations)
+    if not args.offline:
+        print(f"Indexed {await indexer.sync()} new decisions")
+    if args.participant is not None:
+        rows = indexer.decisions_for_participant(args.participant)
+    elif args.blocks is not None:
+        rows = indexer.decisions_in_blocks(*args.blocks)
+    else:
+        rows = []
+        print(json.dumps(indexer.status()))
+    for row in rows:
+        print(json.dumps(row))
+    indexer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync and query the local index of PMKisanRegistry decisions")
+    parser.add_argument("--index", default="chain_index.sqlite3", help="SQLite index path")
+    parser.add_argument("--rpc-url", default="http://127.0.0.1:8545")
+    parser.add_argument("--contract", default="0x5FbDB2315678afecb367f032d93F642f64180aa3")
+    parser.add_argument("--artifact", default="../artifacts/contracts/PMKisan.sol/PMKisanRegistry.json")
+    parser.add_argument("--start-block", type=int, default=0)
+    parser.add_argument("--confirmations", type=int, default=0)
+    parser.add_argument("--offline", action="store_true", help="Answer from the index without syncing first")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--participant", type=int, help="Print every decision for a participant ID")
+    query.add_argument("--blocks", type=int, nargs=2, metavar=("FROM", "TO"), help="Print decisions in a block range")
+    asyncio.run(_main(parser.parse_args()))
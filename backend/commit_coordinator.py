@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+Participants = List[Dict[str, Any]]
+
+
+class CommitCoordinator:
+    """Single ordered committer that group-commits pending participants into one new root
+
+    Writers submit participants and await the outcome. The committer task
+    takes everything that queued up while the previous commit was uploading
+    and hands it to `commit` in one call, so concurrent writers share a
+    single upload and can never append to a stale root.
+    """
+
+    def __init__(self, commit: Callable[[Participants], Awaitable[Tuple[str, Dict[str, Any]]]],
+                 max_group: int = 10000):
+        self.commit = commit
+        self.max_group = max_group
+        self.groups_committed = 0
+        self._pending: List[Tuple[Participants, asyncio.Future]] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, participants: Participants) -> Tuple[str, Dict[str, Any]]:
+        """Queue participants for the next group commit and wait for (database_cid, root)"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((list(participants), future))
+        self._wakeup.set()
+        return await future
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="commit-coordinator")
+
+    async def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        self._wakeup.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                print("Commit coordinator did not drain before shutdown")
+            self._task = None
+
+    async def _next_group(self):
+        """Take queued submissions in arrival order, up to max_group participants"""
+        while not self._pending and not self._stopping:
+            self._wakeup.clear()
+            await self._wakeup.wait()
+        if not self._pending:
+            return None
+        group, size = [], 0
+        while self._pending and (not group or size + len(self._pending[0][0]) <= self.max_group):
+            participants, future = self._pending.pop(0)
+            group.append((participants, future))
+            size += len(participants)
+        return group
+
+    async def _run(self):
+        while True:
+            group = await self._next_group()
+            if group is None:
+                return
+            participants = [participant for submitted, _ in group for participant in submitted]
+            try:
+                outcome = await self.commit(participants)
+            except Exception as e:
+                for _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.groups_committed += 1
+            for _, future in group:
+                if not future.done():
+                    future.set_result(outcome)
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def idempotency_key(aadhaar: int, features: Dict[str, Any], model_version: str) -> str:
+    """Aadhaar, a hash of the model's input values and the model version that decided them"""
+    canonical = json.dumps(features, sort_keys=True, separators=(",", ":"), default=str)
+    return f"{aadhaar}:{hashlib.sha256(canonical.encode()).hexdigest()[:32]}:{model_version}"
+
+
+class DecisionCache:
+    """Idempotent /predict responses keyed by idempotency_key, written through to SQLite
+
+    Entries are held in memory in LRU order, so a repeat is a dict hit, and are
+    mirrored to SQLite so they survive restarts. An entry is evicted once it is
+    older than `ttl` seconds or when more than `max_entries` are held.
+    `get_or_compute` makes concurrent duplicates wait on the first computation.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20000, ttl: float = 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS decisions (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS decisions_created ON decisions (created_at)")
+        self._load()
+
+    def _load(self):
+        cutoff = time.time() - self.ttl
+        self._db.execute("DELETE FROM decisions WHERE created_at < ?", (cutoff,))
+        rows = self._db.execute(
+            "SELECT key, response, created_at FROM decisions ORDER BY created_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, response, created_at in reversed(rows):
+            self._entries[key] = (created_at, json.loads(response))
+        if rows and len(rows) == self.max_entries:
+            self._db.execute("DELETE FROM decisions WHERE created_at < ?", (rows[-1][2],))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], dict(entry[1])
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """A copy of the stored response, or None if missing or expired"""
+        entry = self._lookup(key)
+        return entry[1] if entry is not None else None
+
+    def _write(self, sql: str, params=()):
+        with self._lock:
+            self._db.execute(sql, params)
+
+    async def put(self, key: str, response: Dict[str, Any]):
+        created_at = time.time()
+        with self._lock:
+            self._entries[key] = (created_at, dict(response))
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+        await asyncio.to_thread(
+            self._write, "INSERT OR REPLACE INTO decisions (key, response, created_at) VALUES (?, ?, ?)",
+            (key, json.dumps(response), created_at),
+        )
+        for evicted_key in evicted:
+            await asyncio.to_thread(self._write, "DELETE FROM decisions WHERE key = ?", (evicted_key,))
+
+    async def update(self, key: str, fields: Dict[str, Any]):
+        """Merge fields (e.g. the finished job's CIDs) into an entry that is still cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry[1].update(fields)
+            response = json.dumps(entry[1])
+        await asyncio.to_thread(self._write, "UPDATE decisions SET response = ? WHERE key = ?", (response, key))
+
+    async def invalidate(self, key: str, created_at: Optional[float] = None):
+        """Drop an entry; with `created_at`, only if it is still that version of the entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (created_at is not None and entry[0] != created_at):
+                return
+            del self._entries[key]
+        await asyncio.to_thread(self._write, "DELETE FROM decisions WHERE key = ?", (key,))
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]],
+                             valid: Optional[Callable[[Dict[str, Any]], Awaitable[bool]]] = None
+                             ) -> Tuple[Dict[str, Any], bool]:
+        """Return (response, replayed): the cached response, or the first caller's computation
+
+        `valid` can veto replaying a cached response, which is then recomputed.
+        A failed computation is not cached; its waiters get the same error.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            created_at, cached = entry
+            if valid is None or await valid(cached):
+                self.hits += 1
+                return cached, True
+            await self.invalidate(key, created_at)
+            # A concurrent caller may have replaced the entry meanwhile
+            cached = self.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, True
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.joined += 1
+            return dict(await asyncio.shield(pending)), True
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await compute()
+            await self.put(key, response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here so an unawaited failure is not logged twice
+            raise
+        finally:
+            del self._inflight[key]
+        future.set_result(response)
+        return dict(response), False
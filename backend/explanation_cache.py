@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+INCOME_BUCKET = 10000
+AGE_BUCKET = 10
+
+FEATURE_LABELS = {
+    "age": "age",
+    "caste": "caste category",
+    "income": "annual income",
+    "land_ownership": "land ownership",
+    "housing_status": "housing status",
+}
+
+
+def bucket_features(features: Dict[str, Any]) -> Dict[str, Any]:
+    """Coarsen applicant features to the granularity explanations are shared at"""
+    income_low = int(features["income"]) // INCOME_BUCKET * INCOME_BUCKET
+    age_low = int(features["age"]) // AGE_BUCKET * AGE_BUCKET
+    return {
+        "age": f"{age_low}-{age_low + AGE_BUCKET - 1}",
+        "caste": features["caste"],
+        "income": f"₹{income_low:,}-₹{income_low + INCOME_BUCKET - 1:,}",
+        "land_ownership": bool(features["land_ownership"]),
+        "housing_status": features["housing_status"],
+    }
+
+
+def decision_signature(features: Dict[str, Any], contributions: Dict[str, float], eligible: bool) -> str:
+    """Normalised key for decisions that share the same explanation
+
+    Decision, categorical values, bucketed income and age, and the features
+    ranked by |SHAP| with the sign of each contribution.
+    """
+    ranked = sorted(contributions.items(), key=lambda item: abs(item[1]), reverse=True)
+    signs = ",".join(f"{name}{'+' if value >= 0 else '-'}" for name, value in ranked)
+    buckets = bucket_features(features)
+    return "|".join([
+        "eligible" if eligible else "not_eligible",
+        buckets["caste"],
+        buckets["housing_status"],
+        "land" if buckets["land_ownership"] else "no_land",
+        buckets["income"],
+        buckets["age"],
+        signs,
+    ])
+
+
+def render_template_explanation(features: Dict[str, Any], contributions: Dict[str, float], eligible: bool) -> str:
+    """Deterministic plain-language explanation built from the SHAP contributions"""
+    buckets = bucket_features(features)
+    values = {
+        "age": f"an age of {buckets['age']} years",
+        "caste": f"the {buckets['caste']} category",
+        "income": f"an annual income of {buckets['income']}",
+        "land_ownership": "owning land" if buckets["land_ownership"] else "not owning land",
+        "housing_status": f"{buckets['housing_status']} housing",
+    }
+    ranked = sorted(contributions.items(), key=lambda item: abs(item[1]), reverse=True)
+    supporting = [values[name] for name, value in ranked if value > 0][:2]
+    opposing = [values[name] for name, value in ranked if value < 0][:2]
+
+    decision = "eligible" if eligible else "not eligible"
+    sentences = [f"The applicant was assessed as {decision} for PM-KISAN."]
+    if ranked:
+        top_name, top_value = ranked[0]
+        direction = "towards" if top_value >= 0 else "against"
+        sentences.append(f"The most influential factor was {FEATURE_LABELS[top_name]}, which weighed {direction} eligibility.")
+    if supporting:
+        sentences.append(f"Factors supporting eligibility: {' and '.join(supporting)}.")
+    if opposing:
+        sentences.append(f"Factors against eligibility: {' and '.join(opposing)}.")
+    return " ".join(sentences)
+
+
+class ExplanationCache:
+    """LRU + TTL cache of explanation texts keyed by decision signature, persisted as a JSON snapshot"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000, ttl: float = 7 * 24 * 3600,
+                 save_every: int = 50):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self._load()
+
+    def get(self, signature: str) -> Optional[Tuple[str, str]]:
+        """Return (text, source) for a signature, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None or time.time() - entry["created_at"] > self.ttl:
+                if entry is not None:
+                    del self._entries[signature]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry["text"], entry["source"]
+
+    def put(self, signature: str, text: str, source: str) -> bool:
+        """Store an explanation; returns True once `save_every` puts are unsaved"""
+        with self._lock:
+            self._entries[signature] = {"text": text, "source": source, "created_at": time.time()}
+            self._entries.move_to_end(signature)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._unsaved += 1
+            return self._unsaved >= self.save_every
+
+    def save(self):
+        """Write the live entries to disk atomically"""
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = list(self._entries.items())
+            self._unsaved = 0
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except ValueError as e:
+            print(f"Ignoring unreadable explanation cache {self.path}: {e}")
+            return
+        now = time.time()
+        for signature, entry in snapshot[-self.max_entries:]:
+            if now - entry["created_at"] <= self.ttl:
+                self._entries[signature] = entry
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class CIDCache:
+    """Content-addressed cache of parsed IPFS documents: an in-process LRU over an on-disk store
+
+    CIDs are immutable, so entries never go stale and can be kept forever on disk.
+    The pinned CID (the current database) is never evicted from memory.
+    """
+
+    def __init__(self, cache_dir: str = ".ipfs_cache", max_entries: int = 8):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.pinned: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, cid: str) -> str:
+        return os.path.join(self.cache_dir, f"{cid}.json")
+
+    def peek(self, cid: str) -> Optional[Dict[str, Any]]:
+        """Return the parsed document for a CID only if it is already in memory"""
+        with self._lock:
+            if cid in self._memory:
+                self._memory.move_to_end(cid)
+                self.hits += 1
+                return self._memory[cid]
+        return None
+
+    def get(self, cid: str) -> Optional[Dict[str, Any]]:
+        """Return the parsed document for a CID from memory or disk, or None on a cold miss"""
+        with self._lock:
+            if cid in self._memory:
+                self._memory.move_to_end(cid)
+                self.hits += 1
+                return self._memory[cid]
+
+        try:
+            with open(self._path(cid), "rb") as f:
+                document = json.load(f)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(cid, document)
+        return document
+
+    def put(self, cid: str, document: Dict[str, Any]):
+        """Store a document under its CID in memory and on disk"""
+        self._persist(cid, document)
+        with self._lock:
+            self._remember(cid, document)
+
+    def evict(self, cid: str):
+        """Drop a CID from memory so the next read reloads it from disk"""
+        with self._lock:
+            self._memory.pop(cid, None)
+
+    def pin(self, cid: str):
+        """Keep this CID in memory regardless of LRU pressure"""
+        with self._lock:
+            self.pinned = cid
+
+    def _remember(self, cid: str, document: Dict[str, Any]):
+        self._memory[cid] = document
+        self._memory.move_to_end(cid)
+        while len(self._memory) > self.max_entries:
+            oldest = next((key for key in self._memory if key != self.pinned), None)
+            if oldest is None:
+                break
+            del self._memory[oldest]
+
+    def _persist(self, cid: str, document: Dict[str, Any]):
+        path = self._path(cid)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(document, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
@@ -0,0 +1,87 @@
+"""Local CIDv0 computation, matching what `ipfs add` (and Pinata's pinFileToIPFS) returns by default
+
+The bytes are cut into 256 KiB chunks. Each chunk becomes a dag-pb node
+wrapping a UnixFS File message. A file of more than one chunk gets a balanced
+tree of parent nodes with at most 174 links each. The CID is the base58
+sha2-256 multihash of the root node ("Qm...").
+"""
+import hashlib
+from typing import List, NamedTuple
+
+CHUNK_SIZE = 262144
+MAX_LINKS = 174
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+SHA2_256 = b"\x12\x20"
+UNIXFS_FILE = 2
+
+
+class _Node(NamedTuple):
+    multihash: bytes
+    tsize: int      # encoded size of the node and everything below it
+    filesize: int   # file bytes under the node
+
+
+def base58(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + encoded
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if not value:
+            out.append(byte)
+            return bytes(out)
+        out.append(byte | 0x80)
+
+
+def _bytes_field(number: int, data: bytes) -> bytes:
+    return _varint(number << 3 | 2) + _varint(len(data)) + data
+
+
+def _varint_field(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+
+def _unixfs_file(data: bytes, filesize: int, blocksizes: List[int] = ()) -> bytes:
+    message = _varint_field(1, UNIXFS_FILE)
+    if data:
+        message += _bytes_field(2, data)
+    message += _varint_field(3, filesize)
+    for size in blocksizes:
+        message += _varint_field(4, size)
+    return message
+
+
+def _encode(links: List[_Node], unixfs: bytes) -> _Node:
+    # dag-pb writes Links (field 2) before Data (field 1); each link is Hash, an empty Name and Tsize
+    encoded = b"".join(
+        _bytes_field(2, _bytes_field(1, link.multihash) + _bytes_field(2, b"") + _varint_field(3, link.tsize))
+        for link in links
+    ) + _bytes_field(1, unixfs)
+    filesize = sum(link.filesize for link in links)
+    return _Node(SHA2_256 + hashlib.sha256(encoded).digest(), len(encoded) + sum(link.tsize for link in links),
+                 filesize)
+
+
+def _leaf(chunk: bytes) -> _Node:
+    node = _encode([], _unixfs_file(chunk, len(chunk)))
+    return node._replace(filesize=len(chunk))
+
+
+def cid_v0(data: bytes) -> str:
+    """CIDv0 of a file's bytes (UnixFS, 256 KiB chunks, balanced DAG)"""
+    view = memoryview(data)
+    level = [_leaf(bytes(view[start:start + CHUNK_SIZE])) for start in range(0, max(len(data), 1), CHUNK_SIZE)]
+    while len(level) > 1:
+        level = [
+            _encode(children, _unixfs_file(b"", sum(c.filesize for c in children), [c.filesize for c in children]))
+            for children in (level[start:start + MAX_LINKS] for start in range(0, len(level), MAX_LINKS))
+        ]
+    return base58(level[0].multihash)
@@ -0,0 +1,180 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from ipfs_cid import BASE58_ALPHABET, cid_v0
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def encode_document(data: Any, encoder: Optional[type] = None, compress: bool = False) -> bytes:
+    """Compact JSON, gzipped when `compress` is set (with a fixed mtime, so equal documents get equal CIDs)"""
+    payload = json.dumps(data, cls=encoder, separators=(",", ":")).encode()
+    return gzip.compress(payload, compresslevel=6, mtime=0) if compress else payload
+
+
+def decode_document(payload: bytes) -> Any:
+    """Parse a document written by encode_document (or any plain JSON document)"""
+    if payload[:2] == GZIP_MAGIC:
+        payload = gzip.decompress(payload)
+    return json.loads(payload)
+
+
+class PinBackend:
+    """Where documents are pinned and read back from; subclasses implement `get` and `pin` on raw bytes
+
+    Documents are serialised by `encode`, which also returns the CID they will
+    be pinned under, so callers can hand out a CID before its pin finishes
+    (`pin_encoded` then checks the pin produced that CID). `observer`, if set,
+    is called with (operation, payload bytes, seconds) after every successful
+    "get" and "pin".
+    """
+
+    def __init__(self, compress: bool = False, observer: Optional[Callable[[str, int, float], None]] = None):
+        self.compress = compress
+        self.observer = observer
+
+    async def get(self, cid: str) -> bytes:
+        raise NotImplementedError
+
+    async def pin(self, payload: bytes, filename: str) -> str:
+        """Pin bytes and return the CID the backend reports"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+    def _observe(self, operation: str, size: int, started: float):
+        if self.observer is not None:
+            self.observer(operation, size, time.perf_counter() - started)
+
+    def encode(self, data: Any, encoder: Optional[type] = None) -> Tuple[str, bytes]:
+        """(CID, payload) of a document, computed locally"""
+        payload = encode_document(data, encoder, self.compress)
+        return cid_v0(payload), payload
+
+    def filename(self, filename: str) -> str:
+        return f"{filename}.gz" if self.compress else filename
+
+    async def get_json(self, cid: str) -> Any:
+        """Fetch and parse a JSON document"""
+        return decode_document(await self.get(cid))
+
+    async def pin_json(self, data: Any, filename: str, encoder: Optional[type] = None) -> str:
+        """Pin a JSON document and return its CID"""
+        return await self.pin(encode_document(data, encoder, self.compress), self.filename(filename))
+
+    async def pin_encoded(self, cid: str, payload: bytes, filename: str) -> str:
+        """Pin a payload from `encode`, failing unless the backend stored it under the CID computed for it"""
+        pinned = await self.pin(payload, self.filename(filename))
+        if pinned != cid:
+            raise RuntimeError(f"{filename} was pinned as {pinned}, not its precomputed CID {cid}")
+        return cid
+
+
+class IPFSClient(PinBackend):
+    """Async Pinata/IPFS gateway client on one shared keep-alive connection pool
+
+    Requests are bounded by `max_concurrency` so a burst of cold reads or pins
+    cannot exhaust the pool or the gateway's rate limits. Uploads are sent from
+    memory and pinned as CIDv0, which `encode` computes locally.
+    """
+
+    def __init__(self, gateway_url: str, pin_url: str, headers: Dict[str, str], max_connections: int = 32,
+                 max_concurrency: int = 16, timeout: float = 30.0, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 observer: Optional[Callable[[str, int, float], None]] = None, compress: bool = False):
+        super().__init__(compress, observer)
+        self.gateway_url = gateway_url.rstrip("/")
+        self.pin_url = pin_url
+        self.headers = headers
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, cid: str) -> bytes:
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self.client.get(f"{self.gateway_url}/{cid}")
+            response.raise_for_status()
+            self._observe("get", len(response.content), started)
+        return response.content
+
+    async def pin(self, payload: bytes, filename: str) -> str:
+        content_type = "application/gzip" if payload[:2] == GZIP_MAGIC else "application/json"
+        async with self._semaphore:
+            started = time.perf_counter()
+            response = await self.client.post(
+                self.pin_url,
+                data={"pinataOptions": json.dumps({"cidVersion": 0})},
+                files={"file": (filename, payload, content_type)},
+                headers=self.headers,
+            )
+            response.raise_for_status()
+            self._observe("pin", len(payload), started)
+        return response.json()["IpfsHash"]
+
+
+class LocalPinBackend(PinBackend):
+    """Filesystem stand-in for IPFS: each payload is stored in `directory` under its CIDv0
+
+    For tests and offline runs; nothing leaves the machine.
+    """
+
+    def __init__(self, directory: str, compress: bool = False,
+                 observer: Optional[Callable[[str, int, float], None]] = None):
+        super().__init__(compress, observer)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, cid: str) -> str:
+        # CIDs come from request paths; only base58 names can be files here
+        if not cid or cid.strip(BASE58_ALPHABET):
+            raise ValueError(f"Invalid CID {cid!r}")
+        return os.path.join(self.directory, cid)
+
+    def _read(self, cid: str) -> bytes:
+        with open(self._path(cid), "rb") as f:
+            return f.read()
+
+    def _write(self, cid: str, payload: bytes):
+        tmp_path = f"{self._path(cid)}.{os.getpid()}.{id(payload)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(cid))
+
+    async def get(self, cid: str) -> bytes:
+        started = time.perf_counter()
+        payload = await asyncio.to_thread(self._read, cid)
+        self._observe("get", len(payload), started)
+        return payload
+
+    async def pin(self, payload: bytes, filename: str) -> str:
+        started = time.perf_counter()
+        cid = cid_v0(payload)
+        if not os.path.exists(self._path(cid)):
+            await asyncio.to_thread(self._write, cid, payload)
+        self._observe("pin", len(payload), started)
+        return cid
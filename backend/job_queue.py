@@ -0,0 +1,174 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# handler(payload, result, checkpoint): fills `result` stage by stage and awaits
+# checkpoint() after each stage so a retry resumes where the last attempt stopped
+JobHandler = Callable[[Dict[str, Any], Dict[str, Any], Callable[[], Awaitable[None]]], Awaitable[None]]
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Durable SQLite-backed job queue drained by asyncio worker tasks with retries
+
+    SQLite calls run in the default executor so a slow disk never stalls the
+    event loop; workers only hold a connection lock for single statements.
+    """
+
+    def __init__(self, path: str, handler: JobHandler, workers: int = 2,
+                 max_attempts: int = 5, retry_delay: float = 2.0):
+        self.path = path
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT NOT NULL DEFAULT '{}',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_attempt_at)")
+        # Jobs that were running when the process died are picked up again
+        self._db.execute("UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING))
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks: List[asyncio.Task] = []
+        # Attempt outcomes since start-up, exported by /metrics
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def _execute(self, sql: str, params=()):
+        def run():
+            with self._lock:
+                return self._db.execute(sql, params).fetchall()
+        return await asyncio.to_thread(run)
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        """Persist a new job and wake a worker; returns the job ID"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        await self._execute(
+            "INSERT INTO jobs (id, status, payload, created_at, updated_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, PENDING, json.dumps(payload), now, now, now),
+        )
+        self._wakeup.set()
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._execute(
+            "SELECT id, status, result, attempts, error, created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        row = rows[0]
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "result": json.loads(row[2]),
+            "attempts": row[3],
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        for index in range(self.workers):
+            self._tasks.append(loop.create_task(self._run(), name=f"job-worker-{index}"))
+
+    async def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        self._wakeup.set()
+        if self._tasks:
+            _, still_running = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in still_running:
+                task.cancel()
+        self._tasks.clear()
+
+    def _claim(self):
+        """Atomically move the next due job to running, or return how long to wait"""
+        with self._lock:
+            now = time.time()
+            row = self._db.execute(
+                "SELECT id, payload, result, attempts FROM jobs WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY created_at LIMIT 1",
+                (PENDING, now),
+            ).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (RUNNING, now, row[0]))
+                return row, None
+            upcoming = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM jobs WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+            return None, (upcoming - now if upcoming is not None else None)
+
+    async def _run(self):
+        while not self._stopping:
+            self._wakeup.clear()
+            row, wait = await asyncio.to_thread(self._claim)
+            if row is not None:
+                # Another job may be ready too; let the next idle worker look
+                self._wakeup.set()
+                await self._process(*row)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, job_id: str, payload: str, result: str, attempts: int):
+        result = json.loads(result)
+
+        async def checkpoint():
+            await self._execute(
+                "UPDATE jobs SET result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(result), time.time(), job_id),
+            )
+
+        try:
+            await self.handler(json.loads(payload), result, checkpoint)
+        except Exception as e:
+            traceback.print_exc()
+            attempts += 1
+            status = FAILED if attempts >= self.max_attempts else PENDING
+            if status == FAILED:
+                self.failed += 1
+            else:
+                self.retried += 1
+            now = time.time()
+            await self._execute(
+                "UPDATE jobs SET status = ?, result = ?, attempts = ?, error = ?, updated_at = ?, "
+                "next_attempt_at = ? WHERE id = ?",
+                (status, json.dumps(result), attempts, str(e), now,
+                 now + self.retry_delay * 2 ** (attempts - 1), job_id),
+            )
+            self._wakeup.set()
+            return
+
+        await self._execute(
+            "UPDATE jobs SET status = ?, result = ?, attempts = ?, error = NULL, updated_at = ? WHERE id = ?",
+            (DONE, json.dumps(result), attempts + 1, time.time(), job_id),
+        )
+        self.completed += 1
@@ -1,22 +1,85 @@
-from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel
-import pandas as pd
-import joblib
-import shap
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 import json
-import requests
 import numpy as np
-import google.generativeai as genai
-from web3 import Web3
 
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Any
+from typing import Dict, Any, List, AsyncIterator, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import asyncio
+import httpx
+import importlib
 import os
+import sys
+import time
 from datetime import datetime
+import tempfile
 import traceback
 
+# Shared ML modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import ModelBundle, ModelRegistry
+from artefact_bundle import BUNDLE_FILE, load_active
+from feature_encoder import UnknownCategoryError
+from columnar_db import ColumnarDatabase
+from participant_table import ParticipantTable
+from ipfs_cache import CIDCache
+from ipfs_client import IPFSClient, LocalPinBackend, PinBackend
+from participant_store import ParticipantStore
+from participant_index import ParticipantIndex
+from participant_query import MAX_PAGE_SIZE, ParticipantQuery, parse_cursor
+from commit_coordinator import CommitCoordinator
+from job_queue import FAILED, JobQueue
+from decision_cache import DecisionCache, idempotency_key
+from anchorer import BatchAnchorer
+from chain_indexer import ChainIndexer
+from explanation_cache import ExplanationCache, bucket_features, decision_signature, render_template_explanation
+from metrics import CONTENT_TYPE, SIZE_BUCKETS, MetricsRegistry
+from profiler import SamplingProfiler
+
 app = FastAPI()
 
+# Prometheus metrics served at /metrics; cache, job and anchoring totals are read from their owners when scraped
+metrics = MetricsRegistry()
+stage_latency = metrics.histogram(
+    "pmkisan_stage_duration_seconds", "Time spent in each decision pipeline stage", ["stage"]
+)
+stage_failures = metrics.counter("pmkisan_stage_failures_total", "Pipeline stages that raised", ["stage"])
+request_latency = metrics.histogram(
+    "pmkisan_http_request_duration_seconds", "HTTP latency until the response starts", ["method", "route", "status"]
+)
+ipfs_latency = metrics.histogram("pmkisan_ipfs_request_duration_seconds", "IPFS gateway reads and pins", ["operation"])
+ipfs_payload = metrics.histogram(
+    "pmkisan_ipfs_payload_bytes", "Size of documents read from or pinned to IPFS", ["operation"], SIZE_BUCKETS
+)
+llm_requests = metrics.counter("pmkisan_llm_requests_total", "Gemini explanation calls by outcome", ["outcome"])
+scored_rows = metrics.counter(
+    "pmkisan_scored_rows_total", "Applicants scored, by whether the SHAP table or live SHAP explained them", ["shap"]
+)
+
+@contextmanager
+def timed_stage(stage: str):
+    """Record a pipeline stage's duration, and count it as failed if it raises"""
+    try:
+        with stage_latency.time(stage=stage):
+            yield
+    except Exception:
+        stage_failures.inc(stage=stage)
+        raise
+
+def observe_ipfs(operation: str, size: int, seconds: float):
+    ipfs_latency.observe(seconds, operation=operation)
+    ipfs_payload.observe(size, operation=operation)
+
+# Optional sampling profiler: requests slower than PROFILE_SLOW_REQUESTS_MS get a folded-stack flame profile
+PROFILE_SLOW_REQUESTS_MS = float(os.environ.get("PROFILE_SLOW_REQUESTS_MS", "0"))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+profiler = SamplingProfiler(
+    interval=float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+) if PROFILE_SLOW_REQUESTS_MS > 0 else None
+
 # Allow CORS
 app.add_middleware(
     CORSMiddleware,
@@ -26,34 +89,167 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load model & encoders
-model = joblib.load("eligibility_model.pkl")
-encoders = joblib.load("label_encoders.pkl")
+# Versioned model artefacts (model, encoders, compiled forest, prebuilt SHAP explainer, schema).
+# Requests read `active_model` once, so /admin/model swaps never affect in-flight decisions.
+# A prebuilt artefact bundle (see artefact_bundle.py) holding the active version loads with a few
+# array reads; sklearn and shap are only imported if a row falls outside the SHAP table.
+model_registry = ModelRegistry(os.environ.get("MODEL_REGISTRY_DIR", "../models"))
+ARTEFACT_BUNDLE_PATH = os.environ.get("ARTEFACT_BUNDLE_PATH", os.path.join(model_registry.path, BUNDLE_FILE))
+active_model, bundled_abi = load_active(model_registry, ARTEFACT_BUNDLE_PATH)
+active_model.warm_up()
+model_loading: Optional[str] = None
+model_swap_task: Optional[asyncio.Task] = None
+model_swap_error: Optional[str] = None
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Encoding, forest and SHAP run here so CPU work never blocks the event loop
+cpu_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CPU_WORKERS", str(os.cpu_count() or 4))), thread_name_prefix="scoring"
+)
 
-# Configure Gemini API
-genai.configure(api_key="")
+async def run_cpu(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, fn, *args)
+
+# Gemini client, created (and google.generativeai imported) on the first enrichment
+gemini_model = None
+
+def get_gemini_model():
+    global gemini_model
+    if gemini_model is None:
+        genai = importlib.import_module("google.generativeai")
+        genai.configure(api_key=os.environ.get("GEMINI_API_KEY", ""))
+        gemini_model = genai.GenerativeModel("models/gemini-2.0-flash")
+    return gemini_model
+
+# Explanations are shared between decisions with the same signature; misses use a local template
+# and Gemini only runs as opt-in background enrichment
+LLM_EXPLANATIONS = os.environ.get("LLM_EXPLANATIONS", "0") == "1"
+explanation_cache = ExplanationCache(
+    os.environ.get("EXPLANATION_CACHE_PATH", "explanation_cache.json"),
+    max_entries=int(os.environ.get("EXPLANATION_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("EXPLANATION_CACHE_TTL", str(7 * 24 * 3600)))
+)
+enrichment_slots = asyncio.Semaphore(int(os.environ.get("LLM_CONCURRENCY", "2")))
+enrichment_pending: Dict[str, asyncio.Task] = {}
+
+# /predict responses by Aadhaar, feature hash and model version, so resubmissions replay the first decision
+decision_cache = DecisionCache(
+    os.environ.get("DECISION_CACHE_PATH", "decision_cache.sqlite3"),
+    max_entries=int(os.environ.get("DECISION_CACHE_SIZE", "20000")),
+    ttl=float(os.environ.get("DECISION_CACHE_TTL", str(24 * 3600)))
+)
 
 # Pinata Configuration
-PINATA_API_KEY = ""
-PINATA_SECRET_KEY = ""
+PINATA_API_KEY = os.environ.get("PINATA_API_KEY", "")
+PINATA_SECRET_KEY = os.environ.get("PINATA_SECRET_KEY", "")
 PINATA_HEADERS = {
     "pinata_api_key": PINATA_API_KEY,
     "pinata_secret_api_key": PINATA_SECRET_KEY
 }
 
- # Web3 config (Hardhat Localhost)
-w3 = Web3(Web3.HTTPProvider("http://127.0.0.1:8545"))
-contract_address = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
-
-# Load contract ABI
-with open("../artifacts/contracts/PMKisan.sol/PMKisanRegistry.json") as f:
-    contract_abi = json.load(f)["abi"]
+# Overridable so benchmarks (benchmarks/ipfs_standin.py) and local setups can point at another IPFS endpoint
+PINATA_GATEWAY_URL = os.environ.get("PINATA_GATEWAY_URL", "https://gateway.pinata.cloud/ipfs")
+PINATA_PIN_URL = os.environ.get("PINATA_PIN_URL", "https://api.pinata.cloud/pinning/pinFileToIPFS")
+
+# Documents are pinned as compact JSON (gzipped with IPFS_COMPRESS=1) through a pluggable backend:
+# Pinata, on one keep-alive connection pool shared by every read and upload, or IPFS_BACKEND=local,
+# a directory of files named by CID for tests and offline runs
+IPFS_BACKEND = os.environ.get("IPFS_BACKEND", "pinata")
+IPFS_COMPRESS = os.environ.get("IPFS_COMPRESS", "0") == "1"
+if IPFS_BACKEND == "local":
+    ipfs_client: PinBackend = LocalPinBackend(
+        os.environ.get("IPFS_LOCAL_DIR", ".ipfs_local"), compress=IPFS_COMPRESS, observer=observe_ipfs
+    )
+elif IPFS_BACKEND == "pinata":
+    ipfs_client = IPFSClient(
+        PINATA_GATEWAY_URL, PINATA_PIN_URL, PINATA_HEADERS,
+        max_connections=int(os.environ.get("IPFS_MAX_CONNECTIONS", "32")),
+        max_concurrency=int(os.environ.get("IPFS_MAX_CONCURRENCY", "16")),
+        timeout=float(os.environ.get("IPFS_TIMEOUT", "30")),
+        observer=observe_ipfs,
+        compress=IPFS_COMPRESS
+    )
+else:
+    raise ValueError(f"Unknown IPFS_BACKEND {IPFS_BACKEND!r} (expected pinata or local)")
+
+# Web3 config (Hardhat Localhost). connect_chain() imports web3 and reaches the node in the background
+# after startup, so scoring never waits for the chain; /ready/anchoring reports when anchoring is up.
+ETH_RPC_URL = os.environ.get("ETH_RPC_URL", "http://127.0.0.1:8545")
+contract_address = os.environ.get("CONTRACT_ADDRESS", "0x5FbDB2315678afecb367f032d93F642f64180aa3")
+CONTRACT_ARTIFACT_PATH = os.environ.get(
+    "CONTRACT_ARTIFACT_PATH", "../artifacts/contracts/PMKisan.sol/PMKisanRegistry.json"
+)
+w3 = None
+contract = None
+deployer_account = None  # read from the node by connect_chain()
+chain_connect_task: Optional[asyncio.Task] = None
+chain_error: Optional[str] = None
+
+# Groups decisions into storeDecisions transactions with local nonces and background receipt checks
+anchorer = BatchAnchorer(
+    None, None, None,
+    max_batch=int(os.environ.get("ANCHOR_MAX_BATCH", "50")),
+    max_wait=float(os.environ.get("ANCHOR_MAX_WAIT", "1.0")),
+    max_in_flight=int(os.environ.get("ANCHOR_MAX_IN_FLIGHT", "4"))
+)
 
-contract = w3.eth.contract(address=contract_address, abi=contract_abi)
-deployer_account = w3.eth.accounts[0]
+# Local SQLite copy of the contract's DecisionStored logs, synced incrementally in the background
+# once the chain is connected; reads answer from the local copy before that
+chain_indexer = ChainIndexer(
+    os.environ.get("CHAIN_INDEX_PATH", "chain_index.sqlite3"), None, None,
+    start_block=int(os.environ.get("CHAIN_INDEX_START_BLOCK", "0")),
+    confirmations=int(os.environ.get("CHAIN_INDEX_CONFIRMATIONS", "0")),
+    poll_interval=float(os.environ.get("CHAIN_INDEX_POLL_INTERVAL", "2.0")),
+    address=contract_address
+)
+# Artifacts compiled before the contract emitted DecisionStored have nothing to index
+chain_indexing = False
+
+def read_contract_abi() -> List[Dict[str, Any]]:
+    with open(CONTRACT_ARTIFACT_PATH) as f:
+        return json.load(f)["abi"]
+
+async def connect_chain():
+    """Set up web3, the contract and the deployer account, retrying until the node answers
+
+    Then hands the connection to the anchorer, whose queued decisions go out from then on,
+    and starts the chain indexer.
+    """
+    global w3, contract, deployer_account, chain_indexing, chain_error
+    delay = 1.0
+    while True:
+        try:
+            contract_abi = bundled_abi if bundled_abi is not None else await asyncio.to_thread(read_contract_abi)
+            web3 = await asyncio.to_thread(importlib.import_module, "web3")
+            w3 = web3.AsyncWeb3(web3.AsyncWeb3.AsyncHTTPProvider(ETH_RPC_URL))
+            contract = w3.eth.contract(address=contract_address, abi=contract_abi)
+            deployer_account = (await w3.eth.accounts)[0]
+            break
+        except Exception as e:
+            chain_error = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Chain not ready ({chain_error}); retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+    chain_error = None
+    anchorer.connect(w3, contract, deployer_account)
+    chain_indexing = any(item.get("type") == "event" and item.get("name") == "DecisionStored" for item in contract_abi)
+    if chain_indexing:
+        chain_indexer.connect(w3, contract)
+        chain_indexer.start()
+    else:
+        print("⚠️ Contract ABI has no DecisionStored event; recompile the contracts (and rebuild the artefact "
+              "bundle) to enable the chain index")
+    print(f"✅ Connected to {ETH_RPC_URL} as {deployer_account}")
 
 # Replace with your actual CID from the transformed database
-CURRENT_DATABASE_CID = "QmVYS13RPiaxHiRjvXLAjxBBN2yhvNWkMLzj4x8pCL7rmU"
+# The database the server starts from; DATABASE_CID="" starts an empty one
+BOOTSTRAP_DATABASE_CID = os.environ.get("DATABASE_CID", "QmVYS13RPiaxHiRjvXLAjxBBN2yhvNWkMLzj4x8pCL7rmU")
+CURRENT_DATABASE_CID = BOOTSTRAP_DATABASE_CID
+
+# Parsed IPFS documents (database roots and chunks) keyed by CID; the current root stays pinned
+ipfs_cache = CIDCache(os.environ.get("IPFS_CACHE_DIR", ".ipfs_cache"), max_entries=64)
+if CURRENT_DATABASE_CID:
+    ipfs_cache.pin(CURRENT_DATABASE_CID)
 
 class NumpyEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -61,6 +257,11 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return super().default(obj)
 
+# Rows scored per vectorised predict_proba / SHAP call in /predict/batch
+BATCH_CHUNK_SIZE = 1024
+# NDJSON bodies larger than this are spooled to disk rather than held in memory
+BATCH_SPOOL_SIZE = 8 * 1024 * 1024
+
 class Applicant(BaseModel):
     aadhaar: int
     name: str
@@ -70,60 +271,154 @@ class Applicant(BaseModel):
     land_ownership: bool
     housing_status: str
 
-def fetch_database_from_ipfs(cid: str) -> Dict[str, Any]:
-    """Fetch the current database from IPFS"""
+async def fetch_ipfs_document(cid: str) -> Dict[str, Any]:
+    """Fetch a JSON document from the local CID cache, or from IPFS on a cold miss"""
+    cached = ipfs_cache.peek(cid)
+    if cached is None:
+        cached = await asyncio.to_thread(ipfs_cache.get, cid)
+    if cached is not None:
+        return cached
+    document = await ipfs_client.get_json(cid)
+    await asyncio.to_thread(ipfs_cache.put, cid, document)
+    return document
+
+async def fetch_database_from_ipfs(cid: str) -> Dict[str, Any]:
+    """Fetch a database root (or legacy single-file database) from IPFS"""
+    return await store.load_root(cid)
+
+async def fetch_database_to_commit(cid: str) -> Dict[str, Any]:
+    """The root a commit appends to
+
+    Only the bootstrap root may be missing (the first commit then starts a new
+    database, as the original backend did). Any other root that cannot be
+    fetched fails the commit, and its job is retried, rather than forking the
+    database from an empty one.
+    """
     try:
-        response = requests.get(f"https://gateway.pinata.cloud/ipfs/{cid}")
-        response.raise_for_status()
-        return response.json()
+        return await fetch_database_from_ipfs(cid)
     except Exception as e:
-        print(f"Error fetching database from IPFS: {e}")
-        # Return empty database structure if fetch fails
-        return {
-            "metadata": {
-                "total_participants": 0,
-                "last_updated": datetime.now().isoformat(),
-                "version": "1.0"
-            },
-            "participants": []
-        }
-
-def upload_to_pinata(data: Dict[str, Any], filename: str) -> str:
+        if cid != BOOTSTRAP_DATABASE_CID:
+            raise
+        print(f"⚠️ Bootstrap database {cid} could not be fetched ({e}); starting a new database")
+        return store.empty_root()
+
+def database_fetch_error(cid: str, e: Exception) -> HTTPException:
+    """404 for a CID IPFS has no database under, 502 when IPFS could not be reached"""
+    if isinstance(e, (FileNotFoundError, ValueError)) or (
+            isinstance(e, httpx.HTTPStatusError) and e.response.status_code in (400, 404, 422)):
+        return HTTPException(status_code=404, detail=f"Database {cid} not found")
+    return HTTPException(status_code=502, detail=f"Failed to fetch database {cid} from IPFS: {str(e)}")
+
+async def upload_to_pinata(data: Dict[str, Any], filename: str) -> str:
     """Upload data to Pinata and return CID"""
     try:
-        # Save to temporary file
-        with open(filename, "w") as f:
-            json.dump(data, f, cls=NumpyEncoder, indent=2)
-        
-        # Upload to Pinata
-        with open(filename, "rb") as f:
-            files = {'file': (filename, f)}
-            response = requests.post(
-                "https://api.pinata.cloud/pinning/pinFileToIPFS",
-                files=files,
-                headers=PINATA_HEADERS
-            )
-        
-        response.raise_for_status()
-        cid = response.json()["IpfsHash"]
-        
-        # Clean up temporary file
-        os.remove(filename)
-        
-        return cid
+        return await ipfs_client.pin_json(data, filename, encoder=NumpyEncoder)
     except Exception as e:
         print(f"Error uploading to Pinata: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to upload to IPFS: {str(e)}")
 
-def generate_explanation_text(features: Dict[str, Any], shap_values: list, prediction_bool: bool) -> str:
-    """Generate human-readable explanation using Gemini"""
+async def pin_document(data: Dict[str, Any], filename: str) -> str:
+    """Upload a document to Pinata and keep it in the local CID cache"""
+    cid = await upload_to_pinata(data, filename)
+    await asyncio.to_thread(ipfs_cache.put, cid, data)
+    return cid
+
+store = ParticipantStore(
+    fetch_ipfs_document, pin_document, chunk_size=int(os.environ.get("PARTICIPANT_CHUNK_SIZE", "1000"))
+)
+
+# O(1) lookups and running aggregates for the current database, updated on every commit
+participant_index = ParticipantIndex()
+index_rebuild_lock = asyncio.Lock()
+
+# Local columnar copy of the database (see columnar_db.py), tagged with the root CID it mirrors
+COLUMNAR_SNAPSHOT_PATH = os.environ.get("COLUMNAR_SNAPSHOT_PATH", "participants_snapshot")
+
+def load_snapshot(database_cid: str) -> Optional[ColumnarDatabase]:
+    """Open the columnar snapshot if it mirrors database_cid"""
+    try:
+        snapshot = ColumnarDatabase(COLUMNAR_SNAPSHOT_PATH)
+    except (OSError, ValueError):
+        return None
+    # Snapshots before format version 2 dropped integer incomes and missing fields; rebuild those
+    if snapshot.manifest.get("version", 0) < 2:
+        return None
+    return snapshot if snapshot.metadata.get("database_cid") == database_cid else None
+
+async def current_index() -> ParticipantIndex:
+    """Return the participant index, rebuilding it if the current CID changed outside our commits
+
+    Rebuilds read the columnar snapshot when it mirrors the current CID and only
+    fall back to fetching every chunk from IPFS (then refreshing the snapshot).
+    """
+    if participant_index.database_cid != CURRENT_DATABASE_CID:
+        async with index_rebuild_lock:
+            database_cid = CURRENT_DATABASE_CID
+            if participant_index.database_cid != database_cid:
+                with timed_stage("index_rebuild"):
+                    await rebuild_index(database_cid)
+    return participant_index
+
+async def rebuild_index(database_cid: str):
+    """Rebuild the participant index for database_cid (caller holds index_rebuild_lock)"""
+    snapshot = await asyncio.to_thread(load_snapshot, database_cid)
+    if snapshot is not None:
+        table = await asyncio.to_thread(ParticipantTable.from_columnar, snapshot)
+        participant_index.rebuild_from_table(database_cid, table, snapshot.metadata.get("last_updated"))
+        return
+    root = await fetch_database_from_ipfs(database_cid)
+    table = ParticipantTable()
+    async for participants in store.iter_chunks(root):
+        table.extend(participants)
+    participant_index.rebuild_from_table(database_cid, table, store.metadata(root).get("last_updated"))
+    await asyncio.to_thread(participant_index.save_columnar, COLUMNAR_SNAPSHOT_PATH)
+
+async def apply_group_commit(new_participants: List[Dict[str, Any]]):
+    """Assign participant IDs, append to the sharded database and make the new root current
+
+    Only ever runs on the commit coordinator's task, so commits are ordered.
+    """
+    global CURRENT_DATABASE_CID
+    with timed_stage("database_fetch"):
+        current_database = await fetch_database_to_commit(CURRENT_DATABASE_CID)
+    next_participant_id = store.total(current_database) + 1
+    for offset, participant in enumerate(new_participants):
+        participant["participant_id"] = next_participant_id + offset
+    with timed_stage("database_upload"):
+        updated_database_cid, root = await store.append(current_database, new_participants)
+    if store.total(current_database):
+        participant_index.apply_commit(
+            CURRENT_DATABASE_CID, updated_database_cid, new_participants, root["metadata"]["last_updated"]
+        )
+    else:
+        # A new database (empty, or a bootstrap root that could not be fetched) holds only this commit
+        participant_index.rebuild_from_table(
+            updated_database_cid, ParticipantTable.from_participants(new_participants), root["metadata"]["last_updated"]
+        )
+    CURRENT_DATABASE_CID = updated_database_cid
+    ipfs_cache.pin(updated_database_cid)
+    return updated_database_cid, root
+
+# One ordered committer: concurrent writers are group-committed into a single new root
+commit_coordinator = CommitCoordinator(apply_group_commit)
+
+async def commit_participants(new_participants: List[Dict[str, Any]]):
+    """Queue participants for the next group commit and wait for its new root"""
+    return await commit_coordinator.submit(new_participants)
+
+async def generate_explanation_text(features: Dict[str, Any], shap_values: Dict[str, float], prediction_bool: bool) -> Optional[str]:
+    """Generate human-readable explanation using Gemini, or None if the call fails
+
+    `features` are bucketed (see bucket_features) so the text can be shared by
+    every decision with the same signature.
+    """
     prompt = f"""
 Explain in plain language the eligibility decision for PM-KISAN scheme.
 
 Applicant Details:
 - Age: {features['age']} years
 - Caste: {features['caste']}
-- Annual Income: ₹{features['income']:,}
+- Annual Income: {features['income']}
 - Land Ownership: {"Yes" if features['land_ownership'] else "No"}
 - Housing Status: {features['housing_status']}
 
@@ -135,201 +430,794 @@ SHAP Feature Importance Scores:
 Provide a clear, simple explanation in 2-3 sentences about why this decision was made based on the PM-KISAN eligibility criteria.
 """
     try:
-        model_gemini = genai.GenerativeModel("models/gemini-2.0-flash")
-        response = model_gemini.generate_content(prompt)
+        with timed_stage("gemini"):
+            model = await asyncio.to_thread(get_gemini_model)
+            response = await model.generate_content_async(prompt)
+        llm_requests.inc(outcome="ok")
         return response.text.strip()
     except Exception as e:
+        llm_requests.inc(outcome="error")
         print(f"Error generating explanation: {e}")
-        return f"Decision: {'Eligible' if prediction_bool else 'Not Eligible'} based on model prediction."
-
-@app.post("/predict")
-def predict_eligibility(applicant: Applicant):
-    try:
-
-        global CURRENT_DATABASE_CID
-        # 1. Prepare input for prediction
-        input_data = pd.DataFrame([{
-            "age": applicant.age,
-            "caste": applicant.caste,
-            "income": applicant.income,
-            "land_ownership": int(applicant.land_ownership),
-            "housing_status": applicant.housing_status
-        }])
-        
-        # Encode categorical features
-        input_data['caste'] = input_data['caste'].map({"SC": 0, "ST": 1, "OBC": 2, "General": 3})
-        input_data['housing_status'] = input_data['housing_status'].map({"kutcha": 0, "semi-pucca": 1, "pucca": 2})
-
-        # 2. Make prediction
-        prediction = model.predict(input_data)[0]
-        prediction_bool = bool(prediction)
-        confidence = float(np.max(model.predict_proba(input_data)[0]))
-
-        # 3. Generate SHAP explanation
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(input_data)
-        shap_val = shap_values[1] if isinstance(shap_values, list) and len(shap_values) > 1 else shap_values
-        expected_val = explainer.expected_value[1] if isinstance(explainer.expected_value, list) else explainer.expected_value
-
-        shap_array = np.array(shap_val)  # safe conversion
-        shap_row = shap_array[0] if shap_array.ndim == 2 else shap_array
-        if shap_row.ndim != 1:
-            shap_row = shap_row.flatten()
-
-
-        contributions = {}
-        for col, val in zip(input_data.columns.tolist(), shap_row):
-            contributions[col] = float(val) if np.isscalar(val) else float(np.array(val).flatten()[0])
-
-        # 4. Create explanation dictionary
-        explanation_dict = {
-            "applicant_info": {
-                "aadhaar": applicant.aadhaar,
-                "name": applicant.name,
-                "age": applicant.age,
-                "caste": applicant.caste,
-                "income": applicant.income,
-                "land_ownership": applicant.land_ownership,
-                "housing_status": applicant.housing_status
-            },
-            "prediction": {
-                "eligible": prediction_bool,
-                "confidence": confidence
-            },
-            "explanation": {
-                "feature_names": input_data.columns.tolist(),
-                "shap_values": shap_row.tolist(),
-
-                "base_value": float(expected_val) if np.isscalar(expected_val) else float(expected_val[0]),
+        return None
 
-                "feature_contributions": contributions
+async def remember_explanation(signature: str, text: str, source: str):
+    """Cache an explanation, writing the snapshot off the event loop when a save is due"""
+    if explanation_cache.put(signature, text, source):
+        await asyncio.to_thread(explanation_cache.save)
 
-            },
-            "timestamp": datetime.now().isoformat()
-        }
-
-        # Generate LLM explanation
-        explanation_text = generate_explanation_text(
-            explanation_dict["applicant_info"],
-            explanation_dict["explanation"]["feature_contributions"],
-            prediction_bool
+async def enrich_explanation(signature: str, features: Dict[str, Any], contributions: Dict[str, float], prediction_bool: bool):
+    """Replace a cached template explanation with Gemini's text for the same signature"""
+    try:
+        async with enrichment_slots:
+            text = await generate_explanation_text(bucket_features(features), contributions, prediction_bool)
+        if text:
+            await remember_explanation(signature, text, "llm")
+    finally:
+        enrichment_pending.pop(signature, None)
+
+async def explain_decision(features: Dict[str, Any], contributions: Dict[str, float], prediction_bool: bool):
+    """Return (text, source) from the explanation cache, rendering a template on a miss
+
+    Never waits for the LLM: with LLM_EXPLANATIONS enabled, a miss also queues
+    Gemini enrichment so later decisions with the same signature get its text.
+    """
+    signature = decision_signature(features, contributions, prediction_bool)
+    cached = explanation_cache.get(signature)
+    if cached is not None:
+        return cached
+
+    text = render_template_explanation(features, contributions, prediction_bool)
+    await remember_explanation(signature, text, "template")
+    if LLM_EXPLANATIONS and signature not in enrichment_pending:
+        enrichment_pending[signature] = asyncio.create_task(
+            enrich_explanation(signature, features, contributions, prediction_bool)
+        )
+    return text, "template"
+
+async def pin_explanation(result: Dict[str, Any]):
+    """Pin a decision's explanation under the CID already computed (and possibly anchored) for it"""
+    document = result["explanation_document"]
+    _, payload = ipfs_client.encode(document, encoder=NumpyEncoder)
+    with timed_stage("explanation_upload"):
+        await ipfs_client.pin_encoded(
+            result["explanation_cid"], payload, f"explanation_{document['applicant_info']['aadhaar']}.json"
         )
+    del result["explanation_document"]
+
+def anchor_record(database_cid: str, explanation_cid: str, eligible: bool, participant_id: int) -> Dict[str, Any]:
+    """One storeDecisions entry: a committed participant's decision"""
+    return {
+        "database_cid": database_cid,
+        "explanation_cid": explanation_cid,
+        "decision": "Eligible" if eligible else "Not Eligible",
+        "participant_id": participant_id,
+    }
+
+async def anchor_records(records: List[Dict[str, Any]], states: List[Dict[str, Any]], checkpoint):
+    """Record decisions on-chain in storeDecisions batches and wait for them to be mined
+
+    states[i] holds records[i]'s tx_hash and block_number so far. A transaction
+    sent by an earlier attempt is only replaced once it can no longer be mined,
+    so a slow transaction never anchors a decision twice.
+    """
+    sent_before = [state for state in states if "tx_hash" in state and "block_number" not in state]
+    if sent_before:
+        with timed_stage("receipt_wait"):
+            blocks = await asyncio.gather(*(anchorer.resolve(state["tx_hash"]) for state in sent_before))
+        for state, block_number in zip(sent_before, blocks):
+            if block_number is None:
+                del state["tx_hash"]
+            else:
+                state["block_number"] = block_number
+        await checkpoint()
+
+    # 🔗 Store the records on-chain as part of the next storeDecisions batch
+    unsent = [(record, state) for record, state in zip(records, states) if "tx_hash" not in state]
+    if not unsent:
+        return
+    tickets = [anchorer.submit(**record) for record, _ in unsent]
+    with timed_stage("chain_tx"):
+        sent = await asyncio.gather(*(ticket.sent for ticket in tickets), return_exceptions=True)
+    for (_, state), tx_hash in zip(unsent, sent):
+        if not isinstance(tx_hash, BaseException):
+            state["tx_hash"] = tx_hash
+    await checkpoint()
+    with timed_stage("receipt_wait"):
+        confirmed = await asyncio.gather(*(ticket.confirmed for ticket in tickets), return_exceptions=True)
+    for (_, state), block_number in zip(unsent, confirmed):
+        if not isinstance(block_number, BaseException):
+            state["block_number"] = block_number
+    await checkpoint()
+    errors = [outcome for outcome in confirmed if isinstance(outcome, BaseException)]
+    if errors:
+        # Not sent, reverted or not mined in time; the retry checks sent transactions before anchoring again
+        raise errors[0]
+    for tx_hash in dict.fromkeys(state["tx_hash"] for _, state in unsent):
+        print("✅ Stored decision on blockchain, tx hash:", tx_hash)
+
+async def process_decision_job(payload: Dict[str, Any], result: Dict[str, Any], checkpoint):
+    """Write-behind stages of a decision: explanation upload, database commit, on-chain record"""
+    explanation_dict = payload["explanation_dict"]
+    applicant_info = explanation_dict["applicant_info"]
+    prediction_bool = explanation_dict["prediction"]["eligible"]
+
+    # 5. Explain the decision (cached or templated). Its IPFS CID is computed locally, so the database
+    # commit and anchoring go ahead while the explanation is pinned; the job finishes once it is pinned.
+    if "explanation_cid" not in result:
+        with timed_stage("explanation"):
+            explanation_text, explanation_source = await explain_decision(
+                applicant_info,
+                explanation_dict["explanation"]["feature_contributions"],
+                prediction_bool
+            )
         explanation_dict["explanation"]["llm_explanation"] = explanation_text
+        explanation_dict["explanation"]["explanation_source"] = explanation_source
+        result["explanation"] = explanation_text
+        result["explanation_cid"], _ = ipfs_client.encode(explanation_dict, encoder=NumpyEncoder)
+        # Kept until pinned, so a retry pins the same bytes
+        result["explanation_document"] = explanation_dict
+        await checkpoint()
+
+    pinning = asyncio.create_task(pin_explanation(result)) if "explanation_document" in result else None
+    try:
+        # 6. Add the new participant to the database; only the tail chunk and a new root are uploaded
+        if "database_cid" not in result:
+            new_participant = {
+                "participant_id": None,  # assigned at commit time
+                "aadhaar": applicant_info["aadhaar"],
+                "name": applicant_info["name"],
+                "age": applicant_info["age"],
+                "caste": applicant_info["caste"],
+                "income": applicant_info["income"],
+                "land_ownership": applicant_info["land_ownership"],
+                "housing_status": applicant_info["housing_status"],
+                "eligible": prediction_bool,
+                "decision_date": explanation_dict["timestamp"],
+                "explanation_cid": result["explanation_cid"],
+                "confidence": explanation_dict["prediction"]["confidence"],
+                "model_version": explanation_dict.get("model_version")
+            }
+            with timed_stage("database_commit"):
+                updated_database_cid, updated_root = await commit_participants([new_participant])
+            result["participant_id"] = new_participant["participant_id"]
+            result["database_cid"] = updated_database_cid
+            result["total_participants"] = updated_root["metadata"]["total_participants"]
+            await checkpoint()
+
+        # 7. Anchor the committed participant's decision, as /predict/batch does
+        record = anchor_record(
+            result["database_cid"], result["explanation_cid"], prediction_bool, result["participant_id"]
+        )
+        await anchor_records([record], [result], checkpoint)
+    finally:
+        if pinning is not None:
+            await asyncio.gather(pinning, return_exceptions=True)
+    if pinning is not None:
+        pinning.result()
+        await checkpoint()
+
+    if payload.get("decision_key"):
+        await decision_cache.update(payload["decision_key"], {
+            "job_status": "done",
+            "explanation_cid": result["explanation_cid"],
+            "tx_hash": result["tx_hash"],
+            "block_number": result["block_number"],
+            "participant_id": result["participant_id"],
+            "database_cid": result["database_cid"],
+        })
+
+async def process_anchor_job(payload: Dict[str, Any], result: Dict[str, Any], checkpoint):
+    """Anchor a /predict/batch commit's decisions, resuming per record like a /predict decision"""
+    records = payload["anchor_records"]
+    states = result.setdefault("records", [{} for _ in records])
+    await anchor_records(records, states, checkpoint)
+
+async def process_job(payload: Dict[str, Any], result: Dict[str, Any], checkpoint):
+    """Job queue handler: a /predict decision's write-behind stages, or a /predict/batch commit's anchoring"""
+    if "anchor_records" in payload:
+        await process_anchor_job(payload, result, checkpoint)
+    else:
+        await process_decision_job(payload, result, checkpoint)
+
+# Durable local queue for everything after scoring; /predict returns as soon as the model has decided.
+# /predict/batch anchors each commit through it too. Workers wait on their decisions' transactions, so the
+# worker count also bounds how many /predict decisions share an anchoring batch.
+jobs = JobQueue(
+    os.environ.get("JOB_QUEUE_PATH", "jobs.sqlite3"),
+    process_job,
+    workers=int(os.environ.get("JOB_WORKERS", "16"))
+)
 
-# 5. Upload explanation to IPFS
-        explanation_cid = upload_to_pinata(explanation_dict, f"explanation_{applicant.aadhaar}.json")
-
-        # 🔗 Call the smart contract to store record on-chain
-        tx_hash = contract.functions.storeDecision(
-            CURRENT_DATABASE_CID,  # databaseCID
-            explanation_cid,       # explanationCID
-            "Eligible" if prediction_bool else "Not Eligible",
-            int(applicant.aadhaar) % (10**6)  # mock participantId (or better from database)
-        ).transact({"from": deployer_account})
-
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)      
-        print("✅ Stored decision on blockchain, tx hash:", receipt.transactionHash.hex())
-
-
-        # 6. Fetch current database from IPFS
-        current_database = fetch_database_from_ipfs(CURRENT_DATABASE_CID)
-        
-        # 7. Add new participant to database
-        new_participant_id = len(current_database["participants"]) + 1
-        
-        new_participant = {
-            "participant_id": new_participant_id,
+metrics.callback(
+    "pmkisan_cache_requests_total", "Cache lookups by cache and result", "counter",
+    lambda: {
+        ("ipfs", "hit"): ipfs_cache.hits, ("ipfs", "miss"): ipfs_cache.misses,
+        ("explanation", "hit"): explanation_cache.hits, ("explanation", "miss"): explanation_cache.misses,
+        ("decision", "hit"): decision_cache.hits + decision_cache.joined, ("decision", "miss"): decision_cache.misses,
+    },
+    ["cache", "result"]
+)
+metrics.callback(
+    "pmkisan_job_attempts_total", "Decision job attempts by outcome (retried attempts are scheduled again)", "counter",
+    lambda: {("completed",): jobs.completed, ("retried",): jobs.retried, ("failed",): jobs.failed},
+    ["outcome"]
+)
+metrics.callback(
+    "pmkisan_anchor_transactions_total", "storeDecisions transactions by outcome", "counter",
+    lambda: {
+        ("sent",): anchorer.batches_sent, ("send_failed",): anchorer.send_failures,
+        ("reverted",): anchorer.reverted, ("timed_out",): anchorer.timed_out,
+    },
+    ["outcome"]
+)
+metrics.callback("pmkisan_anchor_decisions_total", "Decisions sent in storeDecisions batches", "counter",
+                 lambda: anchorer.decisions_sent)
+metrics.callback("pmkisan_anchor_pending", "Decisions waiting for the next storeDecisions batch", "gauge",
+                 lambda: anchorer.pending)
+metrics.callback("pmkisan_anchor_in_flight", "storeDecisions transactions awaiting a receipt", "gauge",
+                 lambda: anchorer.in_flight)
+metrics.callback("pmkisan_chain_index_block", "Last block synced into the local chain index", "gauge",
+                 lambda: (chain_indexer.position() or (-1, None))[0])
+metrics.callback("pmkisan_chain_index_logs_total", "DecisionStored logs indexed", "counter",
+                 lambda: chain_indexer.logs_indexed)
+metrics.callback("pmkisan_participants", "Participants in the indexed database", "gauge",
+                 lambda: len(participant_index))
+metrics.callback("pmkisan_participant_index_bytes", "Memory held by the participant index", "gauge",
+                 lambda: participant_index.nbytes)
+metrics.callback("pmkisan_ready", "Whether scoring and anchoring are ready", "gauge",
+                 lambda: {("scoring",): 1, ("anchoring",): int(deployer_account is not None)}, ["component"])
+metrics.callback("pmkisan_model_info", "Active model version", "gauge", lambda: {(active_model.version,): 1}, ["version"])
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Per-route latency histogram, and a flame profile of requests slower than PROFILE_SLOW_REQUESTS_MS"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    finished = time.perf_counter()
+    route = request.scope.get("route")
+    route_path = route.path if route is not None else "unmatched"
+    request_latency.observe(finished - started, method=request.method, route=route_path, status=response.status_code)
+    if profiler is not None and (finished - started) * 1000 >= PROFILE_SLOW_REQUESTS_MS:
+        path = await asyncio.to_thread(profiler.dump, PROFILE_DIR, f"{request.method} {route_path}", started, finished)
+        print(f"Slow request {request.method} {request.url.path}: {(finished - started) * 1000:.0f} ms, profile {path}")
+    return response
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/ready/scoring")
+async def get_scoring_readiness():
+    """Ready for /predict traffic: the active model is loaded and warmed up before the app serves"""
+    return {
+        "ready": True,
+        "model_version": active_model.version,
+        "shap": "table" if active_model.shap_table is not None else "live",
+        "explainer_loaded": active_model.explainer_loaded
+    }
+
+@app.get("/ready/anchoring")
+async def get_anchoring_readiness():
+    """Ready to anchor decisions: connected to the node with a deployer account (503 until then)"""
+    ready = deployer_account is not None
+    return JSONResponse({
+        "ready": ready,
+        "rpc_url": ETH_RPC_URL,
+        "contract": contract_address,
+        "account": deployer_account,
+        "connecting": chain_connect_task is not None and not chain_connect_task.done(),
+        "chain_index": chain_indexing,
+        "error": chain_error
+    }, status_code=200 if ready else 503)
+
+@app.on_event("startup")
+async def start_background_workers():
+    global chain_connect_task
+    if profiler is not None:
+        profiler.start()
+    commit_coordinator.start()
+    # Decision jobs run from start-up; only their anchoring stage waits for the chain to answer
+    anchorer.start()
+    jobs.start()
+    chain_connect_task = asyncio.create_task(connect_chain(), name="chain-connect")
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    if chain_connect_task is not None and not chain_connect_task.done():
+        chain_connect_task.cancel()
+        try:
+            await chain_connect_task
+        except asyncio.CancelledError:
+            pass
+    await jobs.stop()
+    await anchorer.stop()
+    await chain_indexer.stop()
+    await commit_coordinator.stop()
+    for task in list(enrichment_pending.values()):
+        task.cancel()
+    await asyncio.to_thread(explanation_cache.save)
+    if participant_index.database_cid and load_snapshot(participant_index.database_cid) is None:
+        await asyncio.to_thread(participant_index.save_columnar, COLUMNAR_SNAPSHOT_PATH)
+    await ipfs_client.aclose()
+    cpu_executor.shutdown(wait=False)
+    if profiler is not None:
+        profiler.stop()
+
+def score_applicant(bundle: ModelBundle, X: np.ndarray):
+    """Score and explain one encoded applicant (runs on the CPU executor)"""
+    # 2-3. Prediction and SHAP explanation, one lookup when the version has a SHAP table
+    with timed_stage("score"):
+        proba, shap_values = bundle.predict_and_explain(X)
+    scored_rows.inc(len(X), shap="table" if bundle.shap_table is not None else "live")
+    prediction_bool = bool(bundle.forest.classes_[np.argmax(proba[0])])
+    confidence = float(np.max(proba[0]))
+    return prediction_bool, confidence, shap_values[0]
+
+async def decide(bundle: ModelBundle, applicant: Applicant, X: np.ndarray, decision_key: str) -> Dict[str, Any]:
+    """Score an encoded applicant and queue its write-behind job; returns the /predict response"""
+    prediction_bool, confidence, shap_row = await run_cpu(score_applicant, bundle, X)
+    contributions = bundle.contributions(shap_row)
+
+    # 4. Create explanation dictionary
+    explanation_dict = {
+        "applicant_info": {
             "aadhaar": applicant.aadhaar,
             "name": applicant.name,
             "age": applicant.age,
             "caste": applicant.caste,
             "income": applicant.income,
             "land_ownership": applicant.land_ownership,
-            "housing_status": applicant.housing_status,
+            "housing_status": applicant.housing_status
+        },
+        "prediction": {
             "eligible": prediction_bool,
-            "decision_date": datetime.now().isoformat(),
-            "explanation_cid": explanation_cid,
             "confidence": confidence
-        }
-        
-        current_database["participants"].append(new_participant)
-        
-        # Update metadata
-        current_database["metadata"]["total_participants"] = len(current_database["participants"])
-        current_database["metadata"]["last_updated"] = datetime.now().isoformat()
-        
-        # 8. Upload updated database to IPFS
-        updated_database_cid = upload_to_pinata(current_database, f"database_updated_{new_participant_id}.json")
-        
-        # Update the global current database CID for next request
-        
-        CURRENT_DATABASE_CID = updated_database_cid
-
-       
-
-        
-        # 9. Return response with both CIDs
-        return {
-            "eligible": prediction_bool,
-            "confidence": confidence,
-            "explanation": explanation_text,
-            "feature_contributions": contributions,
-            "participant_id": new_participant_id,
-            "database_cid": updated_database_cid,
-            "explanation_cid": explanation_cid,
-            "total_participants": current_database["metadata"]["total_participants"]
-        }
-        
-    
+        },
+        "explanation": {
+            "feature_names": bundle.feature_names,
+            "shap_values": shap_row.tolist(),
+
+            "base_value": bundle.expected_value,
+
+            "feature_contributions": contributions
+
+        },
+        "model_version": bundle.version,
+        "timestamp": datetime.now().isoformat()
+    }
+
+    # 5. Hand the explanation upload, chain record and database commit to the job queue
+    job_id = await jobs.submit({"explanation_dict": explanation_dict, "decision_key": decision_key})
+
+    return {
+        "eligible": prediction_bool,
+        "confidence": confidence,
+        "feature_contributions": contributions,
+        "model_version": bundle.version,
+        "job_id": job_id,
+        "job_status": "pending"
+    }
+
+async def replayable(decision: Dict[str, Any]) -> bool:
+    """Whether a cached decision can be replayed: its job finished or is still running"""
+    if decision.get("job_status") == "done":
+        return True
+    job = await jobs.get(decision["job_id"])
+    if job is None or job["status"] == FAILED:
+        return False
+    decision["job_status"] = job["status"]
+    return True
+
+@app.post("/predict")
+async def predict_eligibility(applicant: Applicant):
+    bundle = active_model
+    # 1. Encode with the model's own label encoders; unknown categories are a client error
+    try:
+        with timed_stage("encode"):
+            X = bundle.encoder.encode(applicant)
+    except UnknownCategoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # Resubmissions of the same applicant to the same model replay the first decision
+    decision_key = idempotency_key(
+        applicant.aadhaar, {name: getattr(applicant, name) for name in bundle.feature_names}, bundle.version
+    )
+    try:
+        response, replayed = await decision_cache.get_or_compute(
+            decision_key, lambda: decide(bundle, applicant, X, decision_key), valid=replayable
+        )
+        response["replayed"] = replayed
+        return response
+
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Report the progress of a decision's write-behind job, or of a /predict/batch anchoring job"""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    result = job.pop("result")
+    if "records" in result:
+        # tx_hash and block_number of each committed row, in batch_position order
+        job["records"] = result["records"]
+        return job
+    job.update({
+        "explanation": result.get("explanation"),
+        "explanation_cid": result.get("explanation_cid"),
+        "tx_hash": result.get("tx_hash"),
+        "block_number": result.get("block_number"),
+        "participant_id": result.get("participant_id"),
+        "database_cid": result.get("database_cid"),
+        "total_participants": result.get("total_participants")
+    })
+    return job
+
+def check_admin_token(token: Optional[str]):
+    if ADMIN_TOKEN and token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+async def swap_model(version: str):
+    """Load and warm up a registered version off the event loop, then make it active in one assignment"""
+    global active_model, model_loading, model_swap_error
+    try:
+        bundle = await asyncio.to_thread(model_registry.load, version)
+        await asyncio.to_thread(bundle.warm_up)
+        await asyncio.to_thread(model_registry.activate, version)
+        previous, active_model = active_model.version, bundle
+        model_swap_error = None
+        print(f"Switched model from {previous} to {version}")
+    except Exception as e:
+        traceback.print_exc()
+        model_swap_error = f"Failed to load model {version}: {str(e)}"
+    finally:
+        model_loading = None
+
+@app.get("/admin/model")
+async def get_model_status(x_admin_token: Optional[str] = Header(None)):
+    """Active model version, any version warming up, and every registered version"""
+    check_admin_token(x_admin_token)
+    return {
+        "active_version": active_model.version,
+        "schema": active_model.schema,
+        "loading_version": model_loading,
+        "last_error": model_swap_error,
+        "versions": await asyncio.to_thread(model_registry.versions)
+    }
+
+@app.post("/admin/model/{version}/activate", status_code=202)
+async def activate_model(version: str, x_admin_token: Optional[str] = Header(None)):
+    """Warm up a registered model version in the background and swap it in atomically"""
+    global model_loading, model_swap_task
+    check_admin_token(x_admin_token)
+    if version not in await asyncio.to_thread(model_registry.versions):
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found")
+    if model_loading is not None:
+        raise HTTPException(status_code=409, detail=f"Model version {model_loading} is already loading")
+    if version == active_model.version:
+        return {"status": "active", "version": version}
+    model_loading = version
+    model_swap_task = asyncio.create_task(swap_model(version))
+    return {"status": "loading", "version": version}
+
+def score_applicants(bundle: ModelBundle, X: np.ndarray) -> Dict[str, np.ndarray]:
+    """Score a chunk of encoded applicants with one table lookup (or one predict_proba and one SHAP call)"""
+    with timed_stage("batch_score"):
+        proba, shap_values = bundle.predict_and_explain(X)
+    scored_rows.inc(len(X), shap="table" if bundle.shap_table is not None else "live")
+    best = np.argmax(proba, axis=1)
+    return {
+        "eligible": bundle.forest.classes_.take(best).astype(bool),
+        "confidence": proba[np.arange(len(best)), best],
+        "shap_values": shap_values,
+    }
+
+async def spool_request_body(request: Request) -> tempfile.SpooledTemporaryFile:
+    """Spool the request body to a temporary file that spills to disk past BATCH_SPOOL_SIZE"""
+    spool = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_SIZE)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+async def iter_ndjson_lines(spool: tempfile.SpooledTemporaryFile) -> AsyncIterator[bytes]:
+    """Yield the non-empty lines of a spooled NDJSON body"""
+    with spool:
+        for line in spool:
+            if line.strip():
+                yield line
+
+async def iter_list(rows: List[Any]) -> AsyncIterator[Any]:
+    for row in rows:
+        yield row
+
+async def stream_batch_results(rows: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    """Score rows chunk by chunk, stream NDJSON results and commit the database once
+
+    Participant IDs are assigned at commit time: a row's ID is the summary's
+    first_participant_id plus the row's batch_position. The committed decisions
+    are anchored by the job whose ID is the summary's anchor_job_id.
+    """
+    participants: List[Dict[str, Any]] = []
+    processed = eligible_count = 0
+    # The whole batch is scored by one model version, even if a swap lands mid-stream
+    bundle = active_model
+
+    # Rows are encoded into this buffer as they are parsed, so a chunk is scored without a second pass
+    X_chunk = bundle.encoder.empty(BATCH_CHUNK_SIZE)
+
+    async def flush(indices: List[int], applicants: List[Applicant]):
+        nonlocal eligible_count
+        scores = await run_cpu(score_applicants, bundle, X_chunk[:len(applicants)])
+        decision_date = datetime.now().isoformat()
+        lines = []
+        for index, applicant, eligible, confidence, shap_row in zip(
+            indices, applicants, scores["eligible"], scores["confidence"], scores["shap_values"]
+        ):
+            participant = {
+                "participant_id": None,  # assigned at commit time
+                "aadhaar": applicant.aadhaar,
+                "name": applicant.name,
+                "age": applicant.age,
+                "caste": applicant.caste,
+                "income": applicant.income,
+                "land_ownership": applicant.land_ownership,
+                "housing_status": applicant.housing_status,
+                "eligible": bool(eligible),
+                "decision_date": decision_date,
+                "explanation_cid": None,
+                "confidence": float(confidence),
+                "model_version": bundle.version
+            }
+            eligible_count += bool(eligible)
+            lines.append(json.dumps({
+                "index": index,
+                "batch_position": len(participants),
+                "eligible": participant["eligible"],
+                "confidence": participant["confidence"],
+                "feature_contributions": bundle.contributions(shap_row)
+            }))
+            participants.append(participant)
+        return ("\n".join(lines) + "\n").encode()
+
+    indices, applicants = [], []
+    async for row in rows:
+        index = processed
+        processed += 1
+        try:
+            if isinstance(row, bytes):
+                row = json.loads(row)
+            applicant = Applicant(**row)
+            bundle.encoder.encode_into(X_chunk[len(applicants)], applicant)
+        except (TypeError, ValueError, ValidationError) as e:
+            yield (json.dumps({"index": index, "error": str(e)}) + "\n").encode()
+            continue
+        indices.append(index)
+        applicants.append(applicant)
+        if len(applicants) >= BATCH_CHUNK_SIZE:
+            yield await flush(indices, applicants)
+            indices, applicants = [], []
+    if applicants:
+        yield await flush(indices, applicants)
+
+    # One database commit for the whole batch
+    summary = {"summary": True, "processed": processed, "accepted": len(participants), "eligible_count": eligible_count,
+               "model_version": bundle.version}
+    if participants:
+        try:
+            updated_database_cid, updated_root = await commit_participants(participants)
+        except Exception as e:
+            summary["error"] = f"Failed to commit batch: {str(e)}"
+        else:
+            summary["first_participant_id"] = participants[0]["participant_id"]
+            summary["database_cid"] = updated_database_cid
+            summary["total_participants"] = updated_root["metadata"]["total_participants"]
+            # Anchored in storeDecisions batches by a durable job, retried like /predict decisions
+            summary["anchor_job_id"] = await jobs.submit({"anchor_records": [
+                anchor_record(updated_database_cid, "", participant["eligible"], participant["participant_id"])
+                for participant in participants
+            ]})
+    yield (json.dumps(summary) + "\n").encode()
+
+@app.post("/predict/batch")
+async def predict_eligibility_batch(request: Request):
+    """Score a JSON list or NDJSON stream of applicants and stream NDJSON results"""
+    if "ndjson" in request.headers.get("content-type", ""):
+        rows = iter_ndjson_lines(await spool_request_body(request))
+    else:
+        try:
+            body = json.loads(await request.body())
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+        if isinstance(body, dict):
+            body = body.get("applicants", [])
+        if not isinstance(body, list):
+            raise HTTPException(status_code=400, detail="Expected a list of applicants")
+        rows = iter_list(body)
+    return StreamingResponse(stream_batch_results(rows), media_type="application/x-ndjson")
+
+# Participants per page read from the index while streaming an NDJSON export
+EXPORT_PAGE_SIZE = 1000
+
+def split_values(values: Optional[List[str]]) -> Optional[List[str]]:
+    """Accept both repeated (?caste=SC&caste=ST) and comma-separated (?caste=SC,ST) values"""
+    if not values:
+        return None
+    return [value.strip() for item in values for value in item.split(",") if value.strip()]
+
+def participant_query(
+    eligible: Optional[bool] = None,
+    caste: Optional[List[str]] = Query(None),
+    housing_status: Optional[List[str]] = Query(None),
+    min_income: Optional[float] = None,
+    max_income: Optional[float] = None,
+    decided_from: Optional[str] = None,
+    decided_to: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> ParticipantQuery:
+    """Filter and projection query parameters shared by the participant listings"""
+    try:
+        return ParticipantQuery(
+            eligible=eligible, castes=split_values(caste), housing_statuses=split_values(housing_status),
+            min_income=min_income, max_income=max_income, decided_from=decided_from,
+            decided_to=decided_to, fields=fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def page_cursor(cursor: Optional[str] = None) -> int:
+    try:
+        return parse_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def query_participants(cid: str, after: int, limit: int, query: ParticipantQuery):
+    """One page of a database's matching participants after a cursor, and the next cursor
+
+    The current database is answered from the participant index; older roots
+    are scanned from the cursor's chunk onwards, so earlier chunks are never
+    fetched.
+    """
+    index = await current_index()
+    if cid == index.database_cid:
+        return await asyncio.to_thread(index.page, after, limit, query)
+    root = await fetch_database_from_ipfs(cid)
+    selected = []
+    async for participant in store.iter_participants_after(root, after):
+        if query.matches(participant):
+            selected.append(query.project(participant))
+            if len(selected) == limit:
+                return selected, str(participant["participant_id"])
+    return selected, None
+
+async def stream_participants_ndjson(cid: str, query: ParticipantQuery, first_page) -> AsyncIterator[str]:
+    """Serialise every matching participant as one JSON line, a page at a time"""
+    participants, next_cursor = first_page
+    while True:
+        if participants:
+            yield "".join(json.dumps(participant) + "\n" for participant in participants)
+        if next_cursor is None:
+            return
+        participants, next_cursor = await query_participants(cid, int(next_cursor), EXPORT_PAGE_SIZE, query)
+
+async def export_participants(cid: str, query: ParticipantQuery) -> StreamingResponse:
+    try:
+        first_page = await query_participants(cid, 0, EXPORT_PAGE_SIZE, query)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to export participants: {str(e)}")
+    return StreamingResponse(stream_participants_ndjson(cid, query, first_page), media_type="application/x-ndjson")
+
 @app.get("/database/{cid}")
-def get_database_info(cid: str):
-    """Get information about the database from IPFS"""
+async def get_database_info(cid: str, after: int = Depends(page_cursor),
+                            limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                            query: ParticipantQuery = Depends(participant_query)):
+    """Get a database's metadata and one page of its participants (follow next_cursor for more)"""
+    try:
+        root = await fetch_database_from_ipfs(cid)
+    except Exception as e:
+        raise database_fetch_error(cid, e)
+    try:
+        participants, next_cursor = await query_participants(cid, after, limit, query)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get database: {str(e)}")
+    return {
+        "metadata": store.metadata(root),
+        "participants": participants,
+        "next_cursor": next_cursor,
+        "ipfs_link": f"{PINATA_GATEWAY_URL}/{cid}"
+    }
+
+@app.get("/database/{cid}/export")
+async def export_database(cid: str, query: ParticipantQuery = Depends(participant_query)):
+    """Stream every matching participant of a database as NDJSON"""
+    return await export_participants(cid, query)
+
+@app.get("/participants")
+async def list_participants(after: int = Depends(page_cursor), limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                            query: ParticipantQuery = Depends(participant_query)):
+    """List the current database's participants a page at a time, with filters and field selection"""
     try:
-        database = fetch_database_from_ipfs(cid)
-        return {
-            "metadata": database["metadata"],
-            "participants": database["participants"],
-            "ipfs_link": f"https://gateway.pinata.cloud/ipfs/{cid}"
-        }
+        database_cid = CURRENT_DATABASE_CID
+        participants, next_cursor = await query_participants(database_cid, after, limit, query)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch database: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to list participants: {str(e)}")
+    return {"database_cid": database_cid, "participants": participants, "next_cursor": next_cursor}
+
+@app.get("/participants/export")
+async def export_current_participants(query: ParticipantQuery = Depends(participant_query)):
+    """Stream the current database's matching participants as NDJSON"""
+    return await export_participants(CURRENT_DATABASE_CID, query)
 
 @app.get("/stats")
-def get_stats():
+async def get_stats():
     """Get overall statistics from current database"""
     try:
-        database = fetch_database_from_ipfs(CURRENT_DATABASE_CID)
-        eligible_count = sum(1 for p in database["participants"] if p.get("eligible", False))
-        not_eligible_count = len(database["participants"]) - eligible_count
-        
-        return {
-            "total_participants": len(database["participants"]),
-            "eligible_count": eligible_count,
-            "not_eligible_count": not_eligible_count,
-            "current_database_cid": CURRENT_DATABASE_CID,
-            "last_updated": database["metadata"]["last_updated"]
-        }
+        if participant_index.database_cid != CURRENT_DATABASE_CID:
+            # Cold start: three memory-mapped columns answer this without building the index
+            snapshot = await asyncio.to_thread(load_snapshot, CURRENT_DATABASE_CID)
+            if snapshot is not None:
+                stats = await asyncio.to_thread(snapshot.stats)
+                stats["current_database_cid"] = CURRENT_DATABASE_CID
+                stats["last_updated"] = snapshot.metadata.get("last_updated")
+                return stats
+        index = await current_index()
+        stats = index.stats()
+        stats["current_database_cid"] = index.database_cid
+        stats["last_updated"] = index.last_updated
+        return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
 @app.get("/participant/{participant_id}")
-def get_participant_info(participant_id: int):
+async def get_participant_info(participant_id: int):
     """Get specific participant information"""
     try:
-        database = fetch_database_from_ipfs(CURRENT_DATABASE_CID)
-        participant = next((p for p in database["participants"] if p["participant_id"] == participant_id), None)
-        
-        if not participant:
-            raise HTTPException(status_code=404, detail="Participant not found")
-        
-        return participant
+        participant = (await current_index()).get(participant_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get participant: {str(e)}")
+
+    if not participant:
+        raise HTTPException(status_code=404, detail="Participant not found")
+
+    return participant
+
+@app.get("/participant/aadhaar/{aadhaar}")
+async def get_participants_by_aadhaar(aadhaar: int):
+    """Get every decision recorded for an Aadhaar number"""
+    try:
+        participants = (await current_index()).find_by_aadhaar(aadhaar)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get participant: {str(e)}")
 
+    if not participants:
+        raise HTTPException(status_code=404, detail="Participant not found")
+
+    return participants
+
+@app.get("/chain/decisions")
+async def get_chain_decisions(participant_id: Optional[int] = None, from_block: Optional[int] = None,
+                              to_block: Optional[int] = None, limit: int = Query(1000, ge=1, le=10000)):
+    """Decisions anchored on-chain for a participant or in a block range, from the local log index"""
+    if participant_id is None and from_block is None and to_block is None:
+        raise HTTPException(status_code=422, detail="Pass participant_id, or from_block and/or to_block")
+    try:
+        position = await asyncio.to_thread(chain_indexer.position)
+        decisions = await asyncio.to_thread(chain_indexer.query, participant_id, from_block, to_block, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read chain index: {str(e)}")
+    return {"decisions": decisions, "indexed_to_block": position[0] if position is not None else None}
+
+@app.get("/chain/status")
+async def get_chain_index_status():
+    """How far the local chain index has synced"""
+    status = await asyncio.to_thread(chain_indexer.status)
+    status["syncing"] = chain_indexing
+    return status
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000)
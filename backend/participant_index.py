@@ -0,0 +1,126 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from columnar_db import write_columns
+from participant_table import ParticipantTable
+
+# Rows scanned per step when paging through filtered participants
+SCAN_BLOCK = 65536
+
+
+class ParticipantIndex:
+    """Participant lookups and aggregates for the participant database at one root CID
+
+    Participants live in a compact ParticipantTable; lookups by participant_id
+    are a binary search, lookups by aadhaar use a sorted permutation (plus a
+    short linear scan over rows appended since it was built), and /stats and
+    filtered listings are vectorised over the columns. Dicts are only built for
+    the rows a response returns. A full rebuild is only needed when the current
+    CID changes outside our own commits.
+    """
+
+    def __init__(self):
+        self.database_cid: Optional[str] = None
+        self.last_updated: Optional[str] = None
+        self._lock = threading.RLock()
+        self._reset(ParticipantTable())
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def rebuild(self, database_cid: str, participants: Iterable[Dict[str, Any]], last_updated: Optional[str]):
+        """Index every participant of a database from scratch"""
+        self.rebuild_from_table(database_cid, ParticipantTable.from_participants(participants), last_updated)
+
+    def rebuild_from_table(self, database_cid: str, table: ParticipantTable, last_updated: Optional[str]):
+        with self._lock:
+            self._reset(table)
+            self.database_cid = database_cid
+            self.last_updated = last_updated
+
+    def apply_commit(self, previous_cid: str, database_cid: str, participants: Iterable[Dict[str, Any]],
+                     last_updated: Optional[str]) -> bool:
+        """Fold a commit into the index; returns False if the index was not at previous_cid"""
+        with self._lock:
+            if self.database_cid != previous_cid:
+                return False
+            self._table.extend(participants)
+            self.database_cid = database_cid
+            self.last_updated = last_updated
+            return True
+
+    def get(self, participant_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            position = self._table.position_of(participant_id)
+            return self._table.row(position) if position is not None else None
+
+    def participants(self) -> List[Dict[str, Any]]:
+        """Every indexed participant in participant_id order"""
+        with self._lock:
+            return self._table.rows(self._table.id_order())
+
+    def page(self, after: int, limit: int, query) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of a ParticipantQuery's matches with participant_id > after, and the next cursor"""
+        with self._lock:
+            table = self._table
+            ids = table.column("participant_id")
+            rows = len(table)
+            if table.ids_sorted:
+                start = int(np.searchsorted(ids, after, side="right"))
+                blocks = (slice(block, min(block + SCAN_BLOCK, rows)) for block in range(start, rows, SCAN_BLOCK))
+            else:
+                order = table.id_order()
+                start = int(np.searchsorted(ids[order], after, side="right"))
+                blocks = (order[block:block + SCAN_BLOCK] for block in range(start, rows, SCAN_BLOCK))
+            selected = []
+            for block in blocks:
+                mask = query.mask(table, block)
+                matches = block.start + np.flatnonzero(mask) if isinstance(block, slice) else block[mask]
+                selected.extend(matches[:limit - len(selected)].tolist())
+                if len(selected) == limit:
+                    return table.rows(selected, query.fields), str(int(ids[selected[-1]]))
+            return table.rows(selected, query.fields), None
+
+    def find_by_aadhaar(self, aadhaar: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            column = self._table.column("aadhaar")
+            tail_start = len(self._aadhaar_order)
+            if len(column) - tail_start > max(4096, len(column) // 64):
+                self._sort_aadhaar()
+                tail_start = len(column)
+            low, high = np.searchsorted(self._aadhaar_sorted, [aadhaar, aadhaar + 1])
+            positions = np.sort(np.concatenate([
+                self._aadhaar_order[low:high], tail_start + np.flatnonzero(column[tail_start:] == aadhaar)
+            ]))
+            return self._table.rows(positions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._table.stats()
+
+    @property
+    def nbytes(self) -> int:
+        return self._table.nbytes + self._aadhaar_order.nbytes + self._aadhaar_sorted.nbytes
+
+    def save_columnar(self, path: str) -> bool:
+        """Write the indexed database as a columnar snapshot tagged with its CID; False if empty"""
+        with self._lock:
+            if self.database_cid is None:
+                return False
+            encoded = self._table.to_columns()
+            rows = len(self._table)
+            metadata = {"database_cid": self.database_cid, "total_participants": rows,
+                        "last_updated": self.last_updated}
+        write_columns(path, encoded, rows, metadata)
+        return True
+
+    def _reset(self, table: ParticipantTable):
+        self._table = table
+        self._sort_aadhaar()
+
+    def _sort_aadhaar(self):
+        column = self._table.column("aadhaar")
+        self._aadhaar_order = np.argsort(column, kind="stable")
+        self._aadhaar_sorted = column[self._aadhaar_order]
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from columnar_db import COLUMNS
+from participant_table import NO_TIMESTAMP, encode_timestamp
+
+# Fields a listing can be projected to (the participant record schema)
+PARTICIPANT_FIELDS = tuple(COLUMNS)
+MAX_PAGE_SIZE = 1000
+
+
+def parse_cursor(cursor: Optional[str]) -> int:
+    """Participant ID a page starts after; 0 (no cursor) starts at the beginning"""
+    if cursor is None or cursor == "":
+        return 0
+    try:
+        after = int(cursor)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    if after < 0:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return after
+
+
+def _date_bound(value: Optional[str], name: str, end: bool) -> Optional[str]:
+    """Normalise a date or datetime bound to the ISO-8601 form decision_date is stored in
+
+    A bare date as the upper bound covers that whole day, so it becomes the
+    (exclusive) start of the next day.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value!r} (expected an ISO-8601 date or datetime)")
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.isoformat()
+
+
+class ParticipantQuery:
+    """Server-side filters and field projection for participant listings
+
+    `mask` applies the filters to ParticipantTable columns; `matches` applies
+    them to one participant dict, where decision_date strings (ISO-8601 in one
+    timezone-naive format) are compared as strings without parsing.
+    """
+
+    def __init__(self, eligible: Optional[bool] = None, castes: Optional[Iterable[str]] = None,
+                 housing_statuses: Optional[Iterable[str]] = None, min_income: Optional[float] = None,
+                 max_income: Optional[float] = None, decided_from: Optional[str] = None,
+                 decided_to: Optional[str] = None, fields: Optional[str] = None):
+        if min_income is not None and max_income is not None and min_income > max_income:
+            raise ValueError("min_income is greater than max_income")
+        self.eligible = eligible
+        self.castes = frozenset(castes) if castes else None
+        self.housing_statuses = frozenset(housing_statuses) if housing_statuses else None
+        self.min_income = min_income
+        self.max_income = max_income
+        self.decided_from = _date_bound(decided_from, "decided_from", end=False)
+        self.decided_to = _date_bound(decided_to, "decided_to", end=True)
+        # A bare-date decided_to was moved to the next midnight, which is excluded
+        self._decided_to_inclusive = decided_to is not None and len(decided_to) != 10
+        self.fields = self._parse_fields(fields)
+
+    @staticmethod
+    def _parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        if not fields:
+            return None
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in selected if field not in PARTICIPANT_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(PARTICIPANT_FIELDS)})")
+        # participant_id is always returned so clients can page with it
+        return ("participant_id",) + tuple(dict.fromkeys(f for f in selected if f != "participant_id"))
+
+    @property
+    def filters(self) -> bool:
+        return any(value is not None for value in (
+            self.eligible, self.castes, self.housing_statuses, self.min_income,
+            self.max_income, self.decided_from, self.decided_to,
+        ))
+
+    def matches(self, participant: Dict[str, Any]) -> bool:
+        if self.eligible is not None and bool(participant.get("eligible", False)) != self.eligible:
+            return False
+        if self.castes is not None and participant.get("caste") not in self.castes:
+            return False
+        if self.housing_statuses is not None and participant.get("housing_status") not in self.housing_statuses:
+            return False
+        if self.min_income is not None or self.max_income is not None:
+            income = participant.get("income")
+            if income is None:
+                return False
+            if self.min_income is not None and income < self.min_income:
+                return False
+            if self.max_income is not None and income > self.max_income:
+                return False
+        if self.decided_from is not None or self.decided_to is not None:
+            return self._decided_in_range(participant.get("decision_date"))
+        return True
+
+    def _decided_in_range(self, decided: Optional[str]) -> bool:
+        if not decided:
+            return False
+        if self.decided_from is not None and decided < self.decided_from:
+            return False
+        if self.decided_to is not None:
+            if decided > self.decided_to or (decided == self.decided_to and not self._decided_to_inclusive):
+                return False
+        return True
+
+    def mask(self, table, rows) -> np.ndarray:
+        """`matches` vectorised over ParticipantTable rows (a slice or an array of positions)"""
+        eligible = table.column("eligible")[rows]
+        mask = np.ones(len(eligible), dtype=np.bool_)
+        if self.eligible is not None:
+            mask &= eligible == self.eligible
+        for name, allowed in (("caste", self.castes), ("housing_status", self.housing_statuses)):
+            if allowed is not None:
+                codes = [code for code in (table.code(name, value) for value in allowed) if code is not None]
+                mask &= np.isin(table.column(name)[rows], codes)
+        if self.min_income is not None:
+            mask &= table.column("income")[rows] >= self.min_income
+        if self.max_income is not None:
+            mask &= table.column("income")[rows] <= self.max_income
+        if self.decided_from is not None or self.decided_to is not None:
+            micros = table.column("decision_date")[rows]
+            in_range = micros != NO_TIMESTAMP
+            if self.decided_from is not None:
+                in_range &= micros >= encode_timestamp(self.decided_from)[0]
+            if self.decided_to is not None:
+                upper = encode_timestamp(self.decided_to)[0]
+                in_range &= micros <= upper if self._decided_to_inclusive else micros < upper
+            # Dates the table keeps verbatim compare as strings, like `matches`
+            raw_dates = table.raw_dates()
+            if raw_dates:
+                positions = np.arange(rows.start, rows.stop) if isinstance(rows, slice) else rows
+                for offset, position in enumerate(positions.tolist()):
+                    if position in raw_dates:
+                        in_range[offset] = self._decided_in_range(raw_dates[position])
+            mask &= in_range
+        return mask
+
+    def project(self, participant: Dict[str, Any]) -> Dict[str, Any]:
+        if self.fields is None:
+            return participant
+        return {field: participant.get(field) for field in self.fields}
+
+    def page(self, participants: Iterable[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Take up to `limit` matches (in participant_id order) and the cursor for the next page
+
+        next_cursor is None once `participants` is exhausted.
+        """
+        selected = []
+        for participant in participants:
+            if not self.matches(participant):
+                continue
+            selected.append(self.project(participant))
+            if len(selected) == limit:
+                return selected, str(participant["participant_id"])
+        return selected, None
@@ -0,0 +1,137 @@
+import asyncio
+import bisect
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+STORE_VERSION = "2.0"
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ParticipantStore:
+    """Sharded, append-only participant database on IPFS
+
+    A database is a small root manifest listing fixed-size, immutable chunks
+    of participants by CID, so the root CID addresses the whole Merkle DAG:
+
+        {"metadata": {...}, "chunk_size": 1000,
+         "chunks": [{"cid": "Qm...", "count": 1000, "first_participant_id": 1}, ...]}
+
+    Appending only re-uploads the tail chunk and a new root. Legacy single-file
+    databases ({"metadata": ..., "participants": [...]}) are read as-is and
+    split into chunks on their first append.
+    """
+
+    def __init__(self, fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+                 upload: Callable[[Dict[str, Any], str], Awaitable[str]], chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.fetch = fetch
+        self.upload = upload
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def is_legacy(root: Dict[str, Any]) -> bool:
+        return "chunks" not in root
+
+    def empty_root(self) -> Dict[str, Any]:
+        """Root of a database with no participants yet"""
+        metadata = {"total_participants": 0, "last_updated": datetime.now().isoformat(), "version": STORE_VERSION}
+        return {"metadata": metadata, "chunk_size": self.chunk_size, "chunks": []}
+
+    async def load_root(self, root_cid: Optional[str]) -> Dict[str, Any]:
+        """Fetch a root manifest or a legacy single-file database; no CID is an empty database"""
+        if not root_cid:
+            return self.empty_root()
+        return await self.fetch(root_cid)
+
+    def metadata(self, root: Dict[str, Any]) -> Dict[str, Any]:
+        return root["metadata"]
+
+    def total(self, root: Dict[str, Any]) -> int:
+        if self.is_legacy(root):
+            return len(root["participants"])
+        return sum(chunk["count"] for chunk in root["chunks"])
+
+    async def load_chunk(self, chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return (await self.fetch(chunk["cid"]))["participants"]
+
+    async def iter_chunks(self, root: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield participants chunk by chunk, fetching each chunk only when reached"""
+        if self.is_legacy(root):
+            yield root["participants"]
+            return
+        for chunk in root["chunks"]:
+            yield await self.load_chunk(chunk)
+
+    async def iter_participants(self, root: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        async for participants in self.iter_chunks(root):
+            for participant in participants:
+                yield participant
+
+    async def iter_participants_after(self, root: Dict[str, Any], after: int) -> AsyncIterator[Dict[str, Any]]:
+        """Yield participants with participant_id > after, skipping the chunks before it unfetched"""
+        if self.is_legacy(root):
+            for participant in root["participants"]:
+                if participant["participant_id"] > after:
+                    yield participant
+            return
+        starts = [chunk["first_participant_id"] for chunk in root["chunks"]]
+        position = max(bisect.bisect_right(starts, after) - 1, 0)
+        for chunk in root["chunks"][position:]:
+            for participant in await self.load_chunk(chunk):
+                if participant["participant_id"] > after:
+                    yield participant
+
+    async def get_participant(self, root: Dict[str, Any], participant_id: int):
+        """Look up a participant by ID, fetching only the chunk that holds it"""
+        if self.is_legacy(root):
+            return next((p for p in root["participants"] if p["participant_id"] == participant_id), None)
+        starts = [chunk["first_participant_id"] for chunk in root["chunks"]]
+        position = bisect.bisect_right(starts, participant_id) - 1
+        if position < 0:
+            return None
+        participants = await self.load_chunk(root["chunks"][position])
+        offset = participant_id - root["chunks"][position]["first_participant_id"]
+        if 0 <= offset < len(participants) and participants[offset]["participant_id"] == participant_id:
+            return participants[offset]
+        return next((p for p in participants if p["participant_id"] == participant_id), None)
+
+    async def append(self, root: Dict[str, Any], new_participants: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Append participants to a loaded root, uploading only the changed tail chunk(s) and a new root"""
+        if self.is_legacy(root):
+            chunks, tail = await self._split_legacy(root)
+        else:
+            chunks = list(root["chunks"])
+            tail = []
+            if chunks and chunks[-1]["count"] < self.chunk_size:
+                tail = list(await self.load_chunk(chunks.pop()))
+
+        pending = tail + list(new_participants)
+        chunks.extend(await asyncio.gather(*(
+            self._upload_chunk(pending[start:start + self.chunk_size], len(chunks) + offset)
+            for offset, start in enumerate(range(0, len(pending), self.chunk_size))
+        )))
+
+        metadata = dict(root["metadata"])
+        metadata["total_participants"] = sum(chunk["count"] for chunk in chunks)
+        metadata["last_updated"] = datetime.now().isoformat()
+        metadata["version"] = STORE_VERSION
+        new_root = {"metadata": metadata, "chunk_size": self.chunk_size, "chunks": chunks}
+        new_root_cid = await self.upload(new_root, f"database_root_{metadata['total_participants']}.json")
+        return new_root_cid, new_root
+
+    async def _split_legacy(self, database: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Upload the full chunks of a legacy database and return the remainder as the tail"""
+        participants = database["participants"]
+        full = len(participants) - len(participants) % self.chunk_size
+        chunks = await asyncio.gather(*(
+            self._upload_chunk(participants[start:start + self.chunk_size], start // self.chunk_size)
+            for start in range(0, full, self.chunk_size)
+        ))
+        return list(chunks), list(participants[full:])
+
+    async def _upload_chunk(self, participants: List[Dict[str, Any]], index: int) -> Dict[str, Any]:
+        cid = await self.upload({"chunk": index, "participants": participants}, f"database_chunk_{index}.json")
+        return {
+            "cid": cid,
+            "count": len(participants),
+            "first_participant_id": participants[0]["participant_id"] if participants else 0,
+        }
@@ -0,0 +1,122 @@
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack at a fixed interval into a rolling window
+
+    The event loop thread and the scoring executor both show up, so a slow
+    request's window covers its awaits as well as its CPU work. `dump` writes
+    the samples taken between two timestamps in the folded-stack format read by
+    flamegraph.pl, speedscope and inferno (one `frame;frame;frame count` line
+    per distinct stack).
+
+    Each distinct stack is folded into a string once and kept under an id; a
+    sample is a timestamp and the ids of the stacks seen at that instant. The
+    window holds at most `max_samples` samples (default: one window's worth),
+    and stacks no sample refers to any more are dropped with it.
+    """
+
+    def __init__(self, interval: float = 0.005, window: float = 120.0, max_samples: Optional[int] = None):
+        self.interval = interval
+        self.max_samples = max_samples or int(window / interval)
+        self._samples: Deque[Tuple[float, Tuple[int, ...]]] = deque()
+        self._window = window
+        # Stack key (thread name and (code, line) per frame) <-> id, folded string and live reference count
+        self._stack_ids: Dict[tuple, int] = {}
+        self._stacks: Dict[int, Tuple[tuple, str]] = {}
+        self._references: Counter = Counter()
+        self._next_id = itertools.count()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dumps = itertools.count(1)
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def stack_count(self) -> int:
+        return len(self._stacks)
+
+    @staticmethod
+    def _key(thread_name, frame) -> tuple:
+        stack = [thread_name]
+        while frame is not None:
+            stack.append((frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        return tuple(stack)
+
+    @staticmethod
+    def _fold(key: tuple) -> str:
+        frames = [f"{code.co_name} ({os.path.basename(code.co_filename)}:{line})" for code, line in reversed(key[1:])]
+        return ";".join([str(key[0]), *frames])
+
+    def _intern(self, key: tuple) -> int:
+        stack_id = self._stack_ids.get(key)
+        if stack_id is None:
+            stack_id = next(self._next_id)
+            self._stack_ids[key] = stack_id
+            self._stacks[stack_id] = (key, self._fold(key))
+        self._references[stack_id] += 1
+        return stack_id
+
+    def _release(self, stack_ids: Tuple[int, ...]):
+        for stack_id in stack_ids:
+            self._references[stack_id] -= 1
+            if not self._references[stack_id]:
+                del self._references[stack_id]
+                key, _ = self._stacks.pop(stack_id)
+                del self._stack_ids[key]
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stopping.wait(self.interval):
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            keys = [self._key(names.get(thread_id, thread_id), frame)
+                    for thread_id, frame in frames.items() if thread_id != own_id]
+            del frames
+            with self._lock:
+                self._samples.append((now, tuple(self._intern(key) for key in keys)))
+                while self._samples and (len(self._samples) > self.max_samples
+                                         or self._samples[0][0] < now - self._window):
+                    self._release(self._samples.popleft()[1])
+
+    def folded(self, started: float, finished: float) -> str:
+        """Folded stacks sampled between two time.perf_counter() timestamps"""
+        with self._lock:
+            counts = Counter(stack_id for at, stack_ids in self._samples if started <= at <= finished
+                             for stack_id in stack_ids)
+            stacks = [(self._stacks[stack_id][1], count) for stack_id, count in counts.most_common()]
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def dump(self, directory: str, label: str, started: float, finished: float) -> Optional[str]:
+        """Write the window's folded stacks to `directory` and return the file path"""
+        folded = self.folded(started, finished)
+        if not folded:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{next(self._dumps)}_{safe_label}_{(finished - started) * 1000:.0f}ms"
+        path = os.path.join(directory, f"{name}.folded")
+        with open(path, "w") as f:
+            f.write(folded)
+        return path
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anchorer import BatchAnchorer
+
+
+class FakeEth:
+    async def get_transaction_count(self, account, block):
+        return 0
+
+    async def get_transaction_receipt(self, tx_hash):
+        return {"status": 1, "blockNumber": 7}
+
+
+class FakeW3:
+    eth = FakeEth()
+
+    @staticmethod
+    def to_hex(value):
+        return "0x" + value.hex()
+
+
+class FakeContract:
+    def __init__(self):
+        self.sent = []
+        self.functions = self
+
+    def storeDecisions(self, *columns):
+        self.sent.append(columns)
+        return self
+
+    async def transact(self, tx):
+        return bytes([tx["nonce"]]) * 32
+
+
+def test_decisions_wait_for_the_connection():
+    async def run():
+        anchorer = BatchAnchorer(None, None, None, max_wait=0.01, confirm_interval=0.01)
+        anchorer.start()
+        ticket = anchorer.submit("QmDb", "QmExplanation", "Eligible", 4)
+        await asyncio.sleep(0.1)
+        assert not ticket.sent.done() and anchorer.pending == 1
+
+        contract = FakeContract()
+        anchorer.connect(FakeW3(), contract, "0x01")
+        block_number = await asyncio.wait_for(ticket.confirmed, 1)
+        await anchorer.stop()
+        return contract.sent, block_number
+
+    sent, block_number = asyncio.run(run())
+    assert sent == [(["QmDb"], ["QmExplanation"], ["Eligible"], [4])]
+    assert block_number == 7
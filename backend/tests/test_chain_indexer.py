@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chain_indexer import ChainIndexer
+
+CHECKSUMMED = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+DECISION = {"block_number": 3, "log_index": 0, "tx_hash": "0xabc", "submitter": "0x01", "participant_id": 42,
+            "record_index": 0, "database_cid": "QmDb", "explanation_cid": "QmExplanation", "decision": "Eligible"}
+
+
+def indexed(path, address):
+    indexer = ChainIndexer(path, None, None, address=address)
+    indexer._store([DECISION], 3, "0xhash")
+    indexer.close()
+
+
+def test_address_spelling_does_not_reset_the_index(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    indexed(path, CHECKSUMMED)
+
+    indexer = ChainIndexer(path, None, None, address=CHECKSUMMED.lower())
+    assert indexer.position() == (3, "0xhash")
+    assert indexer.decisions_for_participant(42)[0]["decision"] == "Eligible"
+    assert indexer.status()["contract"] == CHECKSUMMED.lower()
+
+
+def test_index_written_with_a_checksummed_address_keeps_one_position(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    indexed(path, CHECKSUMMED)
+    # As written before addresses were normalised
+    db = sqlite3.connect(path)
+    db.execute("UPDATE sync_state SET contract = ?", (CHECKSUMMED,))
+    db.commit()
+    db.close()
+
+    indexer = ChainIndexer(path, None, None, address=CHECKSUMMED)
+    indexer._store([], 5, "0xnext")
+    assert indexer._db.execute("SELECT contract, last_block FROM sync_state").fetchall() == [(CHECKSUMMED.lower(), 5)]
+
+
+def test_another_contract_resets_the_index(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    indexed(path, CHECKSUMMED)
+
+    indexer = ChainIndexer(path, None, None, address="0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512")
+    assert indexer.position() is None
+    assert indexer.decisions_for_participant(42) == []
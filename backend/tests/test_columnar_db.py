@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from columnar_db import FORMAT_VERSION, ColumnarDatabase, export_json, from_json, write_columnar
+
+METADATA = {"total_participants": 4, "last_updated": "2025-01-01T00:00:00", "version": "1.0"}
+
+
+def participants():
+    return [
+        # As the backend writes a decision today
+        {"participant_id": 1, "aadhaar": 123456789012, "name": "Ramesh Kumar", "age": 45, "caste": "OBC",
+         "income": 45000, "land_ownership": True, "housing_status": "kutcha", "eligible": True,
+         "decision_date": "2025-01-01T10:00:00", "explanation_cid": "QmExplanation", "confidence": 0.8731,
+         "model_version": "v2"},
+        # Unicode names, a float income and fields left as None
+        {"participant_id": 2, "aadhaar": 234567890123, "name": "सीता देवी", "age": 61, "caste": None,
+         "income": 12500.5, "land_ownership": False, "housing_status": "pucca", "eligible": False,
+         "decision_date": "2025-01-02T11:30:00", "explanation_cid": None, "confidence": None,
+         "model_version": None},
+        # Recorded before confidence and model_version existed
+        {"participant_id": 3, "aadhaar": 345678901234, "name": "Zoë 😀 Ñúñez", "age": 33, "caste": "SC",
+         "income": 0, "land_ownership": False, "housing_status": "semi-pucca", "eligible": True,
+         "decision_date": "2025-01-03T09:15:00", "explanation_cid": "QmOther"},
+        {"participant_id": 4, "aadhaar": 456789012345, "name": "", "age": 18, "caste": "OBC",
+         "income": 150000.0, "land_ownership": True, "housing_status": "kutcha", "eligible": False,
+         "decision_date": "2025-01-04T16:45:00", "explanation_cid": None, "confidence": 1.0,
+         "model_version": "v1"},
+    ]
+
+
+def test_write_then_read_returns_the_same_records(tmp_path):
+    path = str(tmp_path / "db")
+    manifest = write_columnar(path, participants(), METADATA)
+    db = ColumnarDatabase(path)
+
+    assert manifest["version"] == FORMAT_VERSION == 2
+    assert len(db) == 4
+    assert db.metadata == METADATA
+    restored = list(db.iter_participants(batch_size=3))
+    assert restored == participants()
+    assert [list(record) for record in restored] == [list(record) for record in participants()]
+    assert type(restored[0]["income"]) is int and type(restored[1]["income"]) is float
+
+
+def test_slices_and_decoded_columns(tmp_path):
+    path = str(tmp_path / "db")
+    write_columnar(path, participants(), METADATA)
+    db = ColumnarDatabase(path)
+
+    assert list(db.iter_participants(start=1, stop=3)) == participants()[1:3]
+    assert db.decoded("caste").tolist() == ["OBC", None, "SC", "OBC"]
+    assert db.decoded("name").tolist() == ["Ramesh Kumar", "सीता देवी", "Zoë 😀 Ñúñez", ""]
+    assert np.isnan(db.column("confidence")[1])
+
+
+def test_json_export_and_import_round_trip(tmp_path):
+    path = str(tmp_path / "db")
+    write_columnar(path, participants(), METADATA)
+    exported = str(tmp_path / "db.json")
+    export_json(ColumnarDatabase(path), exported)
+
+    with open(exported, encoding="utf-8") as f:
+        assert json.load(f) == {"metadata": METADATA, "participants": participants()}
+    from_json(exported, str(tmp_path / "again"))
+    assert list(ColumnarDatabase(str(tmp_path / "again")).iter_participants()) == participants()
+
+
+def test_stats_count_by_category(tmp_path):
+    path = str(tmp_path / "db")
+    write_columnar(path, participants(), METADATA)
+    stats = ColumnarDatabase(path).stats()
+
+    assert stats["total_participants"] == 4
+    assert stats["eligible_count"] == 2
+    assert stats["by_housing_status"]["kutcha"] == {"total": 2, "eligible": 1}
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from commit_coordinator import CommitCoordinator
+
+
+class SlowStore:
+    """Appends participants to a root, one upload at a time; `fail` makes the next commit raise"""
+
+    def __init__(self):
+        self.total = 0
+        self.groups = []
+        self.fail = None
+        self.uploading = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def commit(self, participants):
+        self.groups.append([participant["name"] for participant in participants])
+        self.uploading.set()
+        await self.release.wait()
+        self.release.clear()
+        if self.fail is not None:
+            error, self.fail = self.fail, None
+            raise error
+        self.total += len(participants)
+        return f"Qm{len(self.groups)}", {"metadata": {"total_participants": self.total}}
+
+
+def named(*names):
+    return [{"name": name} for name in names]
+
+
+def test_writers_queued_during_an_upload_share_the_next_commit():
+    async def run():
+        store = SlowStore()
+        coordinator = CommitCoordinator(store.commit)
+        coordinator.start()
+        first = asyncio.create_task(coordinator.submit(named("a")))
+        await store.uploading.wait()
+        store.uploading.clear()
+        # Arrive while the first upload is in flight
+        waiting = [asyncio.create_task(coordinator.submit(named(name))) for name in ("b", "c", "d")]
+        await asyncio.sleep(0)
+        store.release.set()
+        await store.uploading.wait()
+        store.release.set()
+        outcomes = await asyncio.gather(first, *waiting)
+        await coordinator.stop()
+        return store, coordinator, outcomes
+
+    store, coordinator, outcomes = asyncio.run(run())
+    assert store.groups == [["a"], ["b", "c", "d"]]
+    assert coordinator.groups_committed == 2
+    assert outcomes[0][0] == "Qm1"
+    assert [cid for cid, _ in outcomes[1:]] == ["Qm2", "Qm2", "Qm2"]
+    assert outcomes[1][1]["metadata"]["total_participants"] == 4
+
+
+def test_groups_are_capped_at_max_group_without_splitting_a_submission():
+    async def run():
+        store = SlowStore()
+        coordinator = CommitCoordinator(store.commit, max_group=3)
+        submissions = [asyncio.create_task(coordinator.submit(named(*names)))
+                       for names in (["a", "b"], ["c"], ["d", "e"], ["f"])]
+        await asyncio.sleep(0)
+        coordinator.start()
+        for _ in range(2):
+            await store.uploading.wait()
+            store.uploading.clear()
+            store.release.set()
+        await asyncio.gather(*submissions)
+        await coordinator.stop()
+        return store
+
+    assert asyncio.run(run()).groups == [["a", "b", "c"], ["d", "e", "f"]]
+
+
+def test_a_failed_commit_fails_every_writer_in_its_group_only():
+    async def run():
+        store = SlowStore()
+        coordinator = CommitCoordinator(store.commit)
+        store.fail = ConnectionError("pin failed")
+        failing = [asyncio.create_task(coordinator.submit(named(name))) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        coordinator.start()
+        await store.uploading.wait()
+        store.uploading.clear()
+        store.release.set()
+        outcomes = await asyncio.gather(*failing, return_exceptions=True)
+
+        # The committer keeps going after a failure
+        later = asyncio.create_task(coordinator.submit(named("c")))
+        await store.uploading.wait()
+        store.release.set()
+        cid, root = await later
+        await coordinator.stop()
+        return outcomes, cid, root
+
+    outcomes, cid, root = asyncio.run(run())
+    assert all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+    assert cid == "Qm2"
+    assert root["metadata"]["total_participants"] == 1
+
+
+def test_stop_drains_queued_submissions():
+    async def run():
+        store = SlowStore()
+        store.release.set()
+        coordinator = CommitCoordinator(store.commit)
+        coordinator.start()
+        submission = asyncio.create_task(coordinator.submit(named("a")))
+        await asyncio.sleep(0)
+        await coordinator.stop()
+        return await submission
+
+    cid, _ = asyncio.run(run())
+    assert cid == "Qm1"
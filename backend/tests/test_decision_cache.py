@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decision_cache import DecisionCache, idempotency_key
+
+FEATURES = {"age": 45, "caste": "OBC", "income": 45000, "land_ownership": True, "housing_status": "kutcha"}
+
+
+class Decider:
+    """Counts how often a decision is actually computed"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"eligible": True, "confidence": 0.87, "job_id": f"job-{self.calls}"}
+
+
+def test_key_depends_on_inputs_and_model_version():
+    key = idempotency_key(123456789012, FEATURES, "v2")
+
+    assert key == idempotency_key(123456789012, dict(reversed(list(FEATURES.items()))), "v2")
+    assert key != idempotency_key(123456789012, dict(FEATURES, income=45001), "v2")
+    assert key != idempotency_key(123456789012, FEATURES, "v3")
+    assert key != idempotency_key(123456789013, FEATURES, "v2")
+
+
+def test_resubmitted_request_replays_the_first_response(tmp_path):
+    key = idempotency_key(123456789012, FEATURES, "v2")
+    decide = Decider()
+
+    async def run():
+        cache = DecisionCache(str(tmp_path / "decisions.sqlite3"))
+        first = await cache.get_or_compute(key, decide)
+        await cache.update(key, {"explanation_cid": "QmExplanation"})
+        again = await cache.get_or_compute(key, decide)
+        return cache, first, again
+
+    cache, (first, first_replayed), (again, replayed) = asyncio.run(run())
+    assert decide.calls == 1
+    assert not first_replayed and replayed
+    assert again == dict(first, explanation_cid="QmExplanation")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_concurrent_duplicates_share_one_computation(tmp_path):
+    key = idempotency_key(123456789012, FEATURES, "v2")
+    decide = Decider()
+
+    async def run():
+        cache = DecisionCache(str(tmp_path / "decisions.sqlite3"))
+        return cache, await asyncio.gather(*(cache.get_or_compute(key, decide) for _ in range(5)))
+
+    cache, outcomes = asyncio.run(run())
+    assert decide.calls == 1
+    assert all(response["job_id"] == "job-1" for response, _ in outcomes)
+    assert sorted(replayed for _, replayed in outcomes) == [False, True, True, True, True]
+    assert cache.joined == 4
+
+
+def test_replays_survive_a_restart(tmp_path):
+    key = idempotency_key(123456789012, FEATURES, "v2")
+    path = str(tmp_path / "decisions.sqlite3")
+    decide = Decider()
+
+    asyncio.run(DecisionCache(path).get_or_compute(key, decide))
+    response, replayed = asyncio.run(DecisionCache(path).get_or_compute(key, decide))
+
+    assert replayed and decide.calls == 1
+    assert response["job_id"] == "job-1"
+
+
+def test_invalid_or_expired_entries_are_recomputed(tmp_path):
+    key = idempotency_key(123456789012, FEATURES, "v2")
+    decide = Decider()
+
+    async def reject(response):
+        return False
+
+    async def run():
+        cache = DecisionCache(str(tmp_path / "decisions.sqlite3"), ttl=0.05)
+        await cache.get_or_compute(key, decide)
+        vetoed = await cache.get_or_compute(key, decide, valid=reject)
+        await asyncio.sleep(0.1)
+        expired = await cache.get_or_compute(key, decide)
+        return vetoed, expired
+
+    (vetoed, vetoed_replayed), (expired, expired_replayed) = asyncio.run(run())
+    assert not vetoed_replayed and vetoed["job_id"] == "job-2"
+    assert not expired_replayed and expired["job_id"] == "job-3"
+
+
+def test_failed_computations_are_not_cached(tmp_path):
+    key = idempotency_key(123456789012, FEATURES, "v2")
+    decide = Decider()
+
+    async def fail():
+        raise RuntimeError("scoring failed")
+
+    async def run():
+        cache = DecisionCache(str(tmp_path / "decisions.sqlite3"))
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute(key, fail)
+        return await cache.get_or_compute(key, decide)
+
+    response, replayed = asyncio.run(run())
+    assert not replayed and response["job_id"] == "job-1"
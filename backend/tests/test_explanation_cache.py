@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from explanation_cache import ExplanationCache
+
+TEXT = "आवेदक पात्र है — income below ₹50,000 and no land"
+
+
+def test_snapshot_is_utf8_and_reloads(tmp_path):
+    path = str(tmp_path / "explanations.json")
+    cache = ExplanationCache(path)
+    cache.put("signature", TEXT, "gemini")
+    cache.save()
+
+    with open(path, "rb") as f:
+        snapshot = json.loads(f.read().decode("utf-8"))
+    assert snapshot[0][1]["text"] == TEXT
+    assert ExplanationCache(path).get("signature") == (TEXT, "gemini")
+
+
+def test_unreadable_snapshot_is_ignored(tmp_path):
+    path = tmp_path / "explanations.json"
+    path.write_bytes(b"{not json")
+
+    assert ExplanationCache(str(path)).get("signature") is None
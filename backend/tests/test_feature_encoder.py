@@ -0,0 +1,73 @@
+import itertools
+import os
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from feature_encoder import FEATURES, FeatureEncoder, UnknownCategoryError
+
+
+@pytest.fixture(scope="module")
+def encoders():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(os.path.join(REPO_ROOT, "label_encoders.pkl"))
+
+
+def pandas_encode(encoders, applicants):
+    """The pandas path predict.py and predict_eligibility.py used before FeatureEncoder"""
+    df = pd.DataFrame(applicants)
+    df["land_ownership"] = df["land_ownership"].astype(int)
+    for col in ["caste", "housing_status"]:
+        df[col] = encoders[col].transform(df[col])
+    return df[FEATURES].to_numpy(dtype=float)
+
+
+def applicants(encoders):
+    return [
+        {"age": age, "caste": caste, "income": income, "land_ownership": land, "housing_status": housing}
+        for (age, income), caste, housing, land in itertools.product(
+            [(18, 0), (45, 45000), (80, 149999.5)], encoders["caste"].classes_,
+            encoders["housing_status"].classes_, [False, True])
+    ]
+
+
+def test_matches_the_pandas_encoding_for_every_category(encoders):
+    encoder = FeatureEncoder.from_label_encoders(encoders)
+    rows = applicants(encoders)
+    expected = pandas_encode(encoders, rows)
+
+    assert np.array_equal(encoder.encode_many(rows), expected)
+    assert np.array_equal(np.vstack([encoder.encode(row) for row in rows]), expected)
+    columns = {name: [row[name] for row in rows] for name in FEATURES}
+    assert np.array_equal(encoder.encode_columns(columns), expected)
+
+
+@pytest.mark.parametrize("feature, value", [("caste", "Brahmin"), ("caste", "obc"), ("housing_status", "")])
+def test_rejects_unseen_categories_like_the_label_encoders(encoders, feature, value):
+    encoder = FeatureEncoder.from_label_encoders(encoders)
+    row = dict(applicants(encoders)[0], **{feature: value})
+
+    with pytest.raises(ValueError):
+        pandas_encode(encoders, [row])
+    with pytest.raises(UnknownCategoryError) as raised:
+        encoder.encode(row)
+    assert raised.value.feature == feature and raised.value.value == value
+    assert raised.value.allowed == list(encoders[feature].classes_)
+    with pytest.raises(UnknownCategoryError):
+        encoder.encode_columns({name: [row[name]] for name in FEATURES})
+
+
+def test_schema_categories_encode_like_the_label_encoders(encoders):
+    schema = {"features": FEATURES,
+              "categories": {name: list(encoders[name].classes_) for name in ("caste", "housing_status")}}
+    rows = applicants(encoders)
+
+    assert np.array_equal(FeatureEncoder.from_schema(schema).encode_many(rows), pandas_encode(encoders, rows))
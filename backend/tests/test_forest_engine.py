@@ -0,0 +1,64 @@
+import os
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from forest_engine import CompiledForest, check_parity
+
+
+@pytest.fixture(scope="module")
+def model():
+    with warnings.catch_warnings():
+        # The saved model may predate the installed sklearn
+        warnings.simplefilter("ignore")
+        return joblib.load(os.path.join(REPO_ROOT, "eligibility_model.pkl"))
+
+
+def sample(n, seed=42):
+    """Random applicants over the whole encoded input space"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(18, 81, n),
+        rng.integers(0, 6, n),
+        rng.uniform(0, 150000, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, 3, n),
+    ]).astype(np.float64)
+
+
+def test_matches_sklearn_on_a_seeded_sample(model):
+    X = sample(20000)
+    check_parity(model, X)
+    check_parity(model, X, n_jobs=4)
+
+
+def test_matches_sklearn_on_and_around_every_threshold(model):
+    # sklearn compares float32(x) <= threshold, so values a float32 step either side of a split land apart
+    forest = CompiledForest.from_sklearn(model)
+    base = sample(1, seed=0)[0]
+    rows = []
+    for index in range(forest.n_features):
+        for threshold in forest.threshold[(forest.feature == index) & np.isfinite(forest.threshold)]:
+            for value in (threshold, np.nextafter(threshold, -np.inf),
+                          np.nextafter(np.float32(threshold), np.float32(np.inf))):
+                row = base.copy()
+                row[index] = value
+                rows.append(row)
+    X = np.vstack(rows)
+
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(forest.predict(X), model.predict(X))
+
+
+def test_round_trips_through_arrays(model):
+    forest = CompiledForest.from_sklearn(model)
+    X = sample(500, seed=1)
+    restored = CompiledForest.from_arrays(forest.to_arrays())
+
+    assert np.array_equal(restored.predict_proba(X), model.predict_proba(X))
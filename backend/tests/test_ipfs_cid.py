@@ -0,0 +1,80 @@
+import asyncio
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ipfs_cid import CHUNK_SIZE, base58, cid_v0
+from ipfs_client import LocalPinBackend
+
+
+def varint(value):
+    out = b""
+    while value >= 0x80:
+        out += bytes([value & 0x7F | 0x80])
+        value >>= 7
+    return out + bytes([value])
+
+
+def field(number, data):
+    return varint(number << 3 | 2) + varint(len(data)) + data
+
+
+def leaf(chunk):
+    """dag-pb node of one chunk, written out by hand: Data = UnixFS {Type: File, Data, filesize}"""
+    return field(1, b"\x08\x02" + field(2, chunk) + b"\x18" + varint(len(chunk)))
+
+
+def multihash(node):
+    return b"\x12\x20" + hashlib.sha256(node).digest()
+
+
+@pytest.mark.parametrize("data, cid", [
+    (b"", "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH"),
+    (b"hello world\n", "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"),
+])
+def test_matches_ipfs_add(data, cid):
+    assert cid_v0(data) == cid
+
+
+def test_single_chunk_is_one_leaf():
+    data = os.urandom(CHUNK_SIZE)
+    assert cid_v0(data) == base58(multihash(leaf(data)))
+
+
+def test_larger_files_get_a_balanced_parent_node():
+    data = os.urandom(2 * CHUNK_SIZE + 1000)
+    chunks = [data[:CHUNK_SIZE], data[CHUNK_SIZE:2 * CHUNK_SIZE], data[2 * CHUNK_SIZE:]]
+    leaves = [leaf(chunk) for chunk in chunks]
+    # Links (Hash, empty Name, Tsize) come before Data, which lists each child's file size
+    links = b"".join(
+        field(2, field(1, multihash(node)) + field(2, b"") + b"\x18" + varint(len(node)))
+        for node in leaves
+    )
+    unixfs = b"\x08\x02\x18" + varint(len(data)) + b"".join(b"\x20" + varint(len(chunk)) for chunk in chunks)
+    root = links + field(1, unixfs)
+
+    assert cid_v0(data) == base58(multihash(root))
+    assert cid_v0(data) != cid_v0(data[:-1])
+
+
+def test_local_backend_stores_documents_under_their_cid(tmp_path):
+    backend = LocalPinBackend(str(tmp_path))
+    document = {"name": "Ramesh Kumar", "income": 45000, "notes": "x" * (CHUNK_SIZE * 2)}
+    cid, payload = backend.encode(document)
+    assert len(payload) > 2 * CHUNK_SIZE
+
+    assert asyncio.run(backend.pin_encoded(cid, payload, "document.json")) == cid
+    assert os.listdir(tmp_path) == [cid]
+    assert cid_v0((tmp_path / cid).read_bytes()) == cid
+    assert asyncio.run(backend.get_json(cid)) == document
+
+
+def test_local_backend_rejects_names_that_are_not_cids(tmp_path):
+    backend = LocalPinBackend(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        asyncio.run(backend.get("../jobs.sqlite3"))
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from participant_store import ParticipantStore
+
+
+class MemoryIPFS:
+    """Documents by CID; CIDs listed in `unreachable` fail to fetch"""
+
+    def __init__(self):
+        self.documents = {}
+        self.unreachable = set()
+
+    async def fetch(self, cid):
+        if cid in self.unreachable or cid not in self.documents:
+            raise ConnectionError(f"gateway timed out fetching {cid}")
+        return self.documents[cid]
+
+    async def upload(self, data, filename):
+        cid = f"Qm{len(self.documents)}"
+        self.documents[cid] = data
+        return cid
+
+
+def participants(first_id, count):
+    return [{"participant_id": first_id + offset, "name": f"P{first_id + offset}"} for offset in range(count)]
+
+
+async def commit(store, root_cid, new_participants):
+    """What the backend's group commit does: load the root, then append"""
+    root = await store.load_root(root_cid)
+    first_id = store.total(root) + 1
+    for offset, participant in enumerate(new_participants):
+        participant["participant_id"] = first_id + offset
+    return await store.append(root, new_participants)
+
+
+def test_append_continues_a_reachable_database():
+    ipfs = MemoryIPFS()
+    store = ParticipantStore(ipfs.fetch, ipfs.upload, chunk_size=2)
+    root_cid, _ = asyncio.run(store.append(store.empty_root(), participants(1, 3)))
+    root_cid, root = asyncio.run(commit(store, root_cid, participants(0, 2)))
+
+    assert store.total(root) == 5
+    assert [chunk["first_participant_id"] for chunk in root["chunks"]] == [1, 3, 5]
+
+    async def collect():
+        return [participant["participant_id"] async for participant in store.iter_participants(root)]
+
+    assert asyncio.run(collect()) == [1, 2, 3, 4, 5]
+
+
+def test_unreachable_root_fails_strict_loads():
+    ipfs = MemoryIPFS()
+    store = ParticipantStore(ipfs.fetch, ipfs.upload)
+    ipfs.unreachable.add("QmGone")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(store.load_root("QmGone"))
+
+
+def test_commit_to_an_unreachable_root_fails_instead_of_forking():
+    ipfs = MemoryIPFS()
+    store = ParticipantStore(ipfs.fetch, ipfs.upload, chunk_size=2)
+    old_cid, _ = asyncio.run(store.append(store.empty_root(), participants(1, 3)))
+    ipfs.unreachable.add(old_cid)
+    uploaded = len(ipfs.documents)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(commit(store, old_cid, participants(0, 1)))
+    assert len(ipfs.documents) == uploaded
+
+    ipfs.unreachable.clear()
+    _, root = asyncio.run(commit(store, old_cid, participants(0, 1)))
+    assert root["metadata"]["total_participants"] == 4
+
+
+def test_commit_without_a_root_starts_a_new_database():
+    ipfs = MemoryIPFS()
+    store = ParticipantStore(ipfs.fetch, ipfs.upload, chunk_size=2)
+
+    new_cid, root = asyncio.run(commit(store, "", participants(0, 1)))
+
+    assert root["metadata"]["total_participants"] == 1
+    assert root["chunks"] == [{"cid": root["chunks"][0]["cid"], "count": 1, "first_participant_id": 1}]
+    assert asyncio.run(store.load_root(new_cid)) == root
@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from columnar_db import ColumnarDatabase, write_columnar, write_columns
+from participant_table import ParticipantTable, StringArena
+
+
+def participants():
+    return [
+        # A record as the backend writes it today
+        {"participant_id": 1, "aadhaar": 123456789012, "name": "Ramesh Kumar", "age": 45, "caste": "OBC",
+         "income": 35384, "land_ownership": True, "housing_status": "kutcha", "eligible": True,
+         "decision_date": "2025-01-01T10:00:00.123456", "explanation_cid": "QmExplanation", "confidence": 0.8731,
+         "model_version": "v2"},
+        # Older records had neither confidence nor model_version
+        {"participant_id": 2, "aadhaar": 234567890123, "name": "सीता देवी", "age": 61, "caste": "SC",
+         "income": 12500.5, "land_ownership": False, "housing_status": "pucca", "eligible": False,
+         "decision_date": "2025-01-02T11:30:00", "explanation_cid": None},
+        # Dates outside the naive isoformat() form are kept verbatim
+        {"participant_id": 3, "aadhaar": 345678901234, "name": "Zoë 😀", "age": 33, "caste": "ST",
+         "income": 0, "land_ownership": False, "housing_status": "semi-pucca", "eligible": True,
+         "decision_date": "2025-01-03T09:15:00+05:30", "explanation_cid": "QmOther", "confidence": None,
+         "model_version": None},
+        {"participant_id": 4, "aadhaar": 456789012345, "name": "", "age": 18, "caste": "OBC",
+         "income": 150000.0, "land_ownership": True, "housing_status": "kutcha", "eligible": False,
+         "decision_date": "03/01/2025", "explanation_cid": None, "confidence": 1.0, "model_version": "v1"},
+    ]
+
+
+def assert_same_records(actual, expected):
+    assert actual == expected
+    # Same keys in the same order, and integer incomes stay integers
+    assert [list(record) for record in actual] == [list(record) for record in expected]
+    assert [type(record["income"]) for record in actual] == [type(record["income"]) for record in expected]
+
+
+def test_rows_round_trip_exactly():
+    table = ParticipantTable.from_participants(participants())
+
+    assert len(table) == 4
+    assert_same_records(table.rows(range(4)), participants())
+    assert table.row(2) == participants()[2]
+
+
+def test_projected_rows_fill_unrecorded_fields_with_none():
+    table = ParticipantTable.from_participants(participants())
+
+    assert table.rows([0, 1], fields=["participant_id", "confidence", "model_version"]) == [
+        {"participant_id": 1, "confidence": 0.8731, "model_version": "v2"},
+        {"participant_id": 2, "confidence": None, "model_version": None},
+    ]
+
+
+def test_snapshot_round_trip_exactly(tmp_path):
+    path = str(tmp_path / "snapshot")
+    table = ParticipantTable.from_participants(participants())
+    write_columns(path, table.to_columns(), len(table), {"total_participants": 4})
+
+    db = ColumnarDatabase(path)
+    assert_same_records(list(db.iter_participants()), participants())
+    restored = ParticipantTable.from_columnar(db)
+    assert_same_records(restored.rows(range(len(restored))), participants())
+    assert restored.stats() == table.stats()
+
+
+def test_loads_snapshots_written_from_dicts(tmp_path):
+    path = str(tmp_path / "db")
+    write_columnar(path, participants(), {"total_participants": 4})
+
+    table = ParticipantTable.from_columnar(ColumnarDatabase(path))
+    assert_same_records(table.rows(range(len(table))), participants())
+    table.append(dict(participants()[0], participant_id=5))
+    assert table.position_of(5) == 4 and table.ids_sorted
+
+
+def test_lookups_by_participant_id():
+    records = participants()
+    records[1]["participant_id"], records[2]["participant_id"] = 7, 3
+    table = ParticipantTable.from_participants(records)
+
+    assert not table.ids_sorted
+    assert table.position_of(7) == 1
+    assert table.position_of(2) is None
+    assert np.array_equal(table.column("participant_id")[table.id_order()], [1, 3, 4, 7])
+
+
+def test_string_arena_to_array_matches_the_strings():
+    values = ["Ramesh Kumar", "", None, "सीता देवी", "Zoë 😀", "QmExplanation"]
+    arena = StringArena(nullable=True)
+    for value in values:
+        arena.append(value)
+
+    for stop in range(len(values) + 1):
+        expected = np.array([value or "" for value in values[:stop]], dtype=str)
+        actual = arena.to_array(stop)
+        assert actual.dtype == expected.dtype and np.array_equal(actual, expected)
+    arena.append("after")
+    assert arena.to_array()[-1] == "after"
@@ -0,0 +1,60 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Histogram
+from profiler import SamplingProfiler
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def profile(seconds, **options):
+    profiler = SamplingProfiler(interval=0.001, **options)
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler.start()
+    started = time.perf_counter()
+    time.sleep(seconds)
+    finished = time.perf_counter()
+    profiler.stop()
+    stop.set()
+    worker.join()
+    return profiler, started, finished
+
+
+def test_folded_stacks_name_the_thread_and_frames():
+    profiler, started, finished = profile(0.2)
+    lines = profiler.folded(started, finished).splitlines()
+
+    assert any(line.startswith("busy-worker;") and "busy (test_profiler.py:" in line for line in lines)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+
+def test_window_is_capped_and_keeps_only_referenced_stacks():
+    profiler, _, _ = profile(0.3, max_samples=20)
+
+    assert len(profiler._samples) <= 20
+    assert profiler.stack_count == len({stack_id for _, stack_ids in profiler._samples for stack_id in stack_ids})
+    assert profiler.stack_count < 20 * threading.active_count()
+
+
+def test_histogram_time_observes_the_block_even_when_it_raises():
+    histogram = Histogram("stage_seconds", "Stage latency", ["stage"])
+    with histogram.time(stage="ok"):
+        time.sleep(0.01)
+    try:
+        with histogram.time(stage="failed"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    samples = "\n".join(histogram.samples())
+    assert 'stage_seconds_count{stage="ok"} 1' in samples
+    assert 'stage_seconds_count{stage="failed"} 1' in samples
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from forest_engine import CompiledForest
+from shap_explainer import FEATURES, EligibilityExplainer
+from shap_table import ShapTable
+
+CATEGORIES = {"caste": ["General", "OBC", "SC", "ST"], "housing_status": ["kutcha", "pucca", "semi-pucca"]}
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    """A small seeded forest (the saved one takes ~30 s to tabulate), its table and a raw TreeExplainer"""
+    import shap
+    from sklearn.ensemble import RandomForestClassifier
+
+    X = applicants(2000, seed=0)
+    y = (X[:, 2] < 60000) & (X[:, 3] == 0) | (X[:, 1] >= 2)
+    model = RandomForestClassifier(n_estimators=8, max_depth=5, random_state=0).fit(X, y)
+    forest = CompiledForest.from_sklearn(model)
+    table = ShapTable.build(forest, EligibilityExplainer(model), CATEGORIES, FEATURES)
+    return model, forest, table, shap.TreeExplainer(model)
+
+
+def applicants(n, seed):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(18, 81, n),
+        rng.integers(0, len(CATEGORIES["caste"]), n),
+        rng.uniform(0, 150000, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, len(CATEGORIES["housing_status"]), n),
+    ]).astype(np.float64)
+
+
+def live_shap(explainer, X):
+    """SHAP values for the eligible class straight from shap.TreeExplainer"""
+    values = np.asarray(explainer.shap_values(X, check_additivity=False))
+    return values[:, :, 1] if values.ndim == 3 else values
+
+
+def assert_matches_live(fitted, X):
+    model, forest, table, explainer = fitted
+    proba, shap_values, found = table.lookup(X)
+    assert found.all()
+    assert np.array_equal(proba, model.predict_proba(X))
+    assert np.array_equal(proba, forest.predict_proba(X))
+    assert np.allclose(shap_values, live_shap(explainer, X))
+
+
+def test_matches_tree_explainer_on_random_applicants(fitted):
+    assert_matches_live(fitted, applicants(3000, seed=1))
+
+
+def test_matches_tree_explainer_at_bin_edges(fitted):
+    _, _, table, _ = fitted
+    base = applicants(1, seed=2)[0]
+    rows = []
+    for index, name in enumerate(FEATURES):
+        edges = table.edges[index]
+        if name in CATEGORIES or not len(edges):
+            continue
+        # Exactly on every threshold, below the first bin and above the last
+        for value in [*edges, edges[0] - 1000.0, edges[0] - 0.5, edges[-1] + 0.5, edges[-1] + 1e6]:
+            row = base.copy()
+            row[index] = value
+            rows.append(row)
+    assert len(rows) > 4
+    assert_matches_live(fitted, np.vstack(rows))
+
+
+def test_every_category_code_is_covered(fitted):
+    rows = [[40, caste, 50000, 0, housing]
+            for caste in range(len(CATEGORIES["caste"])) for housing in range(len(CATEGORIES["housing_status"]))]
+    assert_matches_live(fitted, np.array(rows, dtype=np.float64))
+
+
+def test_rows_outside_the_table_are_not_found(fitted):
+    _, _, table, _ = fitted
+    X = applicants(3, seed=3)
+    X[0, 2] = np.nan
+    _, _, found = table.lookup(X)
+    assert found.tolist() == [False, True, True]
+
+
+def test_round_trips_through_arrays(fitted):
+    model, forest, table, _ = fitted
+    restored = ShapTable.from_arrays(table.to_arrays())
+    X = applicants(200, seed=4)
+
+    assert restored.matches(forest)
+    assert np.array_equal(restored.lookup(X)[0], table.lookup(X)[0])
+    assert np.array_equal(restored.lookup(X)[1], table.lookup(X)[1])
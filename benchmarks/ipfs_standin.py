@@ -0,0 +1,110 @@
+"""Local stand-in for the Pinata pinning API and IPFS gateway
+
+Implements just what the backend uses:
+
+    POST /pinning/pinFileToIPFS   multipart upload of one file -> {"IpfsHash": ...}
+    GET  /ipfs/<cid>              the pinned bytes
+
+Documents are kept in memory under the CIDv0 `ipfs add` would give their
+bytes (see backend/ipfs_cid.py), the same CIDs Pinata returns and the backend
+precomputes.
+
+    python benchmarks/ipfs_standin.py --port 5001 [--latency-ms 20]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+from ipfs_cid import cid_v0  # noqa: E402
+
+
+def multipart_file(body: bytes, content_type: str) -> bytes:
+    """Contents of the first file part of a multipart/form-data body"""
+    boundary = content_type.split("boundary=", 1)[1].strip('"').encode()
+    for part in body.split(b"--" + boundary)[1:]:
+        headers, _, content = part.partition(b"\r\n\r\n")
+        if b"filename=" in headers:
+            return content[:-2] if content.endswith(b"\r\n") else content
+    raise ValueError("No file part in upload")
+
+
+class IPFSStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0):
+        super().__init__(address, StandInHandler)
+        self.latency = latency
+        self.documents = {}
+        self.lock = threading.Lock()
+        self.pins = 0
+        self.reads = 0
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.path == "/stats":
+            with self.server.lock:
+                stats = {"documents": len(self.server.documents), "pins": self.server.pins, "reads": self.server.reads}
+            return self._reply(200, json.dumps(stats).encode())
+        cid = self.path.rstrip("/").rsplit("/", 1)[-1]
+        with self.server.lock:
+            data = self.server.documents.get(cid)
+            self.server.reads += 1
+        if data is None:
+            return self._reply(404, b'{"error": "not found"}')
+        self._reply(200, data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if not self.path.startswith("/pinning/pinFileToIPFS"):
+            return self._reply(404, b'{"error": "not found"}')
+        try:
+            data = multipart_file(body, self.headers.get("Content-Type", ""))
+        except (IndexError, ValueError) as e:
+            return self._reply(400, json.dumps({"error": str(e)}).encode())
+        cid = cid_v0(data)
+        with self.server.lock:
+            self.server.documents[cid] = data
+            self.server.pins += 1
+        self._reply(200, json.dumps({
+            "IpfsHash": cid,
+            "PinSize": len(data),
+            "Timestamp": datetime.now(timezone.utc).isoformat(),
+        }).encode())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-memory Pinata / IPFS gateway stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every request")
+    args = parser.parse_args()
+
+    server = IPFSStandIn((args.host, args.port), latency=args.latency_ms / 1000)
+    print(f"IPFS stand-in listening on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
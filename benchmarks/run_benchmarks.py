@@ -0,0 +1,500 @@
+"""End-to-end benchmark suite for the decision pipeline
+
+Starts every dependency locally, so runs are reproducible and comparable
+between commits:
+
+    IPFS / Pinata  benchmarks/ipfs_standin.py (in-memory HTTP stand-in)
+    Gemini         GeminiStub via benchmarks/serve_backend.py (fixed latency)
+    Chain          a local anvil or Hardhat node with PMKisanRegistry deployed
+
+For each database size (default 100, 10k and 1M participants) a fresh
+stand-in is seeded with a sharded database of that size, the backend is
+started against it and these stages are timed:
+
+    startup            process start until the API answers
+    stats_cold         first /stats (index built from the IPFS chunks)
+    stats              /stats, sequential
+    participant        /participant/{id} for random IDs, sequential
+    predict            /predict, sequential
+    predict_concurrent /predict from --concurrency clients
+    decision_pipeline  server-side job time of every /predict above
+                       (explanation upload, anchoring, database commit)
+
+Latency percentiles (p50/p95/p99), throughput and errors per stage are
+written to a JSON file. `compare` diffs two such files and exits non-zero
+when any stage regressed by more than --threshold:
+
+    python benchmarks/run_benchmarks.py run --sizes 100,10000
+    python benchmarks/run_benchmarks.py compare base.json new.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_DIR, "benchmarks")
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from generate_data import build_name_pools, generate_block  # noqa: E402
+from ipfs_client import IPFSClient  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from participant_store import STORE_VERSION, ParticipantStore  # noqa: E402
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_SIZES = "100,10000,1000000"
+SEED_BLOCK_SIZE = 100000
+HARDHAT_RPC_URL = "http://127.0.0.1:8545"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_http(url: str, process: Optional[subprocess.Popen] = None, timeout: float = 300.0):
+    """Poll a URL until it answers (any status) or fail when the process exits or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} came up")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise TimeoutError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def wait_for_rpc(url: str, process: Optional[subprocess.Popen] = None, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    payload = {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []}
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Chain node exited with code {process.returncode}")
+        try:
+            if httpx.post(url, json=payload, timeout=1.0).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"No JSON-RPC node at {url} after {timeout:.0f}s")
+
+
+def start_process(command: List[str], log_path: str, env: Optional[Dict[str, str]] = None,
+                  cwd: str = REPO_DIR) -> subprocess.Popen:
+    log = open(log_path, "w")
+    return subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def stop_process(process: Optional[subprocess.Popen], timeout: float = 15.0):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class LocalChain:
+    """A local anvil or Hardhat node with PMKisanRegistry deployed through scripts/deploy.js"""
+
+    def __init__(self, workdir: str, rpc_url: Optional[str] = None, contract_address: Optional[str] = None):
+        self.workdir = workdir
+        self.external = rpc_url is not None
+        self.rpc_url = rpc_url or HARDHAT_RPC_URL
+        self.contract_address = contract_address
+        self.process: Optional[subprocess.Popen] = None
+        self.node = "external"
+
+    def start(self):
+        if not self.external:
+            if shutil.which("anvil"):
+                command, self.node = ["anvil", "--port", "8545", "--silent"], "anvil"
+            else:
+                command, self.node = ["npx", "hardhat", "node"], "hardhat"
+            self.process = start_process(command, os.path.join(self.workdir, "chain.log"))
+        wait_for_rpc(self.rpc_url, self.process)
+        if self.contract_address is None:
+            # Hardhat's built-in "localhost" network is http://127.0.0.1:8545
+            deploy = subprocess.run(["npx", "hardhat", "run", "scripts/deploy.js", "--network", "localhost"],
+                                    cwd=REPO_DIR, capture_output=True, text=True)
+            match = re.search(r"deployed at:\s*(0x[0-9a-fA-F]{40})", deploy.stdout)
+            if deploy.returncode != 0 or match is None:
+                raise RuntimeError(f"Contract deployment failed:\n{deploy.stdout}\n{deploy.stderr}")
+            self.contract_address = match.group(1)
+        print(f"Chain: {self.node} node at {self.rpc_url}, PMKisanRegistry at {self.contract_address}")
+
+    def stop(self):
+        stop_process(self.process)
+
+
+class IPFSStandInProcess:
+    """benchmarks/ipfs_standin.py in its own process, so it never competes with the backend's event loop"""
+
+    def __init__(self, workdir: str, latency_ms: float):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = start_process(
+            [sys.executable, os.path.join(BENCH_DIR, "ipfs_standin.py"),
+             "--port", str(self.port), "--latency-ms", str(latency_ms)],
+            os.path.join(workdir, "ipfs_standin.log"),
+        )
+        wait_for_http(f"{self.url}/stats", self.process, timeout=30)
+
+    @property
+    def gateway_url(self) -> str:
+        return f"{self.url}/ipfs"
+
+    @property
+    def pin_url(self) -> str:
+        return f"{self.url}/pinning/pinFileToIPFS"
+
+    def stats(self) -> Dict[str, int]:
+        return httpx.get(f"{self.url}/stats").json()
+
+    def stop(self):
+        stop_process(self.process)
+
+
+def participant_block(block: int, block_size: int, size: int, seed: int, name_pools,
+                      decision_date: str) -> List[Dict[str, Any]]:
+    """Block `block` of a generated database of `size` participants, in the database record format"""
+    start = block * block_size
+    participants = generate_block(block, block_size, size, seed, name_pools).to_dict(orient="records")
+    for offset, participant in enumerate(participants):
+        participant.update(participant_id=start + offset + 1, decision_date=decision_date,
+                           explanation_cid=None, confidence=None, model_version=None)
+    return participants
+
+
+async def seed_database(ipfs: IPFSStandInProcess, size: int, seed: int, chunk_size: int) -> str:
+    """Upload a sharded database of `size` generated participants and return its root CID"""
+    client = IPFSClient(ipfs.gateway_url, ipfs.pin_url, {}, max_connections=32, max_concurrency=32)
+    store = ParticipantStore(client.get_json, lambda data, filename: client.pin_json(data, filename), chunk_size)
+    name_pools = build_name_pools(seed)
+    decision_date = datetime(2025, 1, 1).isoformat()
+    root = {
+        "metadata": {"total_participants": 0, "last_updated": decision_date, "version": STORE_VERSION,
+                     "description": "PM-KISAN benchmark database"},
+        "chunk_size": chunk_size,
+        "chunks": [],
+    }
+    root_cid = await client.pin_json(root, "database_root_0.json")
+    # Blocks are whole chunks, so each append only uploads new chunks and a root
+    block_size = max(chunk_size, SEED_BLOCK_SIZE - SEED_BLOCK_SIZE % chunk_size)
+    for block in range((size + block_size - 1) // block_size):
+        participants = participant_block(block, block_size, size, seed, name_pools, decision_date)
+        root_cid, root = await store.append(root, participants)
+    await client.aclose()
+    return root_cid
+
+
+def applicant_pool(n: int, seed: int) -> List[Dict[str, Any]]:
+    """Request bodies for /predict, drawn from a different stream than the database"""
+    block = generate_block(0, n, n, seed + 10 ** 9, build_name_pools(seed))
+    return [
+        {key: (value.item() if hasattr(value, "item") else value) for key, value in row.items() if key != "eligible"}
+        for row in block.to_dict(orient="records")
+    ]
+
+
+def summarise(latencies: List[float], wall_seconds: float, errors: int) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds plus throughput for one stage"""
+    summary: Dict[str, Any] = {"requests": len(latencies) + errors, "errors": errors,
+                               "wall_seconds": round(wall_seconds, 4)}
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        summary.update({
+            "p50_ms": round(float(np.percentile(values, 50)), 3),
+            "p95_ms": round(float(np.percentile(values, 95)), 3),
+            "p99_ms": round(float(np.percentile(values, 99)), 3),
+            "mean_ms": round(float(values.mean()), 3),
+            "max_ms": round(float(values.max()), 3),
+            "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+        })
+    return summary
+
+
+async def run_stage(client: httpx.AsyncClient, requests: List[Dict[str, Any]], concurrency: int = 1,
+                    responses: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """Send requests from `concurrency` clients; successful JSON bodies are appended to `responses`"""
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for request in queue:
+            started = time.perf_counter()
+            try:
+                response = await client.request(request["method"], request["path"], json=request.get("json"))
+                elapsed = time.perf_counter() - started
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                if responses is not None:
+                    responses.append(response.json())
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarise(latencies, time.perf_counter() - started, errors)
+
+
+async def decision_pipeline(client: httpx.AsyncClient, job_ids: List[str], timeout: float) -> Dict[str, Any]:
+    """Wait for the decision jobs and report their server-side durations (created -> done)"""
+    pending = set(job_ids)
+    durations: List[float] = []
+    failed = 0
+    started = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        for job_id in list(pending):
+            job = (await client.get(f"/jobs/{job_id}")).json()
+            if job["status"] == "done":
+                durations.append(job["updated_at"] - job["created_at"])
+            elif job["status"] == "failed":
+                failed += 1
+            else:
+                continue
+            pending.discard(job_id)
+        if pending:
+            await asyncio.sleep(0.25)
+    summary = summarise(durations, time.perf_counter() - started, failed + len(pending))
+    summary["timed_out"] = len(pending)
+    return summary
+
+
+async def benchmark_backend(base_url: str, size: int, args, applicants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    stages: Dict[str, Any] = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        stages["stats_cold"] = await run_stage(client, [{"method": "GET", "path": "/stats"}])
+        stages["stats"] = await run_stage(client, [{"method": "GET", "path": "/stats"}] * args.requests)
+        participant_ids = rng.integers(1, size + 1, size=args.requests)
+        stages["participant"] = await run_stage(
+            client, [{"method": "GET", "path": f"/participant/{participant_id}"} for participant_id in participant_ids]
+        )
+
+        decisions: List[Dict[str, Any]] = []
+        predictions = [{"method": "POST", "path": "/predict", "json": applicant} for applicant in applicants]
+        stages["predict"] = await run_stage(client, predictions[:args.requests], responses=decisions)
+        stages["predict_concurrent"] = await run_stage(
+            client, predictions[args.requests:], concurrency=args.concurrency, responses=decisions
+        )
+        stages["decision_pipeline"] = await decision_pipeline(
+            client, [decision["job_id"] for decision in decisions], args.pipeline_timeout
+        )
+    return stages
+
+
+def run_size(size: int, args, chain: LocalChain, workdir: str) -> Dict[str, Any]:
+    size_dir = os.path.join(workdir, f"size_{size}")
+    os.makedirs(size_dir, exist_ok=True)
+    # Fresh caches and state per size, so cold stages are really cold and /predict really scores
+    # (every size uses the same applicants; a shared decision cache would replay them)
+    state = {
+        "JOB_QUEUE_PATH": os.path.join(size_dir, "jobs.sqlite3"),
+        "DECISION_CACHE_PATH": os.path.join(size_dir, "decision_cache.sqlite3"),
+        "CHAIN_INDEX_PATH": os.path.join(size_dir, "chain_index.sqlite3"),
+        "IPFS_CACHE_DIR": os.path.join(size_dir, "ipfs_cache"),
+        "EXPLANATION_CACHE_PATH": os.path.join(size_dir, "explanation_cache.json"),
+        "COLUMNAR_SNAPSHOT_PATH": os.path.join(size_dir, "participants_snapshot"),
+    }
+    # ... including when a --workdir is reused across runs
+    for path in state.values():
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        for stale in (path, f"{path}-wal", f"{path}-shm"):
+            if os.path.isfile(stale):
+                os.remove(stale)
+    ipfs = IPFSStandInProcess(size_dir, args.ipfs_latency_ms)
+    backend = None
+    try:
+        started = time.perf_counter()
+        database_cid = asyncio.run(seed_database(ipfs, size, args.seed, args.chunk_size))
+        seed_seconds = time.perf_counter() - started
+        print(f"[{size:,}] seeded database {database_cid} in {seed_seconds:.1f}s")
+
+        port = free_port()
+        env = dict(os.environ)
+        env.update({
+            "PINATA_GATEWAY_URL": ipfs.gateway_url,
+            "PINATA_PIN_URL": ipfs.pin_url,
+            "ETH_RPC_URL": chain.rpc_url,
+            "CONTRACT_ADDRESS": chain.contract_address,
+            "DATABASE_CID": database_cid,
+            "PARTICIPANT_CHUNK_SIZE": str(args.chunk_size),
+            "LLM_EXPLANATIONS": "1",
+        })
+        env.update(state)
+        started = time.perf_counter()
+        backend = start_process(
+            [sys.executable, os.path.join(BENCH_DIR, "serve_backend.py"), "--port", str(port),
+             "--gemini-latency-ms", str(args.gemini_latency_ms)],
+            os.path.join(size_dir, "backend.log"), env=env,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        wait_for_http(f"{base_url}/openapi.json", backend)
+        startup_seconds = time.perf_counter() - started
+        print(f"[{size:,}] backend up in {startup_seconds:.1f}s")
+
+        applicants = applicant_pool(args.requests + args.concurrent_requests, args.seed)
+        stages = asyncio.run(benchmark_backend(base_url, size, args, applicants))
+        for name, stage in stages.items():
+            print(f"[{size:,}] {name:<19} p50 {stage.get('p50_ms', '-'):>9} ms  p95 {stage.get('p95_ms', '-'):>9} ms  "
+                  f"p99 {stage.get('p99_ms', '-'):>9} ms  {stage.get('throughput_rps', '-'):>8} req/s  "
+                  f"errors {stage['errors']}")
+        return {
+            "participants": size,
+            "database_cid": database_cid,
+            "seed_seconds": round(seed_seconds, 3),
+            "startup_seconds": round(startup_seconds, 3),
+            "stages": stages,
+            "ipfs": ipfs.stats(),
+        }
+    finally:
+        stop_process(backend)
+        ipfs.stop()
+
+
+def ensure_model_registered():
+    """The backend serves the registry's active version; register the saved model if models/ has none"""
+    if ModelRegistry(os.path.join(REPO_DIR, "models")).active_version() is None:
+        print("No model registered; registering eligibility_model.pkl")
+        subprocess.run([sys.executable, "model_registry.py", "register"], cwd=REPO_DIR, check=True)
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*command):
+        result = subprocess.run(["git", *command], cwd=REPO_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    workdir = args.workdir or tempfile.mkdtemp(prefix="pmkisan-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    revision = git_revision()
+    output = args.output or os.path.join(BENCH_DIR, "results", f"{(revision['commit'] or 'unknown')[:12]}.json")
+
+    chain = LocalChain(workdir, args.rpc_url, args.contract_address)
+    results: Dict[str, Any] = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "meta": {
+            **revision,
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("func", "output", "workdir")},
+        },
+        "sizes": {},
+    }
+    ensure_model_registered()
+    try:
+        chain.start()
+        results["meta"]["chain"] = chain.node
+        for size in sizes:
+            results["sizes"][str(size)] = run_size(size, args, chain, workdir)
+    finally:
+        chain.stop()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output} (logs in {workdir})")
+
+
+COMPARED_METRICS = {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "throughput_rps": -1}
+
+
+def compare(args):
+    """Print per-stage changes between two result files; exit 1 on regressions beyond the threshold"""
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    print(f"base {base['meta'].get('commit', '?')[:12]}  ->  new {new['meta'].get('commit', '?')[:12]}")
+    regressions = 0
+    for size, new_size in new["sizes"].items():
+        base_size = base["sizes"].get(size)
+        if base_size is None:
+            continue
+        change = (new_size["startup_seconds"] - base_size["startup_seconds"]) / base_size["startup_seconds"]
+        regressed = change > args.threshold
+        regressions += regressed
+        print(f"  {int(size):>9,} {'startup':<19} seconds {base_size['startup_seconds']:g} -> "
+              f"{new_size['startup_seconds']:g} ({change:+.0%}){' !' if regressed else ''}")
+        for stage, new_stage in new_size["stages"].items():
+            base_stage = base_size["stages"].get(stage, {})
+            changes = []
+            for metric, direction in COMPARED_METRICS.items():
+                old_value, new_value = base_stage.get(metric), new_stage.get(metric)
+                if not old_value or new_value is None:
+                    continue
+                change = (new_value - old_value) / old_value
+                regressed = change * direction > args.threshold
+                regressions += regressed
+                changes.append(f"{metric} {old_value:g} -> {new_value:g} ({change:+.0%}){' !' if regressed else ''}")
+            print(f"  {int(size):>9,} {stage:<19} " + "  ".join(changes))
+    if regressions:
+        print(f"{regressions} metric(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the PM-KISAN decision pipeline against local stand-ins")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated database sizes")
+    run_parser.add_argument("--requests", type=int, default=200, help="Sequential requests per stage")
+    run_parser.add_argument("--concurrent-requests", type=int, default=1000)
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--chunk-size", type=int, default=1000, help="Participants per database chunk")
+    run_parser.add_argument("--ipfs-latency-ms", type=float, default=0.0)
+    run_parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    run_parser.add_argument("--request-timeout", type=float, default=600.0)
+    run_parser.add_argument("--pipeline-timeout", type=float, default=600.0)
+    run_parser.add_argument("--rpc-url", help="Use an already running node instead of starting anvil / Hardhat")
+    run_parser.add_argument("--contract-address", help="Skip deployment and use this PMKisanRegistry")
+    run_parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    run_parser.add_argument("--workdir", help="Logs and per-size state (default: a new temporary directory)")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.15, help="Relative change that counts as a regression")
+    compare_parser.set_defaults(func=compare)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    args.func(args)
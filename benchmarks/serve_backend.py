@@ -0,0 +1,48 @@
+"""Run the FastAPI backend with Gemini replaced by a local stub
+
+The backend is configured through its usual environment variables
+(PINATA_GATEWAY_URL, PINATA_PIN_URL, ETH_RPC_URL, DATABASE_CID, ...); this
+launcher only swaps `main.gemini_model` for GeminiStub before serving, so
+LLM enrichment costs a fixed, configurable delay instead of a network call.
+
+    python benchmarks/serve_backend.py --port 8100 [--gemini-latency-ms 300]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import types
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+class GeminiStub:
+    """Stands in for genai.GenerativeModel: fixed latency, canned text"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def generate_content_async(self, prompt: str):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return types.SimpleNamespace(text="This decision was explained by the Gemini stub used for benchmarking.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the backend with a Gemini stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--gemini-latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    # main.py resolves its model and contract paths relative to backend/
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    import uvicorn
+
+    import main
+
+    main.gemini_model = GeminiStub(args.gemini_latency_ms / 1000)
+    uvicorn.run(main.app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,271 @@
+"""Columnar on-disk layout for the participant database
+
+A database is a directory holding one NumPy `.npy` file per column plus a
+`manifest.json`:
+
+    participants_db/
+        manifest.json
+        participant_id.npy   int64
+        aadhaar.npy          int64
+        name.npy             <U   (fixed-width unicode)
+        age.npy              int16
+        caste.npy            uint8   codes into manifest categories
+        income.npy           float64
+        land_ownership.npy   bool
+        housing_status.npy   uint8   codes into manifest categories
+        eligible.npy         bool
+        confidence.npy       float64 (NaN when not recorded; float32 before version 2)
+        decision_date.npy    <U   ISO-8601 string
+        explanation_cid.npy  <U   ("" when missing)
+        model_version.npy    <U   ("" when missing; absent in older snapshots)
+        income_integral.npy  bool    income was a JSON integer (version 2)
+        recorded.npy         uint16  bitmask of the fields each record has, in COLUMNS order (version 2)
+
+The last two keep a round trip exact: integer incomes come back as integers
+and fields a record never had (confidence and model_version on older
+records) are left out instead of exported as null.
+
+The manifest records the format name and version, the row count, the
+database metadata and, per column, its file, dtype and (for dictionary
+encoded columns) the category list:
+
+    {"format": "pmkisan-columnar", "version": 2, "rows": 100,
+     "metadata": {...},
+     "columns": {"caste": {"file": "caste.npy", "dtype": "|u1",
+                           "categories": ["General", "OBC", "SC", "ST"]}, ...}}
+
+Columns are opened with `np.load(mmap_mode="r")` so readers only touch the
+columns (and pages) they use. `export_json` writes the familiar
+`{"metadata", "participants"}` JSON for transparency.
+"""
+import argparse
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+FORMAT_NAME = "pmkisan-columnar"
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+
+# Column -> storage dtype; None marks a fixed-width unicode column sized on write
+COLUMNS = {
+    "participant_id": np.int64,
+    "aadhaar": np.int64,
+    "name": None,
+    "age": np.int16,
+    "caste": np.uint8,
+    "income": np.float64,
+    "land_ownership": np.bool_,
+    "housing_status": np.uint8,
+    "eligible": np.bool_,
+    "confidence": np.float64,
+    "decision_date": None,
+    "explanation_cid": None,
+    "model_version": None,
+}
+CATEGORICAL = ("caste", "housing_status")
+# Field order of participant records as the backend writes them
+RECORD_FIELDS = ("participant_id", "aadhaar", "name", "age", "caste", "income", "land_ownership", "housing_status",
+                 "eligible", "decision_date", "explanation_cid", "confidence", "model_version")
+INCOME_INTEGRAL = "income_integral"
+RECORDED = "recorded"
+FIELD_BITS = {name: 1 << bit for bit, name in enumerate(COLUMNS)}
+ALL_RECORDED = sum(FIELD_BITS.values())
+
+
+def recorded_bits(participant: Dict[str, Any]) -> int:
+    """FIELD_BITS of the fields a participant record has"""
+    if len(participant) == len(COLUMNS) and all(name in participant for name in COLUMNS):
+        return ALL_RECORDED
+    return sum(bit for name, bit in FIELD_BITS.items() if name in participant)
+
+
+def is_integral(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def participants_to_columns(participants: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode participant dicts into typed column arrays and category lists"""
+    columns: Dict[str, Any] = {}
+    categories: Dict[str, List[Any]] = {}
+    for name, dtype in COLUMNS.items():
+        values = [participant.get(name) for participant in participants]
+        if name in CATEGORICAL:
+            categories[name] = sorted(set(values), key=lambda value: (value is None, str(value)))
+            codes = {value: code for code, value in enumerate(categories[name])}
+            columns[name] = np.fromiter((codes[value] for value in values), dtype=dtype, count=len(values))
+        elif name == "confidence":
+            columns[name] = np.array([np.nan if value is None else value for value in values], dtype=dtype)
+        elif dtype is None:
+            columns[name] = np.array(["" if value is None else str(value) for value in values], dtype=str)
+        else:
+            columns[name] = np.array([value or 0 for value in values], dtype=dtype)
+    columns[INCOME_INTEGRAL] = np.array([is_integral(participant.get("income")) for participant in participants],
+                                        dtype=np.bool_)
+    columns[RECORDED] = np.array([recorded_bits(participant) for participant in participants], dtype=np.uint16)
+    return {"columns": columns, "categories": categories}
+
+
+def write_columnar(path: str, participants: List[Dict[str, Any]], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Write a columnar database directory, replacing any existing one atomically"""
+    return write_columns(path, participants_to_columns(participants), len(participants), metadata)
+
+
+def write_columns(path: str, encoded: Dict[str, Any], rows: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Write already encoded columns ({"columns", "categories"}, as from participants_to_columns)"""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "rows": rows,
+        "metadata": metadata,
+        "columns": {},
+    }
+    for name, values in encoded["columns"].items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), values, allow_pickle=False)
+        manifest["columns"][name] = {"file": f"{name}.npy", "dtype": values.dtype.str}
+        if name in encoded["categories"]:
+            manifest["columns"][name]["categories"] = encoded["categories"][name]
+    with open(os.path.join(tmp_path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+class ColumnarDatabase:
+    """Read-only, memory-mapped view of a columnar participant database"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} database")
+        if self.manifest.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{path} uses format version {self.manifest['version']}; "
+                             f"this reader supports up to {FORMAT_VERSION}")
+        self.metadata: Dict[str, Any] = self.manifest["metadata"]
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.manifest["rows"]
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.manifest["columns"])
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw memory-mapped column (category codes for dictionary encoded columns)"""
+        if name not in self._columns:
+            spec = self.manifest["columns"][name]
+            self._columns[name] = np.load(os.path.join(self.path, spec["file"]), mmap_mode="r", allow_pickle=False)
+        return self._columns[name]
+
+    def categories(self, name: str) -> List[Any]:
+        return self.manifest["columns"][name].get("categories", [])
+
+    def decoded(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Column values (rows start:stop) with dictionary codes replaced by their categories"""
+        values = self.column(name)[start:stop]
+        if name in CATEGORICAL:
+            return np.asarray(self.categories(name), dtype=object)[values]
+        return values
+
+    def iter_participants(self, start: int = 0, stop: Optional[int] = None,
+                          batch_size: int = 10000) -> Iterator[Dict[str, Any]]:
+        """Rebuild participant dicts, batch by batch, in stored order"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        available = set(self.column_names)
+        names = [name for name in RECORD_FIELDS if name in available]
+        for batch_start in range(start, stop, batch_size):
+            batch_stop = min(batch_start + batch_size, stop)
+            batch = {name: self._to_python(name, self.decoded(name, batch_start, batch_stop)) for name in names}
+            if INCOME_INTEGRAL in available and "income" in batch:
+                integral = self.column(INCOME_INTEGRAL)[batch_start:batch_stop].tolist()
+                batch["income"] = [int(value) if flag else value for value, flag in zip(batch["income"], integral)]
+            recorded = (self.column(RECORDED)[batch_start:batch_stop].tolist() if RECORDED in available
+                        else [ALL_RECORDED] * (batch_stop - batch_start))
+            for offset, bits in enumerate(recorded):
+                yield {name: batch[name][offset] for name in names if bits & FIELD_BITS[name]}
+
+    @staticmethod
+    def _to_python(name: str, values: np.ndarray) -> List[Any]:
+        if name == "confidence":
+            return [None if np.isnan(value) else float(value) for value in values]
+        if name in ("explanation_cid", "model_version"):
+            return [value or None for value in values.tolist()]
+        return values.tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        """Eligibility totals and per-category breakdowns from three columns only"""
+        eligible = np.asarray(self.column("eligible"))
+        total = len(eligible)
+        eligible_count = int(np.count_nonzero(eligible))
+        return {
+            "total_participants": total,
+            "eligible_count": eligible_count,
+            "not_eligible_count": total - eligible_count,
+            "by_caste": self._breakdown("caste", eligible),
+            "by_housing_status": self._breakdown("housing_status", eligible),
+        }
+
+    def _breakdown(self, name: str, eligible: np.ndarray) -> Dict[str, Dict[str, int]]:
+        categories = self.categories(name)
+        codes = np.asarray(self.column(name))
+        totals = np.bincount(codes, minlength=len(categories))
+        eligible_totals = np.bincount(codes[eligible], minlength=len(categories))
+        ordered = sorted(range(len(categories)), key=lambda code: str(categories[code]))
+        return {
+            categories[code]: {"total": int(totals[code]), "eligible": int(eligible_totals[code])}
+            for code in ordered if totals[code]
+        }
+
+
+def export_json(db: ColumnarDatabase, output_path: str):
+    """Write the database as {"metadata", "participants"} JSON, one participant per line"""
+    with open(output_path, "w") as f:
+        f.write('{"metadata": ' + json.dumps(db.metadata, indent=2) + ',\n"participants": [')
+        for position, participant in enumerate(db.iter_participants()):
+            f.write(("\n  " if position == 0 else ",\n  ") + json.dumps(participant))
+        f.write("\n]}\n")
+
+
+def from_json(json_path: str, output_path: str) -> Dict[str, Any]:
+    """Convert a {"metadata", "participants"} JSON database to the columnar layout"""
+    with open(json_path) as f:
+        database = json.load(f)
+    return write_columnar(output_path, database["participants"], database["metadata"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert participant databases between JSON and the columnar layout")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    to_columnar = subparsers.add_parser("import", help="JSON database -> columnar directory")
+    to_columnar.add_argument("json_path")
+    to_columnar.add_argument("columnar_path")
+    to_json = subparsers.add_parser("export", help="columnar directory -> JSON database")
+    to_json.add_argument("columnar_path")
+    to_json.add_argument("json_path")
+    show_stats = subparsers.add_parser("stats", help="print eligibility statistics")
+    show_stats.add_argument("columnar_path")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        manifest = from_json(args.json_path, args.columnar_path)
+        print(f"Wrote {manifest['rows']} participants to {args.columnar_path}")
+    elif args.command == "export":
+        export_json(ColumnarDatabase(args.columnar_path), args.json_path)
+        print(f"Exported {args.columnar_path} to {args.json_path}")
+    else:
+        print(json.dumps(ColumnarDatabase(args.columnar_path).stats(), indent=2))
@@ -11,14 +11,56 @@ contract PMKisanRegistry {
 
     mapping(address => Record[]) public records;
 
+    // One per stored decision, so indexers can sync from logs instead of
+    // reading records back one eth_call at a time
+    event DecisionStored(
+        address indexed submitter,
+        uint256 indexed participantId,
+        uint256 index,
+        string databaseCID,
+        string explanationCID,
+        string decision
+    );
+
     function storeDecision(
         string memory _databaseCID,
         string memory _explanationCID,
         string memory _decision,
         uint256 _participantId
     ) public {
-        records[msg.sender].push(
-            Record(_databaseCID, _explanationCID, _decision, _participantId)
+        _store(records[msg.sender], _databaseCID, _explanationCID, _decision, _participantId);
+    }
+
+    function storeDecisions(
+        string[] calldata _databaseCIDs,
+        string[] calldata _explanationCIDs,
+        string[] calldata _decisions,
+        uint256[] calldata _participantIds
+    ) public {
+        uint256 count = _decisions.length;
+        require(
+            _databaseCIDs.length == count &&
+            _explanationCIDs.length == count &&
+            _participantIds.length == count,
+            "Array length mismatch"
+        );
+
+        Record[] storage userRecords = records[msg.sender];
+        for (uint256 i = 0; i < count; i++) {
+            _store(userRecords, _databaseCIDs[i], _explanationCIDs[i], _decisions[i], _participantIds[i]);
+        }
+    }
+
+    function _store(
+        Record[] storage userRecords,
+        string memory _databaseCID,
+        string memory _explanationCID,
+        string memory _decision,
+        uint256 _participantId
+    ) internal {
+        userRecords.push(Record(_databaseCID, _explanationCID, _decision, _participantId));
+        emit DecisionStored(
+            msg.sender, _participantId, userRecords.length - 1, _databaseCID, _explanationCID, _decision
         );
     }
 
@@ -32,4 +74,18 @@ contract PMKisanRegistry {
         Record memory r = records[user][index];
         return (r.databaseCID, r.explanationCID, r.decision, r.participantId);
     }
+
+    // Records [start, start + count) of a user, clamped to the records that exist
+    function getRecords(address user, uint256 start, uint256 count) public view returns (Record[] memory page) {
+        Record[] storage userRecords = records[user];
+        uint256 length = userRecords.length;
+        if (start >= length) {
+            return new Record[](0);
+        }
+        uint256 end = count < length - start ? start + count : length;
+        page = new Record[](end - start);
+        for (uint256 i = start; i < end; i++) {
+            page[i - start] = userRecords[i];
+        }
+    }
 }
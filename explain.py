@@ -1,25 +1,31 @@
-import shap
-import pandas as pd
-import joblib
+import os
+from numbers import Real
 
-model = joblib.load("eligibility_model.pkl")
-# encoders = joblib.load("label_encoders.pkl")
+from feature_encoder import UnknownCategoryError
+from model_registry import ModelRegistry
 
-# Proper SHAP explainer for tree-based models
-explainer = shap.TreeExplainer(model)
+bundle = ModelRegistry(os.environ.get("MODEL_REGISTRY_DIR", "models")).load_active()
 
-def explain_prediction(applicant_features: dict):
-    df = pd.DataFrame([applicant_features])
+def encode_applicant(applicant_features: dict):
+    """Encode raw caste / housing_status strings, or the label-encoded codes this script used to take"""
+    features = dict(applicant_features)
+    for name, categories in bundle.encoder.categories.items():
+        value = features.get(name)
+        if isinstance(value, Real) and not isinstance(value, bool):
+            if value not in range(len(categories)):
+                raise UnknownCategoryError(name, value, categories)
+            features[name] = categories[int(value)]
+    return bundle.encoder.encode(features)
 
-    # Ensure boolean columns are correct
-    df["land_ownership"] = df["land_ownership"].astype(int)
+def explain_prediction(applicant_features: dict):
+    # Encode with the model's label encoders (category strings or their codes)
+    X = encode_applicant(applicant_features)
 
-    # SHAP explanation
-    shap_values = explainer(df)
-    feature_names = df.columns.tolist()
+    # SHAP explanation (precomputed table lookup when the model version has one)
+    shap_row = bundle.predict_and_explain(X)[1][0]
 
     # Get absolute contribution values
-    contributions = dict(zip(feature_names, shap_values.values[0]))
+    contributions = bundle.contributions(shap_row)
 
     # Sort features by absolute importance
     sorted_contributions = sorted(contributions.items(), key=lambda x: abs(x[1]), reverse=True)
@@ -0,0 +1,107 @@
+"""Feature encoding shared by the API, the CLIs and training artefacts
+
+The codes come from the saved LabelEncoders (index into `classes_`, which
+sklearn keeps sorted), so every caller encodes exactly as the model was
+trained. Rows are written straight into a preallocated float array; there is
+no pandas in the per-request path.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+FEATURES = ["age", "caste", "income", "land_ownership", "housing_status"]
+CATEGORICAL_FEATURES = ["caste", "housing_status"]
+
+
+class UnknownCategoryError(ValueError):
+    """A categorical feature value the model was not trained on"""
+
+    def __init__(self, feature: str, value: Any, allowed: Sequence[str]):
+        self.feature = feature
+        self.value = value
+        self.allowed = list(allowed)
+        super().__init__(f"Unknown {feature} {value!r}; expected one of: {', '.join(self.allowed)}")
+
+
+class FeatureEncoder:
+    """Encodes applicants into the model's (n, len(FEATURES)) float feature matrix"""
+
+    def __init__(self, categories: Dict[str, Sequence[str]], features: Optional[Sequence[str]] = None):
+        self.features = list(features or FEATURES)
+        self.categories = {name: [str(value) for value in values] for name, values in categories.items()}
+        self.codes = {name: {value: float(code) for code, value in enumerate(values)}
+                      for name, values in self.categories.items()}
+        self._columns = [(position, name, self.codes.get(name)) for position, name in enumerate(self.features)]
+
+    @classmethod
+    def from_label_encoders(cls, encoders, features: Optional[Sequence[str]] = None) -> "FeatureEncoder":
+        return cls({name: list(encoders[name].classes_) for name in CATEGORICAL_FEATURES if name in encoders},
+                   features)
+
+    @classmethod
+    def from_schema(cls, schema: Dict[str, Any]) -> "FeatureEncoder":
+        return cls(schema["categories"], schema.get("features"))
+
+    @property
+    def n_features(self) -> int:
+        return len(self.features)
+
+    def empty(self, n: int) -> np.ndarray:
+        return np.empty((n, self.n_features), dtype=float)
+
+    def encode_into(self, out: np.ndarray, applicant) -> np.ndarray:
+        """Write one applicant (a mapping or an object with feature attributes) into a row of `out`"""
+        get = applicant.__getitem__ if isinstance(applicant, Mapping) else applicant.__getattribute__
+        for position, name, codes in self._columns:
+            value = get(name)
+            if codes is None:
+                out[position] = float(value)
+            else:
+                code = codes.get(value)
+                if code is None:
+                    raise UnknownCategoryError(name, value, self.categories[name])
+                out[position] = code
+        return out
+
+    def encode(self, applicant) -> np.ndarray:
+        """Encode one applicant as a (1, n_features) array"""
+        X = self.empty(1)
+        self.encode_into(X[0], applicant)
+        return X
+
+    def encode_many(self, applicants: Iterable[Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Encode a sequence of applicants into `out` (allocated when not given)"""
+        applicants = list(applicants)
+        X = self.empty(len(applicants)) if out is None else out[:len(applicants)]
+        for row, applicant in zip(X, applicants):
+            self.encode_into(row, applicant)
+        return X
+
+    def encode_columns(self, columns: Mapping, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Vectorised encoding of column arrays (e.g. a DataFrame chunk) keyed by feature name"""
+        n = len(columns[self.features[0]])
+        X = self.empty(n) if out is None else out[:n]
+        for position, name, codes in self._columns:
+            values = np.asarray(columns[name])
+            if codes is None:
+                X[:, position] = values.astype(float)
+            else:
+                X[:, position] = self._lookup(name, values)
+        return X
+
+    def _lookup(self, name: str, values: np.ndarray) -> np.ndarray:
+        categories = np.asarray(self.categories[name])
+        order = np.argsort(categories)
+        values = values.astype(str)
+        positions = np.searchsorted(categories[order], values)
+        positions[positions >= len(categories)] = 0
+        codes = order[positions]
+        unknown = categories[codes] != values
+        if unknown.any():
+            raise UnknownCategoryError(name, values[np.argmax(unknown)], self.categories[name])
+        return codes.astype(float)
+
+    def describe(self) -> Dict[str, List[str]]:
+        """Allowed values per categorical feature, for error messages and API docs"""
+        return dict(self.categories)
@@ -0,0 +1,163 @@
+"""Flat NumPy inference engine for the eligibility RandomForest
+
+Compiles the trees of a fitted RandomForestClassifier into one set of flat node
+arrays (feature, threshold, left/right child, leaf probabilities) and scores rows
+by traversing every tree at once with vectorised NumPy operations. Probabilities
+are bit-identical to sklearn's predict_proba: inputs are compared as float32 like
+sklearn's tree code, and per-tree probabilities are summed in estimator order
+before dividing by the number of trees.
+
+backend/tests/test_forest_engine.py checks parity against sklearn on the saved model.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import numpy as np
+
+# Rows traversed together; bounds the (n_trees, rows) working arrays
+BLOCK_SIZE = 4096
+# Node arrays, in constructor order
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+def _sklearn_normalises_leaves() -> bool:
+    """sklearn < 1.4 stored class counts in tree_.value and normalised them in predict_proba"""
+    import sklearn
+
+    major, minor = (int(part) for part in sklearn.__version__.split(".")[:2])
+    return (major, minor) < (1, 4)
+
+
+class CompiledForest:
+    """RandomForestClassifier compiled into flat node arrays for fast scoring"""
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features = n_features
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """Flatten every tree of a fitted forest into shared node arrays"""
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        normalise = _sklearn_normalises_leaves()
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            # Leaves point at themselves, so extra traversal steps are no-ops
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left).astype(np.intp) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right).astype(np.intp) + offset)
+
+            value = np.array(tree.value[:, 0, :model.n_classes_], dtype=np.float64)
+            if normalise:
+                normaliser = value.sum(axis=1)[:, np.newaxis]
+                normaliser[normaliser == 0.0] = 1.0
+                value /= normaliser
+            values.append(value)
+
+            roots.append(offset)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            classes=np.asarray(model.classes_),
+            n_features=int(model.n_features_in_),
+            max_depth=max(estimator.tree_.max_depth for estimator in model.estimators_),
+        )
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in ARRAYS}
+        arrays.update(classes=np.asarray(self.classes_), n_features=np.array(self.n_features),
+                      max_depth=np.array(self.max_depth))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, data) -> "CompiledForest":
+        """Rebuild a forest from `to_arrays` output (or an open .npz file holding it)"""
+        return cls(**{name: data[name] for name in ARRAYS}, classes=data["classes"],
+                   n_features=int(data["n_features"]), max_depth=int(data["max_depth"]))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _validate(self, X) -> np.ndarray:
+        # sklearn's trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got array of shape {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_trees, n_rows)"""
+        X = self._validate(X)
+        rows = np.arange(X.shape[0])
+        node = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _predict_proba_block(self, X) -> np.ndarray:
+        leaves = self.apply(X)
+        proba = np.zeros((X.shape[0], len(self.classes_)), dtype=np.float64)
+        # Accumulate in estimator order, exactly like sklearn's _accumulate_prediction
+        for tree_leaves in leaves:
+            proba += self.value[tree_leaves]
+        proba /= self.n_trees
+        return proba
+
+    def predict_proba(self, X, n_jobs: int = 1) -> np.ndarray:
+        """Class probabilities, bit-identical to RandomForestClassifier.predict_proba
+
+        n_jobs > 1 scores row blocks on a thread pool; NumPy releases the GIL
+        for the gather and compare steps, so large batches use several cores.
+        """
+        X = self._validate(X)
+        if X.shape[0] <= BLOCK_SIZE:
+            return self._predict_proba_block(X)
+        blocks = [X[start:start + BLOCK_SIZE] for start in range(0, X.shape[0], BLOCK_SIZE)]
+        if n_jobs == 1:
+            return np.concatenate([self._predict_proba_block(block) for block in blocks])
+        with ThreadPoolExecutor(max_workers=n_jobs if n_jobs > 0 else None) as pool:
+            return np.concatenate(list(pool.map(self._predict_proba_block, blocks)))
+
+    def predict(self, X, n_jobs: int = 1) -> np.ndarray:
+        """Predicted class labels, same as RandomForestClassifier.predict"""
+        return self.classes_.take(np.argmax(self.predict_proba(X, n_jobs=n_jobs), axis=1))
+
+
+def check_parity(model, X, n_jobs: int = 1) -> CompiledForest:
+    """Compile a model and assert its probabilities match sklearn bit for bit"""
+    forest = CompiledForest.from_sklearn(model)
+    expected = model.predict_proba(X)
+    actual = forest.predict_proba(X, n_jobs=n_jobs)
+    if not np.array_equal(expected, actual):
+        mismatched = int(np.sum(np.any(expected != actual, axis=1)))
+        raise AssertionError(f"Compiled forest differs from sklearn on {mismatched} of {len(X)} rows")
+    if not np.array_equal(model.predict(X), forest.predict(X, n_jobs=n_jobs)):
+        raise AssertionError("Compiled forest labels differ from sklearn")
+    return forest
+
@@ -1,40 +1,178 @@
+"""Vectorised synthetic applicant generator
+
+Rows are drawn with NumPy in fixed-size blocks. Block k always uses the RNG
+stream (seed, k), so output is reproducible from the seed whatever the number
+of worker processes. Aadhaar numbers come from a keyed bijective permutation
+of the row index, so they are unique without keeping a set of issued numbers.
+"""
+import argparse
+import contextlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 from faker import Faker
-import random
-import json
 
-fake = Faker()
+CASTE_OPTIONS = np.array(['SC', 'ST', 'OBC', 'General'])
+HOUSING_STATUS_OPTIONS = np.array(['kutcha', 'semi-pucca', 'pucca'])
+
+AADHAAR_BASE = 10 ** 11          # smallest 12-digit number
+AADHAAR_SPACE = 9 * 10 ** 11     # count of 12-digit numbers
+FEISTEL_HALF_BITS = 20           # 2 x 20 bits covers AADHAAR_SPACE
+FEISTEL_ROUNDS = 4
+NAME_POOL_SIZE = 2000
+
+def _feistel_keys(seed):
+    rng = np.random.default_rng([seed, 0xAAD4A4])
+    return rng.integers(0, 2 ** 32, size=FEISTEL_ROUNDS, dtype=np.uint64)
+
+def _feistel(values, keys):
+    """Keyed bijection on [0, 2**40)"""
+    mask = np.uint64((1 << FEISTEL_HALF_BITS) - 1)
+    shift = np.uint64(FEISTEL_HALF_BITS)
+    left, right = values >> shift, values & mask
+    for key in keys:
+        mixed = (right * np.uint64(0x9E3779B1) + key) ^ (right >> np.uint64(7))
+        mixed = (mixed * np.uint64(0x85EBCA6B)) >> np.uint64(13)
+        left, right = right, left ^ (mixed & mask)
+    return (left << shift) | right
+
+def aadhaar_numbers(indices, seed):
+    """Unique 12-digit Aadhaar numbers for row indices (a permutation of the 12-digit range)"""
+    keys = _feistel_keys(seed)
+    values = _feistel(np.asarray(indices, dtype=np.uint64), keys)
+    # Cycle-walk values that fall outside the 12-digit range back into it
+    outside = values >= AADHAAR_SPACE
+    while outside.any():
+        values[outside] = _feistel(values[outside], keys)
+        outside = values >= AADHAAR_SPACE
+    return values.astype(np.int64) + AADHAAR_BASE
+
+def build_name_pools(seed, size=NAME_POOL_SIZE):
+    """Distinct first and last names drawn once from Faker"""
+    fake = Faker()
+    fake.seed_instance(seed)
+    first_names = sorted({fake.first_name() for _ in range(size)})
+    last_names = sorted({fake.last_name() for _ in range(size)})
+    return np.array(first_names), np.array(last_names)
+
+def generate_block(block, block_size, rows, seed, name_pools):
+    """Generate rows [block * block_size, ...) as a DataFrame"""
+    start = block * block_size
+    n = min(block_size, rows - start)
+    rng = np.random.default_rng([seed, block])
+    first_names, last_names = name_pools
 
-def generate_applicant():
-    caste_options = ['SC', 'ST', 'OBC', 'General']
-    housing_status_options = ['kutcha', 'semi-pucca', 'pucca']
-    age = random.randint(18, 80)
-    caste = random.choice(caste_options)
-    income = random.randint(10000, 100000)
-    land_ownership = random.choice([True, False])
-    housing_status = random.choice(housing_status_options)
+    age = rng.integers(18, 81, size=n)
+    caste = CASTE_OPTIONS[rng.integers(0, len(CASTE_OPTIONS), size=n)]
+    income = rng.integers(10000, 100001, size=n)
+    land_ownership = rng.integers(0, 2, size=n).astype(bool)
+    housing_status = HOUSING_STATUS_OPTIONS[rng.integers(0, len(HOUSING_STATUS_OPTIONS), size=n)]
+    names = np.char.add(np.char.add(first_names[rng.integers(0, len(first_names), size=n)], ' '),
+                        last_names[rng.integers(0, len(last_names), size=n)])
 
     # Define eligibility logic
-    eligible = (
-        income < 60000 and
-        land_ownership == False and
-        housing_status != 'pucca'
-    )
-
-    return {
-        "aadhaar": fake.unique.random_number(digits=12, fix_len=True),
-        "name": fake.name(),
+    eligible = (income < 60000) & ~land_ownership & (housing_status != 'pucca')
+
+    return pd.DataFrame({
+        "aadhaar": aadhaar_numbers(np.arange(start, start + n), seed),
+        "name": names,
         "age": age,
         "caste": caste,
         "income": income,
         "land_ownership": land_ownership,
         "housing_status": housing_status,
-        "eligible": eligible
-    }
+        "eligible": eligible,
+    })
+
+def generate_dataset(n=100, seed=0):
+    """Generate n applicants in memory as {"applicants": [...]}"""
+    df = generate_block(0, n, n, seed, build_name_pools(seed))
+    return {"applicants": df.to_dict(orient='records')}
+
+# Per-process name pools, built once by _init_worker
+_worker_state = {}
+
+def _init_worker(seed):
+    _worker_state['name_pools'] = build_name_pools(seed)
+
+def _render_block(block, block_size, rows, seed, output_format):
+    """Generate a block and serialise it for the writer (DataFrame for Parquet)"""
+    df = generate_block(block, block_size, rows, seed, _worker_state['name_pools'])
+    if output_format == 'parquet':
+        return df
+    if output_format == 'csv':
+        return df.to_csv(header=(block == 0), index=False)
+    if output_format == 'ndjson':
+        return df.to_json(orient='records', lines=True)
+    # JSON array body: strip the brackets so blocks can be comma-joined
+    return df.to_json(orient='records')[1:-1]
+
+def detect_output_format(path):
+    suffix = Path(path).suffix.lower()
+    return {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv', '.parquet': 'parquet'}.get(suffix, 'json')
+
+def write_dataset(output_path, rows, seed=0, output_format=None, block_size=100000, workers=1):
+    """Stream `rows` applicants to output_path, generating blocks across `workers` processes"""
+    output_format = output_format or detect_output_format(output_path)
+    blocks = (rows + block_size - 1) // block_size
+    parquet_writer = None
+    if output_format == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            print("Error: Parquet output requires pyarrow (pip install pyarrow)")
+            exit(1)
+
+    started = time.perf_counter()
+    # Parquet goes through pyarrow's own writer; the text formats share one file handle
+    text_file = open(output_path, 'w') if output_format != 'parquet' else contextlib.nullcontext()
+    with text_file as f, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(seed,)) as pool:
+        if output_format == 'json':
+            f.write('{"applicants": [')
+        in_flight = deque()
+        next_block = 0
+        for block in range(blocks):
+            in_flight.append(pool.submit(_render_block, block, block_size, rows, seed, output_format))
+            # Keep at most 2 blocks per worker in memory; write in block order
+            while in_flight and (len(in_flight) >= 2 * workers or block == blocks - 1):
+                rendered = in_flight.popleft().result()
+                if output_format == 'parquet':
+                    table = pa.Table.from_pandas(rendered, preserve_index=False)
+                    if parquet_writer is None:
+                        parquet_writer = pq.ParquetWriter(output_path, table.schema)
+                    parquet_writer.write_table(table)
+                elif output_format == 'json':
+                    f.write(('' if next_block == 0 else ',') + rendered)
+                else:
+                    f.write(rendered)
+                next_block += 1
+        if output_format == 'json':
+            f.write(']}\n')
+    if parquet_writer is not None:
+        parquet_writer.close()
+    elapsed = time.perf_counter() - started
+    print(f"Generated {rows:,} applicants to {output_path} in {elapsed:.2f}s "
+          f"({rows / elapsed if elapsed else 0:,.0f} rows/s, seed {seed})")
 
-def generate_dataset(n=100):
-    return {"applicants": [generate_applicant() for _ in range(n)]}
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic PM-KISAN applicants")
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='pmay_synthetic_data.json',
+                        help="Output file; format from the extension (.json, .ndjson/.jsonl, .csv, .parquet)")
+    parser.add_argument('--format', choices=['json', 'ndjson', 'csv', 'parquet'])
+    parser.add_argument('--block-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=1, help=f"Generator processes (this machine: {os.cpu_count()})")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    data = generate_dataset(100)
-    with open("pmay_synthetic_data.json", "w") as f:
-        json.dump(data, f, indent=2)
\ No newline at end of file
+    args = parse_args()
+    write_dataset(args.output, args.rows, seed=args.seed, output_format=args.format,
+                  block_size=args.block_size, workers=args.workers)
@@ -0,0 +1,273 @@
+"""Versioned registry of model artefacts
+
+Each version is an immutable directory holding everything needed to score and
+explain a decision, so a version can be loaded and warmed up without touching
+the one currently serving:
+
+    models/
+        registry.json          {"active": "v2", "versions": ["v1", "v2"]}
+        v2/
+            model.pkl          fitted RandomForestClassifier
+            encoders.pkl       LabelEncoders for the categorical features
+            forest.pkl         CompiledForest (see forest_engine.py)
+            explainer.pkl      EligibilityExplainer with its TreeExplainer built
+            shap_table.npz     precomputed probabilities and SHAP values (see shap_table.py)
+            schema.json        features, categories, classes, metrics, provenance
+
+Versions are written to a temporary directory and renamed into place, and
+registry.json is replaced atomically, so readers never see a partial version.
+Loading a version reads only what scoring needs (forest, schema, SHAP table);
+the sklearn model, its LabelEncoders and the explainer are unpickled on first
+use, so a version with a SHAP table serves without importing sklearn or shap.
+"""
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from feature_encoder import FeatureEncoder
+from forest_engine import CompiledForest
+from shap_explainer import FEATURES, EligibilityExplainer
+from shap_table import ShapTable
+
+REGISTRY_FILE = "registry.json"
+SHAP_TABLE_FILE = "shap_table.npz"
+CATEGORICAL_FEATURES = ["caste", "housing_status"]
+
+
+class ModelBundle:
+    """One model version: compiled forest, feature encoder, schema and SHAP table
+
+    `model`, `encoders` and `explainer` are unpickled from `version_dir` the
+    first time they are used; scoring rows the SHAP table covers needs none of
+    them.
+    """
+
+    def __init__(self, version: str, forest: CompiledForest, schema: Dict[str, Any], version_dir: str,
+                 shap_table: Optional[ShapTable] = None):
+        self.version = version
+        self.forest = forest
+        self.schema = schema
+        self.version_dir = version_dir
+        self.encoder = FeatureEncoder.from_schema(schema)
+        self._artefacts: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Only a table built from this exact forest is used; otherwise everything is scored live
+        self.shap_table = shap_table if shap_table is not None and shap_table.matches(forest) else None
+        if shap_table is not None and self.shap_table is None:
+            print(f"SHAP table for model {version} is stale; falling back to live SHAP")
+
+    def _artefact(self, name: str):
+        with self._lock:
+            if name not in self._artefacts:
+                import joblib
+
+                self._artefacts[name] = joblib.load(os.path.join(self.version_dir, f"{name}.pkl"))
+            return self._artefacts[name]
+
+    @property
+    def model(self):
+        return self._artefact("model")
+
+    @property
+    def encoders(self):
+        return self._artefact("encoders")
+
+    @property
+    def explainer(self) -> EligibilityExplainer:
+        return self._artefact("explainer")
+
+    @property
+    def explainer_loaded(self) -> bool:
+        return "explainer" in self._artefacts
+
+    @property
+    def expected_value(self) -> float:
+        """SHAP base value for the eligible class; versions registered before the schema recorded it ask the explainer"""
+        if self.schema.get("expected_value") is not None:
+            return self.schema["expected_value"]
+        return self.explainer.expected_value
+
+    def contributions(self, shap_row) -> Dict[str, float]:
+        """Map one row of SHAP values onto feature names"""
+        return {name: float(value) for name, value in zip(self.feature_names, shap_row)}
+
+    @property
+    def feature_names(self) -> List[str]:
+        return list(self.schema["features"])
+
+    def predict_and_explain(self, X: np.ndarray):
+        """Probabilities and SHAP values for encoded rows, from the SHAP table for every row it covers"""
+        if self.shap_table is None:
+            return self.forest.predict_proba(X), self.explainer.explain(X)
+        proba, shap_values, found = self.shap_table.lookup(X)
+        if not found.all():
+            missing = ~found
+            proba[missing] = self.forest.predict_proba(X[missing])
+            shap_values[missing] = self.explainer.explain(X[missing])
+        return proba, shap_values
+
+    def warm_up(self):
+        """Score and explain a representative row so first requests do not pay for lazy initialisation
+
+        With a SHAP table the explainer is left unloaded until a row falls outside the table.
+        """
+        row = np.zeros((1, len(self.feature_names)), dtype=float)
+        self.forest.predict_proba(row)
+        if self.shap_table is None:
+            self.explainer.explain(row)
+        self.predict_and_explain(row)
+
+
+def build_schema(model, encoders, metrics: Optional[Dict[str, Any]] = None,
+                 expected_value: Optional[float] = None) -> Dict[str, Any]:
+    import sklearn
+
+    return {
+        "features": list(FEATURES),
+        "categories": {col: [str(c) for c in encoders[col].classes_] for col in CATEGORICAL_FEATURES},
+        "classes": [c.item() if hasattr(c, "item") else c for c in model.classes_],
+        "n_estimators": len(model.estimators_),
+        "sklearn_version": sklearn.__version__,
+        "metrics": metrics or {},
+        "expected_value": expected_value,
+        "created_at": datetime.now().isoformat(),
+    }
+
+
+class ModelRegistry:
+    """Directory of versioned model artefacts with an active-version pointer"""
+
+    def __init__(self, path: str = "models"):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read_index(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path, REGISTRY_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"active": None, "versions": []}
+
+    def _write_index(self, index: Dict[str, Any]):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, f"{REGISTRY_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, REGISTRY_FILE))
+
+    def versions(self) -> List[str]:
+        return self._read_index()["versions"]
+
+    def active_version(self) -> Optional[str]:
+        return self._read_index()["active"]
+
+    def schema(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self.path, version, "schema.json")) as f:
+            return json.load(f)
+
+    def register(self, model, encoders, metrics: Optional[Dict[str, Any]] = None, activate: bool = True,
+                 build_shap_table: bool = True) -> str:
+        """Store a new immutable version and return its name (v1, v2, ...)"""
+        import joblib
+
+        with self._lock:
+            index = self._read_index()
+            version = f"v{len(index['versions']) + 1}"
+            while os.path.exists(os.path.join(self.path, version)):
+                version = f"v{int(version[1:]) + 1}"
+
+            tmp_dir = os.path.join(self.path, f".{version}.tmp")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            joblib.dump(model, os.path.join(tmp_dir, "model.pkl"))
+            joblib.dump(encoders, os.path.join(tmp_dir, "encoders.pkl"))
+            forest = CompiledForest.from_sklearn(model)
+            explainer = EligibilityExplainer(model)
+            schema = build_schema(model, encoders, metrics, explainer.expected_value)
+            joblib.dump(forest, os.path.join(tmp_dir, "forest.pkl"))
+            joblib.dump(explainer, os.path.join(tmp_dir, "explainer.pkl"))
+            with open(os.path.join(tmp_dir, "schema.json"), "w") as f:
+                json.dump(schema, f, indent=2)
+            if build_shap_table:
+                ShapTable.build(forest, explainer, schema["categories"], schema["features"]).save(
+                    os.path.join(tmp_dir, SHAP_TABLE_FILE))
+            os.replace(tmp_dir, os.path.join(self.path, version))
+
+            index["versions"].append(version)
+            if activate or index["active"] is None:
+                index["active"] = version
+            self._write_index(index)
+        return version
+
+    def activate(self, version: str):
+        """Point the registry at an existing version"""
+        with self._lock:
+            index = self._read_index()
+            if version not in index["versions"]:
+                raise KeyError(f"Unknown model version {version!r}")
+            index["active"] = version
+            self._write_index(index)
+
+    def load(self, version: str) -> ModelBundle:
+        """Load a version's forest, schema and SHAP table (the pickled model, encoders and explainer load on use)"""
+        import joblib
+
+        if version not in self.versions():
+            raise KeyError(f"Unknown model version {version!r}")
+        version_dir = os.path.join(self.path, version)
+        shap_table_path = os.path.join(version_dir, SHAP_TABLE_FILE)
+        return ModelBundle(
+            version,
+            joblib.load(os.path.join(version_dir, "forest.pkl")),
+            self.schema(version),
+            version_dir,
+            ShapTable.load(shap_table_path) if os.path.exists(shap_table_path) else None,
+        )
+
+    def load_active(self) -> ModelBundle:
+        """Load the active version; an empty registry is an error (register a version first)"""
+        version = self.active_version()
+        if version is None:
+            raise LookupError(
+                f"No model version is registered in {self.path}; run train_model.py or "
+                f"`python model_registry.py --registry {self.path} register` first"
+            )
+        return self.load(version)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or switch registered model versions")
+    parser.add_argument("--registry", default="models")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="list registered versions")
+    register_parser = subparsers.add_parser("register", help="register pickled model and encoders as a new version")
+    register_parser.add_argument("--model", default="eligibility_model.pkl")
+    register_parser.add_argument("--encoders", default="label_encoders.pkl")
+    register_parser.add_argument("--no-activate", action="store_true",
+                                 help="keep the current active version (the first version is always active)")
+    activate_parser = subparsers.add_parser("activate", help="make a version active for new processes")
+    activate_parser.add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == "register":
+        import joblib
+
+        version = registry.register(joblib.load(args.model), joblib.load(args.encoders),
+                                    activate=not args.no_activate)
+        print(f"Registered {args.model} as model version {version}")
+    elif args.command == "activate":
+        registry.activate(args.version)
+    active = registry.active_version()
+    for version in registry.versions():
+        schema = registry.schema(version)
+        has_table = os.path.exists(os.path.join(registry.path, version, SHAP_TABLE_FILE))
+        print(f"{'*' if version == active else ' '} {version}  {schema['created_at']}  "
+              f"{'shap-table' if has_table else 'live-shap'}  {schema['metrics']}")
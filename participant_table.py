@@ -0,0 +1,452 @@
+"""Compact in-memory participant table
+
+Participants are held column-wise instead of as one dict per row:
+
+    participant_id, aadhaar    int64
+    age                        int16
+    income, confidence         float64 (confidence NaN when not recorded)
+    land_ownership, eligible   bool
+    caste, housing_status      uint8  codes into per-column category lists
+    model_version              uint16 codes into a category list
+    decision_date              int64  microseconds since the epoch
+    name, explanation_cid      UTF-8 string arenas (one buffer plus offsets)
+    income_integral            bool   income was an integer
+    recorded                   uint16 bitmask of the fields the record has
+
+A row costs about an eighth of the equivalent dict. Dicts are only built at
+the API boundary (`row`, `rows`), and aggregates are NumPy reductions over
+the columns. Fields outside the participant schema are not kept; within it,
+integer incomes stay integers and fields a record lacks stay absent.
+decision_date strings that are not in the naive `datetime.isoformat()` form
+are kept verbatim on the side, so every row materialises exactly as stored.
+"""
+import warnings
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from columnar_db import (ALL_RECORDED, COLUMNS, FIELD_BITS, INCOME_INTEGRAL, RECORD_FIELDS, RECORDED,
+                          ColumnarDatabase, is_integral, recorded_bits)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+NUMERIC = {
+    "participant_id": np.int64,
+    "aadhaar": np.int64,
+    "age": np.int16,
+    "income": np.float64,
+    "land_ownership": np.bool_,
+    "eligible": np.bool_,
+    "confidence": np.float64,
+    "decision_date": np.int64,
+}
+CATEGORICAL = {"caste": np.uint8, "housing_status": np.uint8, "model_version": np.uint16}
+AUXILIARY = {INCOME_INTEGRAL: np.bool_, RECORDED: np.uint16}
+STRINGS = ("name", "explanation_cid")
+NULLABLE_STRINGS = ("explanation_cid",)
+FIELDS = RECORD_FIELDS
+
+
+def encode_timestamp(value: Optional[str]) -> Tuple[int, Optional[str]]:
+    """(microseconds since the epoch, None), or (NO_TIMESTAMP, value) when value is not a naive isoformat()"""
+    if value is None or value == "":
+        return NO_TIMESTAMP, None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return NO_TIMESTAMP, str(value)
+    if parsed.tzinfo is not None or parsed.isoformat() != value:
+        return NO_TIMESTAMP, value
+    return (parsed - EPOCH) // MICROSECOND, None
+
+
+def decode_timestamp(micros: int) -> Optional[str]:
+    if micros == NO_TIMESTAMP:
+        return None
+    return (EPOCH + timedelta(microseconds=int(micros))).isoformat()
+
+
+def encode_timestamps(values: np.ndarray) -> Tuple[np.ndarray, Dict[int, str]]:
+    """Vectorised encode_timestamp over a string array; returns (micros, {position: verbatim string})"""
+    strings = np.asarray(values, dtype=str)
+    try:
+        with warnings.catch_warnings():
+            # Offsets are parsed (as UTC) with a deprecation warning; those rows are kept verbatim below
+            warnings.simplefilter("ignore")
+            parsed = strings.astype("datetime64[us]")
+    except ValueError:
+        encoded = [encode_timestamp(value) for value in strings.tolist()]
+        micros = np.fromiter((value for value, _ in encoded), dtype=np.int64, count=len(encoded))
+        return micros, {position: raw for position, (_, raw) in enumerate(encoded) if raw is not None}
+    micros = parsed.astype(np.int64)
+    missing = np.isnat(parsed)
+    # isoformat() drops a zero microsecond part
+    full = np.datetime_as_string(parsed, unit="us")
+    canonical = np.where(micros % 1_000_000 == 0, full.astype("<U19") == strings, full == strings) & ~missing
+    micros = np.where(canonical, micros, NO_TIMESTAMP)
+    overrides = {int(position): strings[position] for position in np.flatnonzero(~canonical & (strings != ""))}
+    return micros, overrides
+
+
+def format_timestamps(micros: np.ndarray) -> np.ndarray:
+    """isoformat() strings for an array of epoch microseconds ("" for NO_TIMESTAMP)"""
+    missing = micros == NO_TIMESTAMP
+    full = np.datetime_as_string(np.where(missing, 0, micros).astype("datetime64[us]"), unit="us")
+    formatted = np.where(micros % 1_000_000 == 0, full.astype("<U19"), full)
+    return np.where(missing, "", formatted)
+
+
+class StringArena:
+    """Append-only strings packed into one UTF-8 buffer
+
+    Row i spans data[ends[i - 1]:ends[i]]. End offsets are uint32 until the
+    buffer passes 4 GiB. With `nullable`, None is kept apart from "".
+    """
+
+    def __init__(self, nullable: bool = False):
+        self._data = bytearray()
+        self._ends = np.zeros(1024, dtype=np.uint32)
+        self._present = np.zeros(1024, dtype=np.bool_) if nullable else None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data) + self._ends.nbytes + (self._present.nbytes if self._present is not None else 0)
+
+    def _reserve(self, count: int, size: int):
+        needed = self._count + count
+        if needed > len(self._ends):
+            capacity = max(needed, len(self._ends) * 2)
+            self._ends = np.resize(self._ends, capacity)
+            if self._present is not None:
+                self._present = np.resize(self._present, capacity)
+        if self._ends.dtype == np.uint32 and len(self._data) + size > np.iinfo(np.uint32).max:
+            self._ends = self._ends.astype(np.int64)
+
+    def append(self, value: Optional[str]):
+        encoded = str(value).encode() if value is not None else b""
+        self._reserve(1, len(encoded))
+        self._data += encoded
+        self._ends[self._count] = len(self._data)
+        if self._present is not None:
+            self._present[self._count] = value is not None
+        self._count += 1
+
+    def extend_array(self, values: np.ndarray, present: Optional[np.ndarray] = None):
+        """Append a NumPy string array in one pass (`present` False marks None)"""
+        strings = values.tolist()
+        data = "".join(strings).encode()
+        lengths = np.char.str_len(np.asarray(values, dtype=str)).astype(np.int64)
+        if len(data) != int(lengths.sum()):
+            lengths = np.fromiter((len(value.encode()) for value in strings), dtype=np.int64, count=len(strings))
+        self._reserve(len(strings), len(data))
+        start = self._count
+        self._ends[start:start + len(strings)] = len(self._data) + np.cumsum(lengths)
+        if self._present is not None:
+            self._present[start:start + len(strings)] = True if present is None else present
+        self._data += data
+        self._count += len(strings)
+
+    def get(self, position: int) -> Optional[str]:
+        if self._present is not None and not self._present[position]:
+            return None
+        start = int(self._ends[position - 1]) if position else 0
+        return self._data[start:int(self._ends[position])].decode()
+
+    def take(self, positions: Sequence[int]) -> List[Optional[str]]:
+        return [self.get(position) for position in positions]
+
+    def to_array(self, stop: Optional[int] = None) -> np.ndarray:
+        """The strings as a fixed-width unicode array ("" for None), built from the buffer and offsets"""
+        stop = self._count if stop is None else stop
+        ends = self._ends[:stop].astype(np.int64)
+        size = int(ends[-1]) if stop else 0
+        data = np.frombuffer(bytes(self._data[:size]), dtype=np.uint8)
+        if (data & 0x80).any():
+            # Character offsets: one per byte that does not continue a multi-byte UTF-8 sequence
+            char_offsets = np.concatenate(([0], np.cumsum((data & 0xC0) != 0x80)))
+            ends = char_offsets[ends]
+            codepoints = np.frombuffer(data.tobytes().decode().encode("utf-32-le"), dtype="<u4")
+        else:
+            codepoints = data.astype(np.uint32)
+        starts = np.concatenate(([0], ends[:-1])) if stop else ends
+        lengths = ends - starts
+        width = max(int(lengths.max()) if stop else 0, 1)
+        # Rows are contiguous in the buffer, so the code points fill the matrix row by row in order
+        matrix = np.zeros((stop, width), dtype=np.uint32)
+        matrix[np.repeat(np.arange(stop), lengths), np.arange(len(codepoints)) - np.repeat(starts, lengths)] = codepoints
+        return matrix.view(f"<U{width}").reshape(stop)
+
+
+class ParticipantTable:
+    """Typed, growable participant columns with dictionary codes, epoch timestamps and string arenas
+
+    Not thread-safe on its own; ParticipantIndex serialises access.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._count = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype=dtype) for name, dtype in {**NUMERIC, **CATEGORICAL, **AUXILIARY}.items()
+        }
+        self._categories: Dict[str, List[Any]] = {name: [] for name in CATEGORICAL}
+        self._codes: Dict[str, Dict[Any, int]] = {name: {} for name in CATEGORICAL}
+        self._strings: Dict[str, StringArena] = {name: StringArena(nullable=name in NULLABLE_STRINGS)
+                                                 for name in STRINGS}
+        self._raw_dates: Dict[int, str] = {}
+        self._ids_sorted = True
+        self._id_order: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the table's buffers (allocated capacity included)"""
+        return (sum(values.nbytes for values in self._columns.values())
+                + sum(arena.nbytes for arena in self._strings.values()))
+
+    @property
+    def ids_sorted(self) -> bool:
+        return self._ids_sorted
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of a typed column (category codes for categorical columns)"""
+        view = self._columns[name][:self._count]
+        view.flags.writeable = False
+        return view
+
+    def categories(self, name: str) -> List[Any]:
+        return list(self._categories[name])
+
+    def code(self, name: str, value: Any) -> Optional[int]:
+        """Category code of a value, or None if no row has it"""
+        return self._codes[name].get(value)
+
+    def raw_dates(self, start: int = 0, stop: Optional[int] = None) -> Dict[int, str]:
+        """decision_date strings kept verbatim (not naive isoformat()), by row position"""
+        stop = self._count if stop is None else stop
+        return {position: value for position, value in self._raw_dates.items() if start <= position < stop}
+
+    def _reserve(self, count: int):
+        needed = self._count + count
+        capacity = len(self._columns["participant_id"])
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            for name, values in self._columns.items():
+                self._columns[name] = np.resize(values, capacity)
+
+    def _encode_category(self, name: str, value: Any) -> int:
+        code = self._codes[name].get(value)
+        if code is None:
+            code = len(self._categories[name])
+            if code > np.iinfo(CATEGORICAL[name]).max:
+                raise ValueError(f"Too many distinct {name} values")
+            self._categories[name].append(value)
+            self._codes[name][value] = code
+        return code
+
+    def _note_id(self, participant_id: int):
+        if self._count and participant_id < self._columns["participant_id"][self._count - 1]:
+            self._ids_sorted = False
+        self._id_order = None
+
+    def append(self, participant: Dict[str, Any]):
+        self._reserve(1)
+        position = self._count
+        columns = self._columns
+        self._note_id(participant["participant_id"])
+        columns["participant_id"][position] = participant["participant_id"]
+        columns["aadhaar"][position] = participant["aadhaar"]
+        columns["age"][position] = participant.get("age") or 0
+        columns["income"][position] = participant.get("income") or 0
+        columns[INCOME_INTEGRAL][position] = is_integral(participant.get("income"))
+        columns[RECORDED][position] = recorded_bits(participant)
+        columns["land_ownership"][position] = bool(participant.get("land_ownership", False))
+        columns["eligible"][position] = bool(participant.get("eligible", False))
+        confidence = participant.get("confidence")
+        columns["confidence"][position] = np.nan if confidence is None else confidence
+        micros, raw = encode_timestamp(participant.get("decision_date"))
+        columns["decision_date"][position] = micros
+        if raw is not None:
+            self._raw_dates[position] = raw
+        for name in CATEGORICAL:
+            columns[name][position] = self._encode_category(name, participant.get(name))
+        self._strings["name"].append(participant.get("name") or "")
+        self._strings["explanation_cid"].append(participant.get("explanation_cid") or None)
+        self._count += 1
+
+    def extend(self, participants: Iterable[Dict[str, Any]]):
+        for participant in participants:
+            self.append(participant)
+
+    @classmethod
+    def from_participants(cls, participants: Iterable[Dict[str, Any]]) -> "ParticipantTable":
+        table = cls()
+        table.extend(participants)
+        return table
+
+    @classmethod
+    def from_columnar(cls, db: ColumnarDatabase) -> "ParticipantTable":
+        """Load a columnar database column by column, without building any dicts"""
+        rows = len(db)
+        table = cls(capacity=max(rows, 1024))
+        available = set(db.column_names)
+        for name, dtype in NUMERIC.items():
+            if name == "decision_date":
+                continue
+            if name in available:
+                table._columns[name][:rows] = db.column(name)
+            elif name == "confidence":
+                table._columns[name][:rows] = np.nan
+        for name in CATEGORICAL:
+            if name not in available:
+                table._columns[name][:rows] = table._encode_category(name, None)
+                continue
+            # Columnar snapshots store missing model versions as ""
+            categories = [None if name == "model_version" and value == "" else value for value in db.categories(name)]
+            if not categories:
+                values, codes = np.unique(np.asarray(db.column(name)), return_inverse=True)
+                categories = [None if value == "" else value for value in values.tolist()]
+            else:
+                codes = np.asarray(db.column(name))
+            mapping = np.array([table._encode_category(name, value) for value in categories], dtype=CATEGORICAL[name])
+            table._columns[name][:rows] = mapping[codes] if len(mapping) else 0
+        if "decision_date" in available:
+            micros, table._raw_dates = encode_timestamps(np.asarray(db.column("decision_date")))
+            table._columns["decision_date"][:rows] = micros
+        else:
+            table._columns["decision_date"][:rows] = NO_TIMESTAMP
+        if INCOME_INTEGRAL in available:
+            table._columns[INCOME_INTEGRAL][:rows] = db.column(INCOME_INTEGRAL)
+        # Older layouts did not record which fields each row had; rows carry every stored column
+        table._columns[RECORDED][:rows] = (db.column(RECORDED) if RECORDED in available else
+                                           sum(bit for name, bit in FIELD_BITS.items() if name in available))
+        names = np.asarray(db.column("name"))
+        table._strings["name"].extend_array(names)
+        cids = np.asarray(db.column("explanation_cid"))
+        table._strings["explanation_cid"].extend_array(cids, present=cids != "")
+        table._count = rows
+        ids = table._columns["participant_id"][:rows]
+        table._ids_sorted = bool(np.all(ids[1:] >= ids[:-1]))
+        return table
+
+    def id_order(self) -> np.ndarray:
+        """Row positions in participant_id order"""
+        if self._ids_sorted:
+            return np.arange(self._count)
+        if self._id_order is None:
+            self._id_order = np.argsort(self.column("participant_id"), kind="stable")
+        return self._id_order
+
+    def position_of(self, participant_id: int) -> Optional[int]:
+        ids = self.column("participant_id")
+        if self._ids_sorted:
+            position = int(np.searchsorted(ids, participant_id, side="right")) - 1
+            return position if position >= 0 and ids[position] == participant_id else None
+        matches = np.flatnonzero(ids == participant_id)
+        return int(matches[-1]) if len(matches) else None
+
+    def _values(self, name: str, positions: np.ndarray) -> List[Any]:
+        if name in self._strings:
+            return self._strings[name].take(positions.tolist())
+        values = self._columns[name][positions]
+        if name in CATEGORICAL:
+            categories = self._categories[name]
+            return [categories[code] for code in values.tolist()]
+        if name == "confidence":
+            return [None if value != value else value for value in values.tolist()]
+        if name == "decision_date":
+            return [
+                self._raw_dates.get(position) if micros == NO_TIMESTAMP else decode_timestamp(micros)
+                for position, micros in zip(positions.tolist(), values.tolist())
+            ]
+        if name == "income":
+            integral = self._columns[INCOME_INTEGRAL][positions].tolist()
+            return [int(value) if flag else value for value, flag in zip(values.tolist(), integral)]
+        return values.tolist()
+
+    def rows(self, positions: Iterable[int], fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Materialise participant dicts for row positions
+
+        Full rows leave out fields the record never had; with `fields`, every
+        requested field is present and those are None.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        project = fields is not None
+        fields = FIELDS if fields is None else fields
+        values = [self._values(name, positions) for name in fields]
+        recorded = self._columns[RECORDED][positions]
+        if bool(np.all(recorded == ALL_RECORDED)):
+            return [dict(zip(fields, row)) for row in zip(*values)]
+        bits = [FIELD_BITS[name] for name in fields]
+        if project:
+            return [{name: value if present & bit else None for name, bit, value in zip(fields, bits, row)}
+                    for present, row in zip(recorded.tolist(), zip(*values))]
+        return [{name: value for name, bit, value in zip(fields, bits, row) if present & bit}
+                for present, row in zip(recorded.tolist(), zip(*values))]
+
+    def row(self, position: int, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        return self.rows([position], fields)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Eligibility totals and per-category breakdowns as column reductions"""
+        eligible = self.column("eligible")
+        eligible_count = int(np.count_nonzero(eligible))
+        return {
+            "total_participants": self._count,
+            "eligible_count": eligible_count,
+            "not_eligible_count": self._count - eligible_count,
+            "by_caste": self._breakdown("caste", eligible),
+            "by_housing_status": self._breakdown("housing_status", eligible),
+        }
+
+    def _breakdown(self, name: str, eligible: np.ndarray) -> Dict[str, Dict[str, int]]:
+        categories = self._categories[name]
+        codes = self.column(name)
+        totals = np.bincount(codes, minlength=len(categories))
+        eligible_totals = np.bincount(codes[eligible], minlength=len(categories))
+        ordered = sorted(range(len(categories)), key=lambda code: str(categories[code]))
+        return {
+            categories[code]: {"total": int(totals[code]), "eligible": int(eligible_totals[code])}
+            for code in ordered if totals[code]
+        }
+
+    def to_columns(self) -> Dict[str, Any]:
+        """Columns in the columnar_db layout (see participants_to_columns), for write_columns"""
+        rows = self._count
+        columns: Dict[str, Any] = {}
+        categories: Dict[str, List[Any]] = {}
+        for name, dtype in COLUMNS.items():
+            if name in ("caste", "housing_status"):
+                # columnar_db keeps categories sorted
+                current = self._categories[name]
+                order = sorted(range(len(current)), key=lambda code: (current[code] is None, str(current[code])))
+                remap = np.empty(max(len(current), 1), dtype=dtype)
+                remap[order] = np.arange(len(order))
+                categories[name] = [current[code] for code in order]
+                columns[name] = remap[self._columns[name][:rows]]
+            elif name == "model_version":
+                versions = np.array(["" if value is None else str(value) for value in self._categories[name]] or [""])
+                columns[name] = versions[self._columns[name][:rows]]
+            elif name == "decision_date":
+                formatted = format_timestamps(self._columns[name][:rows])
+                if self._raw_dates:
+                    formatted = formatted.astype(object)
+                    for position, value in self._raw_dates.items():
+                        formatted[position] = value
+                    formatted = formatted.astype(str)
+                columns[name] = formatted
+            elif name in self._strings:
+                columns[name] = self._strings[name].to_array(rows)
+            else:
+                columns[name] = self._columns[name][:rows].astype(dtype)
+        for name in AUXILIARY:
+            columns[name] = self._columns[name][:rows].copy()
+        return {"columns": columns, "categories": categories}
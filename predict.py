@@ -1,13 +1,12 @@
-import pandas as pd
-import joblib
+import os
 
-model = joblib.load("eligibility_model.pkl")
-encoders = joblib.load("label_encoders.pkl")
+from model_registry import ModelRegistry
+
+bundle = ModelRegistry(os.environ.get("MODEL_REGISTRY_DIR", "models")).load_active()
+encoder = bundle.encoder
+forest = bundle.forest
 
 def run_prediction(data):
-	df = pd.DataFrame([data])
-	df["land_ownership"] = df["land_ownership"].astype(int)
-	for col in ["caste", "housing_status"]:
-		df[col] = encoders[col].transform(df[col])
-	X = df[["age", "caste", "income", "land_ownership", "housing_status"]]
-	return bool(model.predict(X)[0])
\ No newline at end of file
+	# Raises UnknownCategoryError for a caste / housing_status the model was not trained on
+	X = encoder.encode(data)
+	return bool(forest.predict(X)[0])
\ No newline at end of file
@@ -1,8 +1,22 @@
+import argparse
 import json
+import os
+import resource
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import joblib
 from pathlib import Path
 
+from feature_encoder import FeatureEncoder
+from forest_engine import CompiledForest
+
+FEATURES = ['age', 'caste', 'income', 'land_ownership', 'housing_status']
+OUTPUT_COLUMNS = ['name', 'aadhaar', 'predicted_eligibility']
+READ_BLOCK_SIZE = 1 << 20
+
 def load_model_and_encoders():
     """Load trained model and label encoders"""
     try:
@@ -29,47 +43,220 @@ def preprocess_data(df, label_encoders):
     for col in ['caste', 'housing_status']:
         if col in df.columns:
             df[col] = label_encoders[col].transform(df[col])
-    
+
     # Convert boolean to int if exists
     if 'land_ownership' in df.columns:
         df['land_ownership'] = df['land_ownership'].astype(int)
-    
+
     return df
 
-def predict_eligibility(model, df):
-    """Make eligibility predictions"""
-    features = ['age', 'caste', 'income', 'land_ownership', 'housing_status']
-    
+def predict_eligibility(model, df, label_encoders, forest=None, encoder=None):
+    """Make eligibility predictions from raw applicant columns"""
+    features = list(FEATURES)
+
     # Check if all required features exist
     missing_features = [f for f in features if f not in df.columns]
     if missing_features:
         print(f"Warning: Missing features {missing_features} - using available features")
         features = [f for f in features if f in df.columns]
-    
-    X = df[features]
-    return model.predict(X)
+        return model.predict(preprocess_data(df[features].copy(), label_encoders))
+
+    # Shared feature encoder straight into a float matrix, then the compiled NumPy forest:
+    # same predictions as model.predict without pandas or sklearn per-call overhead
+    encoder = encoder or FeatureEncoder.from_label_encoders(label_encoders)
+    X = encoder.encode_columns(df)
+    forest = forest or CompiledForest.from_sklearn(model)
+    return forest.predict(X)
+
+def iter_json_array(path, chunk_size):
+    """Yield DataFrames of `chunk_size` applicants from a JSON array (or {"applicants": [...]})
+    without parsing the whole file at once"""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(READ_BLOCK_SIZE)
+        # Skip to the first array; for an object this is the "applicants" list
+        start = buffer.find('"applicants"') if buffer.lstrip().startswith('{') else 0
+        position = buffer.find('[', start) if start >= 0 else -1
+        while position < 0:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                return
+            buffer += block
+            start = buffer.find('"applicants"') if buffer.lstrip().startswith('{') else 0
+            position = buffer.find('[', start) if start >= 0 else -1
+        position += 1
+
+        rows = []
+        eof = False
+        while True:
+            # Skip separators between records
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                break
+            try:
+                row, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                block = f.read(READ_BLOCK_SIZE)
+                eof = not block
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+            rows.append(row)
+            position = end
+            if len(rows) >= chunk_size:
+                yield pd.DataFrame(rows)
+                rows = []
+            if position > READ_BLOCK_SIZE:
+                buffer = buffer[position:]
+                position = 0
+        if rows:
+            yield pd.DataFrame(rows)
+
+def detect_input_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if suffix == '.csv':
+        return 'csv'
+    return 'json'
+
+def iter_input_chunks(path, input_format, chunk_size):
+    """Yield applicant DataFrames of at most `chunk_size` rows"""
+    if input_format == 'csv':
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif input_format == 'ndjson':
+        with pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False) as reader:
+            yield from reader
+    else:
+        yield from iter_json_array(path, chunk_size)
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they complete"""
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self._parquet = None
+        self._started = False
+        if output_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                print("Error: Parquet output requires pyarrow (pip install pyarrow)")
+                exit(1)
+
+    def write(self, df):
+        if self.output_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        elif not self._started:
+            pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(self.path, index=False)
+
+# Loaded once per worker process by init_worker
+_worker_state = {}
+
+def init_worker():
+    model, label_encoders = load_model_and_encoders()
+    _worker_state.update(model=model, label_encoders=label_encoders, forest=CompiledForest.from_sklearn(model),
+                         encoder=FeatureEncoder.from_label_encoders(label_encoders))
+
+def score_chunk(df):
+    """Encode and score one chunk; runs in a worker process"""
+    df['predicted_eligibility'] = predict_eligibility(
+        _worker_state['model'], df, _worker_state['label_encoders'], _worker_state['forest'], _worker_state['encoder']
+    )
+    return df[OUTPUT_COLUMNS]
+
+def stream_predictions(input_path, output_path, input_format, output_format, workers, chunk_size):
+    """Score an input file chunk by chunk across a process pool, writing results in input order
+
+    At most 2 * workers chunks are in flight, so memory stays bounded by
+    chunk_size regardless of the input size.
+    """
+    writer = ChunkWriter(output_path, output_format)
+    rows = chunks = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        in_flight = deque()
+        for chunk in iter_input_chunks(input_path, input_format, chunk_size):
+            in_flight.append(pool.submit(score_chunk, chunk))
+            if len(in_flight) >= 2 * workers:
+                scored = in_flight.popleft().result()
+                writer.write(scored)
+                rows += len(scored)
+                chunks += 1
+        while in_flight:
+            scored = in_flight.popleft().result()
+            writer.write(scored)
+            rows += len(scored)
+            chunks += 1
+    writer.close()
+    elapsed = time.perf_counter() - started
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Predictions complete. Results saved to {output_path}")
+    print(f"Scored {rows:,} applicants in {chunks:,} chunks of up to {chunk_size:,} "
+          f"with {workers} workers in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    print(f"Peak memory (main process): {peak_rss_mb:.1f} MB")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score applicants for PM-KISAN eligibility")
+    parser.add_argument('--input', default='synthetic_data.json',
+                        help="JSON array / {\"applicants\": [...]}, NDJSON (.ndjson/.jsonl) or CSV file")
+    parser.add_argument('--output', default='predictions.csv', help="CSV or Parquet (.parquet) output file")
+    parser.add_argument('--input-format', choices=['json', 'ndjson', 'csv'],
+                        help="Input format (default: from the file extension)")
+    parser.add_argument('--output-format', choices=['csv', 'parquet'],
+                        help="Output format (default: from the file extension)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the input in chunks through a process pool (implied by --workers/--chunk-size)")
+    parser.add_argument('--workers', type=int, help="Scoring processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, help="Applicants per chunk (default: 50000)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    if args.stream or args.workers or args.chunk_size:
+        output_format = args.output_format or ('parquet' if Path(args.output).suffix.lower() == '.parquet' else 'csv')
+        stream_predictions(
+            args.input, args.output,
+            args.input_format or detect_input_format(args.input), output_format,
+            workers=args.workers or os.cpu_count() or 1,
+            chunk_size=args.chunk_size or 50000
+        )
+        return
+
     # Load model and encoders
     model, label_encoders = load_model_and_encoders()
-    
+
     # Load data
-    df = load_applicant_data()
-    
-    # Preprocess data
-    processed_df = preprocess_data(df.copy(), label_encoders)
-    
-    # Make predictions
-    predictions = predict_eligibility(model, processed_df)
+    df = load_applicant_data(args.input)
+
+    # Encode and predict
+    predictions = predict_eligibility(model, df, label_encoders)
     df['predicted_eligibility'] = predictions
-    
+
     # Save results
-    output_file = 'predictions.csv'
-    df[['name', 'aadhaar', 'predicted_eligibility']].to_csv(output_file, index=False)
-    
+    output_file = args.output
+    df[OUTPUT_COLUMNS].to_csv(output_file, index=False)
+
     print(f"Predictions complete. Results saved to {output_file}")
     print("\nSample predictions:")
-    print(df[['name', 'aadhaar', 'predicted_eligibility']].head().to_string(index=False))
+    print(df[OUTPUT_COLUMNS].head().to_string(index=False))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+
+FEATURES = ["age", "caste", "income", "land_ownership", "housing_status"]
+
+
+class EligibilityExplainer:
+    """SHAP TreeExplainer built once per model and shared between threads"""
+
+    def __init__(self, model, feature_names=None):
+        # Imported here so importing this module (e.g. for FEATURES) does not load shap
+        import shap
+
+        self.model = model
+        self.feature_names = list(feature_names or FEATURES)
+        self._explainer = shap.TreeExplainer(model)
+        self._lock = threading.Lock()
+        self.positive_index = self._positive_class_index(model)
+        self.expected_value = self._normalise_expected_value(self._explainer.expected_value)
+
+    def __getstate__(self):
+        # The lock cannot be pickled; the built TreeExplainer can, so loading skips the build
+        state = dict(self.__dict__)
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _positive_class_index(model):
+        """Column of the 'eligible' class in SHAP / predict_proba outputs"""
+        classes = list(getattr(model, "classes_", []))
+        for positive in (True, 1):
+            if positive in classes:
+                return classes.index(positive)
+        return max(len(classes) - 1, 0)
+
+    def _normalise_expected_value(self, expected_value) -> float:
+        """Reduce the explainer's base value to a float for the eligible class"""
+        values = np.atleast_1d(np.asarray(expected_value, dtype=float))
+        if values.size > 1:
+            return float(values[self.positive_index])
+        return float(values[0])
+
+    def _normalise_shap_values(self, shap_values) -> np.ndarray:
+        """Reduce any SHAP output layout to an (n_rows, n_features) array for the eligible class"""
+        if isinstance(shap_values, list):
+            shap_values = shap_values[self.positive_index] if len(shap_values) > 1 else shap_values[0]
+        values = np.asarray(shap_values, dtype=float)
+        if values.ndim == 3:
+            values = values[:, :, self.positive_index]
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        return values
+
+    def explain(self, X) -> np.ndarray:
+        """Explain many rows in one vectorised call, returns (n_rows, n_features)"""
+        X = np.asarray(X, dtype=float)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        with self._lock:
+            shap_values = self._explainer.shap_values(X, check_additivity=False)
+        return self._normalise_shap_values(shap_values)
+
+    def explain_row(self, x) -> np.ndarray:
+        """Explain a single encoded row, returns (n_features,)"""
+        return self.explain(np.asarray(x, dtype=float).reshape(1, -1))[0]
+
+    def contributions(self, shap_row) -> dict:
+        """Map one row of SHAP values onto feature names"""
+        return {name: float(value) for name, value in zip(self.feature_names, shap_row)}
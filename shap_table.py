@@ -0,0 +1,195 @@
+"""Precomputed prediction and SHAP lookup table for a compiled forest
+
+A tree only looks at which side of its split thresholds an input falls, so
+every feature can be cut into bins at the distinct thresholds the forest uses
+for it. All inputs in the same cell (one bin per feature) reach the same
+leaves, and so get the same probabilities and the same path-dependent SHAP
+values. The categorical features reach only a handful of bins, age (an
+integer) and income only as many as the forest has thresholds for them, so
+the whole input space fits in a table of a few hundred thousand cells.
+
+The table is built offline for a model version (see ModelRegistry.register,
+or `python shap_table.py --version v1`) and answers scoring and explanation
+with one array lookup per row. It stores a fingerprint of the forest it was
+built from; a table whose fingerprint does not match the loaded forest is
+stale and callers fall back to live SHAP.
+"""
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rows per predict_proba / SHAP call while building
+BUILD_BLOCK_SIZE = 20000
+
+
+def forest_fingerprint(forest) -> str:
+    """Hash of the compiled forest's structure, thresholds and leaf values"""
+    digest = hashlib.sha256()
+    for array in (forest.feature, forest.threshold, forest.left, forest.right, forest.value, forest.roots):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(repr(np.asarray(forest.classes_).tolist()).encode())
+    return digest.hexdigest()
+
+
+def _bins(edges: np.ndarray, values) -> np.ndarray:
+    # Trees go left when float32(x) <= threshold, so bin b holds edges[b-1] < x <= edges[b]
+    values = np.asarray(values, dtype=np.float32).astype(np.float64)
+    return np.searchsorted(edges, values, side="left")
+
+
+class ShapTable:
+    """Probabilities and SHAP values for every reachable cell of the binned feature space"""
+
+    def __init__(self, fingerprint: str, features: Sequence[str], edges: List[np.ndarray],
+                 bin_maps: List[np.ndarray], proba: np.ndarray, shap_values: np.ndarray):
+        self.fingerprint = fingerprint
+        self.features = list(features)
+        self.edges = edges
+        # Per feature: bin index -> position along the table axis (-1 for bins no valid input reaches)
+        self.bin_maps = bin_maps
+        self.shape = tuple(int(bin_map.max()) + 1 for bin_map in bin_maps)
+        self.proba = proba
+        self.shap_values = shap_values
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.proba)
+
+    @property
+    def nbytes(self) -> int:
+        return self.proba.nbytes + self.shap_values.nbytes
+
+    @classmethod
+    def build(cls, forest, explainer, categories: Dict[str, Sequence[str]],
+              features: Optional[Sequence[str]] = None) -> "ShapTable":
+        """Bin every feature at the forest's thresholds and score one representative input per cell
+
+        Features listed in `categories` are label-encoded, so only the bins
+        holding a valid code are reachable; every bin of the other features is.
+        """
+        features = list(features or explainer.feature_names)
+        edges, bin_maps, representatives = [], [], []
+        for index, name in enumerate(features):
+            thresholds = forest.threshold[(forest.feature == index) & np.isfinite(forest.threshold)]
+            feature_edges = np.unique(thresholds)
+            if name in categories:
+                codes = np.arange(len(categories[name]), dtype=np.float64)
+                code_bins = _bins(feature_edges, codes)
+                reachable, first = np.unique(code_bins, return_index=True)
+                values = codes[first]
+            else:
+                reachable = np.arange(len(feature_edges) + 1)
+                if len(feature_edges):
+                    values = np.concatenate([[feature_edges[0] - 1.0],
+                                             (feature_edges[:-1] + feature_edges[1:]) / 2.0,
+                                             [feature_edges[-1] + 1.0]])
+                else:
+                    values = np.zeros(1)
+            if not np.array_equal(_bins(feature_edges, values), reachable):
+                raise ValueError(f"Could not place a representative value in every {name} bin")
+            bin_map = np.full(len(feature_edges) + 1, -1, dtype=np.int32)
+            bin_map[reachable] = np.arange(len(reachable), dtype=np.int32)
+            edges.append(feature_edges)
+            bin_maps.append(bin_map)
+            representatives.append(values)
+
+        grid = np.meshgrid(*representatives, indexing="ij")
+        X = np.column_stack([axis.ravel() for axis in grid])
+        proba = np.empty((len(X), len(forest.classes_)), dtype=np.float64)
+        shap_values = np.empty((len(X), len(features)), dtype=np.float64)
+        for start in range(0, len(X), BUILD_BLOCK_SIZE):
+            block = X[start:start + BUILD_BLOCK_SIZE]
+            proba[start:start + len(block)] = forest.predict_proba(block)
+            shap_values[start:start + len(block)] = explainer.explain(block)
+        return cls(forest_fingerprint(forest), features, edges, bin_maps, proba, shap_values)
+
+    def cells(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """Table row for each encoded input and a mask of the inputs the table covers"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        positions = np.empty(X.shape, dtype=np.intp)
+        for index, (edges, bin_map) in enumerate(zip(self.edges, self.bin_maps)):
+            positions[:, index] = bin_map[_bins(edges, X[:, index])]
+        found = (positions >= 0).all(axis=1) & np.isfinite(X).all(axis=1)
+        positions[~found] = 0
+        return np.ravel_multi_index(positions.T, self.shape), found
+
+    def lookup(self, X) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(probabilities, SHAP values, found mask); rows outside the table are undefined where not found"""
+        cells, found = self.cells(X)
+        return self.proba[cells], self.shap_values[cells], found
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "fingerprint": np.array(self.fingerprint),
+            "features": np.array(self.features),
+            "edges": np.concatenate(self.edges),
+            "edge_counts": np.array([len(edges) for edges in self.edges]),
+            "bin_maps": np.concatenate(self.bin_maps),
+            "proba": self.proba,
+            "shap_values": self.shap_values,
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> "ShapTable":
+        """Rebuild a table from `to_arrays` output (or an open .npz file holding it)"""
+        edge_counts = data["edge_counts"]
+        split_at = np.cumsum(edge_counts)[:-1]
+        edges = np.split(data["edges"], split_at)
+        bin_maps = np.split(data["bin_maps"], split_at + np.arange(1, len(edge_counts)))
+        return cls(str(data["fingerprint"]), data["features"].tolist(), edges, bin_maps,
+                   data["proba"], data["shap_values"])
+
+    def save(self, path: str):
+        np.savez_compressed(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path: str) -> "ShapTable":
+        with np.load(path, allow_pickle=False) as data:
+            return cls.from_arrays(data)
+
+    def matches(self, forest) -> bool:
+        return self.fingerprint == forest_fingerprint(forest)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from model_registry import SHAP_TABLE_FILE, ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Build (or rebuild) the SHAP lookup table of a model version")
+    parser.add_argument("--registry", default="models")
+    parser.add_argument("--version", help="Model version (default: the active one)")
+    parser.add_argument("--check-rows", type=int, default=2000, help="Random rows to compare against live SHAP")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    bundle = registry.load(args.version or registry.active_version())
+
+    started = time.perf_counter()
+    table = ShapTable.build(bundle.forest, bundle.explainer, bundle.schema["categories"], bundle.feature_names)
+    table.save(os.path.join(registry.path, bundle.version, SHAP_TABLE_FILE))
+    print(f"Built {table.n_cells:,} cells ({table.nbytes / 1e6:.1f} MB) for {bundle.version} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    # Random applicants plus every split threshold must match the live forest and explainer
+    rng = np.random.default_rng(0)
+    n = args.check_rows
+    X = np.column_stack([
+        rng.integers(18, 81, n),
+        rng.integers(0, len(bundle.schema["categories"]["caste"]), n),
+        rng.uniform(0, 150000, n),
+        rng.integers(0, 2, n),
+        rng.integers(0, len(bundle.schema["categories"]["housing_status"]), n),
+    ]).astype(np.float64)
+    income_edges = table.edges[bundle.feature_names.index("income")][:n]
+    X[:len(income_edges), bundle.feature_names.index("income")] = income_edges
+    proba, shap_values, found = table.lookup(X)
+    assert found.all()
+    assert np.array_equal(proba, bundle.forest.predict_proba(X)), "Table probabilities differ from the forest"
+    assert np.allclose(shap_values, bundle.explainer.explain(X)), "Table SHAP values differ from live SHAP"
+    print(f"Parity OK on {n:,} rows")
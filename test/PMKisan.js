@@ -0,0 +1,159 @@
+const { loadFixture } = require("@nomicfoundation/hardhat-toolbox/network-helpers");
+const { expect } = require("chai");
+
+describe("PMKisanRegistry", function () {
+  async function deployRegistryFixture() {
+    const [owner, otherAccount] = await ethers.getSigners();
+
+    const PMKisanRegistry = await ethers.getContractFactory("PMKisanRegistry");
+    const registry = await PMKisanRegistry.deploy();
+
+    return { registry, owner, otherAccount };
+  }
+
+  describe("storeDecision", function () {
+    it("Should store a single record for the sender", async function () {
+      const { registry, owner } = await loadFixture(deployRegistryFixture);
+
+      await registry.storeDecision("QmDatabase", "QmExplanation", "Eligible", 42);
+
+      expect(await registry.getRecordCount(owner.address)).to.equal(1);
+      const record = await registry.getRecord(owner.address, 0);
+      expect(record[0]).to.equal("QmDatabase");
+      expect(record[1]).to.equal("QmExplanation");
+      expect(record[2]).to.equal("Eligible");
+      expect(record[3]).to.equal(42);
+    });
+  });
+
+  describe("storeDecisions", function () {
+    it("Should store every decision of a batch in order", async function () {
+      const { registry, owner } = await loadFixture(deployRegistryFixture);
+
+      await registry.storeDecision("QmDatabase0", "QmExplanation0", "Eligible", 1);
+      await registry.storeDecisions(
+        ["QmDatabase1", "QmDatabase1", "QmDatabase2"],
+        ["QmExplanation1", "QmExplanation2", "QmExplanation3"],
+        ["Eligible", "Not Eligible", "Eligible"],
+        [2, 3, 4]
+      );
+
+      expect(await registry.getRecordCount(owner.address)).to.equal(4);
+      const record = await registry.getRecord(owner.address, 2);
+      expect(record[0]).to.equal("QmDatabase1");
+      expect(record[1]).to.equal("QmExplanation2");
+      expect(record[2]).to.equal("Not Eligible");
+      expect(record[3]).to.equal(3);
+    });
+
+    it("Should keep records separate per sender", async function () {
+      const { registry, owner, otherAccount } = await loadFixture(deployRegistryFixture);
+
+      await registry
+        .connect(otherAccount)
+        .storeDecisions(["QmDatabase"], ["QmExplanation"], ["Eligible"], [7]);
+
+      expect(await registry.getRecordCount(owner.address)).to.equal(0);
+      expect(await registry.getRecordCount(otherAccount.address)).to.equal(1);
+    });
+
+    it("Should revert if the arrays have different lengths", async function () {
+      const { registry } = await loadFixture(deployRegistryFixture);
+
+      await expect(
+        registry.storeDecisions(["QmDatabase"], ["QmExplanation"], ["Eligible", "Eligible"], [1, 2])
+      ).to.be.revertedWith("Array length mismatch");
+    });
+
+    it("Should accept many decisions in one transaction", async function () {
+      const { registry, owner } = await loadFixture(deployRegistryFixture);
+      const size = 50;
+      const ids = Array.from({ length: size }, (_, i) => i + 1);
+
+      await registry.storeDecisions(
+        ids.map(() => "QmDatabase"),
+        ids.map((id) => `QmExplanation${id}`),
+        ids.map((id) => (id % 2 ? "Eligible" : "Not Eligible")),
+        ids
+      );
+
+      expect(await registry.getRecordCount(owner.address)).to.equal(size);
+      const last = await registry.getRecord(owner.address, size - 1);
+      expect(last[1]).to.equal(`QmExplanation${size}`);
+    });
+  });
+
+  describe("DecisionStored", function () {
+    it("Should emit an event for a single decision", async function () {
+      const { registry, owner } = await loadFixture(deployRegistryFixture);
+
+      await expect(registry.storeDecision("QmDatabase", "QmExplanation", "Eligible", 42))
+        .to.emit(registry, "DecisionStored")
+        .withArgs(owner.address, 42, 0, "QmDatabase", "QmExplanation", "Eligible");
+    });
+
+    it("Should emit one event per decision of a batch with its record index", async function () {
+      const { registry, owner } = await loadFixture(deployRegistryFixture);
+
+      await registry.storeDecision("QmDatabase0", "QmExplanation0", "Eligible", 1);
+      const tx = registry.storeDecisions(
+        ["QmDatabase1", "QmDatabase1"],
+        ["QmExplanation1", "QmExplanation2"],
+        ["Eligible", "Not Eligible"],
+        [2, 3]
+      );
+
+      await expect(tx)
+        .to.emit(registry, "DecisionStored")
+        .withArgs(owner.address, 2, 1, "QmDatabase1", "QmExplanation1", "Eligible");
+      await expect(tx)
+        .to.emit(registry, "DecisionStored")
+        .withArgs(owner.address, 3, 2, "QmDatabase1", "QmExplanation2", "Not Eligible");
+
+      const events = await registry.queryFilter(registry.filters.DecisionStored(null, 3));
+      expect(events.length).to.equal(1);
+      expect(events[0].args.index).to.equal(2);
+    });
+  });
+
+  describe("getRecords", function () {
+    async function storedFixture() {
+      const fixture = await deployRegistryFixture();
+      const ids = [1, 2, 3, 4, 5];
+      await fixture.registry.storeDecisions(
+        ids.map(() => "QmDatabase"),
+        ids.map((id) => `QmExplanation${id}`),
+        ids.map((id) => (id % 2 ? "Eligible" : "Not Eligible")),
+        ids
+      );
+      return fixture;
+    }
+
+    it("Should return a page of records in order", async function () {
+      const { registry, owner } = await loadFixture(storedFixture);
+
+      const page = await registry.getRecords(owner.address, 1, 2);
+      expect(page.length).to.equal(2);
+      expect(page[0].explanationCID).to.equal("QmExplanation2");
+      expect(page[0].decision).to.equal("Not Eligible");
+      expect(page[1].participantId).to.equal(3);
+    });
+
+    it("Should clamp a page that runs past the last record", async function () {
+      const { registry, owner } = await loadFixture(storedFixture);
+
+      const page = await registry.getRecords(owner.address, 3, 100);
+      expect(page.length).to.equal(2);
+      expect(page[1].participantId).to.equal(5);
+
+      expect((await registry.getRecords(owner.address, 0, ethers.MaxUint256)).length).to.equal(5);
+    });
+
+    it("Should return no records past the end or for an unknown user", async function () {
+      const { registry, owner, otherAccount } = await loadFixture(storedFixture);
+
+      expect((await registry.getRecords(owner.address, 5, 10)).length).to.equal(0);
+      expect((await registry.getRecords(otherAccount.address, 0, 10)).length).to.equal(0);
+    });
+  });
+});
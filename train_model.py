@@ -60,6 +60,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 import joblib
 
+from model_registry import ModelRegistry
+
 # Load JSON data
 with open('synthetic_data.json') as f:
     data = json.load(f)['applicants']  # Assuming data is under 'applicants' key
@@ -104,6 +106,13 @@ model.fit(X_train, y_train)
 joblib.dump(model, 'eligibility_model.pkl')
 joblib.dump(label_encoders, 'label_encoders.pkl')
 
+# Register a new version; running servers pick it up via POST /admin/model/{version}/activate
+accuracy = model.score(X_test, y_test)
+version = ModelRegistry('models').register(
+    model, label_encoders, metrics={"accuracy": accuracy, "train_rows": len(X_train)}, activate=False
+)
+
 # Print success message
 print("Model trained and saved successfully.")
-print(f"Model accuracy: {model.score(X_test, y_test):.2f}")
\ No newline at end of file
+print(f"Model accuracy: {accuracy:.2f}")
+print(f"Registered as model version {version} in models/")
\ No newline at end of file
@@ -1,25 +1,42 @@
 import json
+import textwrap
 from datetime import datetime
 
-def transform_database():
+from columnar_db import write_columns
+from participant_table import ParticipantTable
+
+COLUMNAR_PATH = 'participants_db'
+JSON_BATCH_SIZE = 10000
+
+def write_database_json(path, metadata, table):
+    """Write {"metadata", "participants"} JSON, building participant dicts one batch at a time"""
+    with open(path, 'w') as f:
+        f.write('{\n  "metadata": ' + textwrap.indent(json.dumps(metadata, indent=2), '  ').lstrip() + ',\n')
+        f.write('  "participants": [')
+        for start in range(0, len(table), JSON_BATCH_SIZE):
+            for offset, participant in enumerate(table.rows(range(start, min(start + JSON_BATCH_SIZE, len(table))))):
+                separator = '\n' if start + offset == 0 else ',\n'
+                f.write(separator + textwrap.indent(json.dumps(participant, indent=2), '    '))
+        f.write('\n  ]\n}' if len(table) else ']\n}')
+
+def transform_database_table():
+    """Transform and save the database; returns (metadata, ParticipantTable) without building participant dicts"""
     # Load your current synthetic_data.json
     with open('synthetic_data.json', 'r') as f:
         current_data = json.load(f)
     
     # Transform to new format
-    new_data = {
-        "metadata": {
-            "total_participants": len(current_data["applicants"]),
-            "last_updated": datetime.now().isoformat(),
-            "version": "1.0",
-            "description": "PM-KISAN Synthetic Database"
-        },
-        "participants": []
+    metadata = {
+        "total_participants": len(current_data["applicants"]),
+        "last_updated": datetime.now().isoformat(),
+        "version": "1.0",
+        "description": "PM-KISAN Synthetic Database"
     }
     
-    # Transform each applicant
+    # Transform each applicant into the compact participant table
+    participants = ParticipantTable()
     for index, applicant in enumerate(current_data["applicants"]):
-        new_participant = {
+        participants.append({
             "participant_id": index + 1,
             "aadhaar": applicant["aadhaar"],
             "name": applicant["name"],
@@ -31,18 +48,25 @@ def transform_database():
             "eligible": applicant["eligible"],
             "decision_date": datetime.now().isoformat(),
             "explanation_cid": None  # Will be filled when explanations are generated
-        }
-        new_data["participants"].append(new_participant)
+        })
     
     # Save the transformed data
-    with open('transformed_synthetic_data.json', 'w') as f:
-        json.dump(new_data, f, indent=2)
+    write_database_json('transformed_synthetic_data.json', metadata, participants)
+
+    # Columnar copy: typed, memory-mappable columns (see columnar_db.py)
+    write_columns(COLUMNAR_PATH, participants.to_columns(), len(participants), metadata)
+    stats = participants.stats()
     
-    print(f"✅ Transformed database saved as 'transformed_synthetic_data.json'")
-    print(f"📊 Total participants: {new_data['metadata']['total_participants']}")
-    print(f"🗓️ Last updated: {new_data['metadata']['last_updated']}")
+    print(f"✅ Transformed database saved as 'transformed_synthetic_data.json' and '{COLUMNAR_PATH}/'")
+    print(f"📊 Total participants: {metadata['total_participants']} ({stats['eligible_count']} eligible)")
+    print(f"🗓️ Last updated: {metadata['last_updated']}")
     
-    return new_data
+    return metadata, participants
+
+def transform_database():
+    """Transform and save the database; returns {"metadata", "participants": [participant dicts]}"""
+    metadata, participants = transform_database_table()
+    return {"metadata": metadata, "participants": participants.rows(range(len(participants)))}
 
 if __name__ == "__main__":
-    transform_database()
\ No newline at end of file
+    transform_database_table()
\ No newline at end of file